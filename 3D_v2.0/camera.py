@@ -0,0 +1,139 @@
+import math
+
+import numpy as np
+
+
+def _rotation_x(angle):
+    c, s = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+    return np.array([[1, 0, 0, 0], [0, c, -s, 0], [0, s, c, 0], [0, 0, 0, 1]], dtype=np.float64)
+
+
+def _rotation_y(angle):
+    c, s = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+    return np.array([[c, 0, s, 0], [0, 1, 0, 0], [-s, 0, c, 0], [0, 0, 0, 1]], dtype=np.float64)
+
+
+def _rotation_z(angle):
+    c, s = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+    return np.array([[c, -s, 0, 0], [s, c, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]], dtype=np.float64)
+
+
+def orbit_pose(yaw, pitch=0.0, distance=400.0, target=(0, 0, 0)):
+    """Положение и поворот камеры на сфере радиуса distance вокруг target, смотрящей в target.
+
+    yaw - поворот вокруг оси y, pitch - вокруг оси x, в градусах, как у
+    Camera.rotation; при нулевых углах камера стоит перед target по -z.
+    """
+    rotation = (pitch, yaw, 0.0)
+    # Направление взгляда - ось z камеры в мировых координатах
+    forward = (_rotation_x(pitch) @ _rotation_y(yaw))[2, :3]
+    position = np.asarray(target, dtype=np.float64) - distance * forward
+    return position, rotation
+
+
+class Camera:
+    """Положение и поворот камеры с кэшированными матрицами вида и вида-проекции.
+
+    Матрицы пересчитываются только после изменения положения, поворота
+    или области вывода (флаг dirty), а не для каждой вершины. Проекция
+    та же, что была в виджетах: x * focal / z * base_scale с поправкой на
+    соотношение сторон и началом координат в центре окна; flip_y
+    переворачивает ось y экрана. Точки ближе near к камере не рисуются.
+    """
+
+    def __init__(self, position=(0, 0, -400), rotation=(0, 0, 0), focal=300, flip_y=False, near=1.0):
+        self._position = np.array(position, dtype=np.float64)
+        self._rotation = np.array(rotation, dtype=np.float64)
+        self.focal = focal
+        self.flip_y = flip_y
+        self.near = near
+        self._viewport = (1, 1, 1.0)  # Ширина, высота, base_scale
+        self._view = None
+        self._view_projection = None
+        self.dirty = True
+        self.rebuilds = 0  # Сколько раз матрицы пересчитывались, для замеров
+
+    @property
+    def position(self):
+        return self._position.copy()
+
+    @position.setter
+    def position(self, value):
+        self._position = np.array(value, dtype=np.float64)
+        self.dirty = True
+
+    @property
+    def rotation(self):
+        return self._rotation.copy()
+
+    @rotation.setter
+    def rotation(self, value):
+        self._rotation = np.array(value, dtype=np.float64)
+        self.dirty = True
+
+    def move(self, dx=0, dy=0, dz=0):
+        self._position += (dx, dy, dz)
+        self.dirty = True
+
+    def set_viewport(self, width, height, base_scale):
+        viewport = (max(width, 1), max(height, 1), base_scale)
+        if viewport != self._viewport:
+            self._viewport = viewport
+            self.dirty = True
+
+    def _rebuild(self):
+        rotation = _rotation_x(self._rotation[0]) @ _rotation_y(self._rotation[1]) @ _rotation_z(self._rotation[2])
+        translation = np.eye(4)
+        translation[:3, 3] = -self._position
+        self._view = rotation @ translation
+        self._view_projection = self.projection_matrix() @ self._view
+        self.dirty = False
+        self.rebuilds += 1
+
+    def view_matrix(self):
+        if self.dirty:
+            self._rebuild()
+        return self._view
+
+    def view_projection_matrix(self):
+        """После умножения x и y - экранные координаты, умноженные на w, а w - глубина в системе камеры."""
+        if self.dirty:
+            self._rebuild()
+        return self._view_projection
+
+    def _scales(self):
+        width, height, base_scale = self._viewport
+        aspect_ratio = width / height
+        scale_x = self.focal * base_scale * (1 / aspect_ratio if aspect_ratio > 1 else 1)
+        scale_y = self.focal * base_scale * (1 if aspect_ratio > 1 else aspect_ratio)
+        return scale_x, scale_y
+
+    def frustum_planes(self):
+        """Плоскости пирамиды видимости (5, 4) в системе камеры: ближняя, левая, правая, нижняя, верхняя.
+
+        Точка p внутри, если n . p + d >= 0 для всех плоскостей; нормали единичные.
+        """
+        width, height, _ = self._viewport
+        scale_x, scale_y = self._scales()
+        # Экранный x = scale_x * x / z + width / 2 лежит в [0, width], то есть |scale_x * x| <= width / 2 * z
+        planes = np.array([
+            [0, 0, 1, -self.near],
+            [scale_x, 0, width / 2, 0],
+            [-scale_x, 0, width / 2, 0],
+            [0, scale_y, height / 2, 0],
+            [0, -scale_y, height / 2, 0],
+        ], dtype=np.float64)
+        planes /= np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+        return planes
+
+    def projection_matrix(self):
+        width, height, _ = self._viewport
+        scale_x, scale_y = self._scales()
+        if self.flip_y:
+            scale_y = -scale_y
+        return np.array([
+            [scale_x, 0, width / 2, 0],
+            [0, scale_y, height / 2, 0],
+            [0, 0, 1, 0],
+            [0, 0, 1, 0],
+        ], dtype=np.float64)
@@ -0,0 +1,107 @@
+import numpy as np
+
+from rasterizer import triangulate
+
+
+def bounding_sphere(points):
+    """Центр и радиус сферы, содержащей все точки (N, 3); центр - середина габаритного прямоугольника."""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    if not len(points):
+        return np.zeros(3), 0.0
+    center = (points.min(axis=0) + points.max(axis=0)) / 2
+    return center, float(np.linalg.norm(points - center, axis=1).max())
+
+
+def sphere_outside(planes, center, radius):
+    """Сфера целиком снаружи одной из плоскостей (K, 4); внутри n . p + d >= 0."""
+    return bool(np.any(planes[:, :3] @ center + planes[:, 3] < -radius))
+
+
+def spheres_outside(planes, centers, radii):
+    """Какие из сфер (K, 3), (K,) целиком снаружи одной из плоскостей (P, 4)."""
+    return np.any(centers @ planes[:, :3].T + planes[:, 3] < -np.asarray(radii)[:, None], axis=1)
+
+
+def transform_normals(matrix, normals):
+    # Обратная транспонированная матрица сохраняет перпендикулярность нормалей граням;
+    # для стопки матриц (K, 4, 4) - нормали (K, N, 3)
+    normal_matrix = np.swapaxes(np.linalg.inv(np.asarray(matrix, dtype=np.float64)[..., :3, :3]), -1, -2)
+    return np.asarray(normals, dtype=np.float64) @ np.swapaxes(normal_matrix, -1, -2)
+
+
+def back_facing(outward_normals, centers, eye):
+    """Грани, внешняя нормаль которых смотрит от точки наблюдения eye (всё в одной системе координат)."""
+    return np.einsum('...j,...j->...', outward_normals, np.asarray(eye, dtype=np.float64) - centers) <= 0
+
+
+def clip_polygon(depths, near):
+    """Отсечение многоугольника плоскостью глубины near (Сазерленд - Ходжмен).
+
+    Для каждой вершины результата возвращает (i, j, t): вершина лежит на
+    отрезке между исходными вершинами i и j, v = v_i + t * (v_j - v_i).
+    Так по одному результату интерполируются любые атрибуты вершин.
+    Пустой список - многоугольник целиком за плоскостью.
+    """
+    result = []
+    count = len(depths)
+    for i in range(count):
+        j = (i + 1) % count
+        inside_i, inside_j = depths[i] >= near, depths[j] >= near
+        if inside_i:
+            result.append((i, i, 0.0))
+        if inside_i != inside_j:
+            result.append((i, j, (near - depths[i]) / (depths[j] - depths[i])))
+    return result
+
+
+def clip_segment(depth_a, depth_b, near):
+    """Доли (t0, t1) отрезка a-b перед плоскостью глубины near или None, если отрезок целиком за ней."""
+    if depth_a < near and depth_b < near:
+        return None
+    if depth_a < near:
+        return (near - depth_a) / (depth_b - depth_a), 1.0
+    if depth_b < near:
+        return 0.0, (near - depth_a) / (depth_b - depth_a)
+    return 0.0, 1.0
+
+
+def interpolate_polygon(values, polygon):
+    """Атрибуты вершин (n, ...) для вершин результата clip_polygon."""
+    values = np.asarray(values, dtype=np.float64)
+    i, j, t = (np.array(column) for column in zip(*polygon))
+    t = t.reshape(-1, *([1] * (values.ndim - 1)))
+    return values[i] + t * (values[j] - values[i])
+
+
+def clipped_triangles(corner_depths, near):
+    """Треугольники граней (F, C) после отсечения ближней плоскостью.
+
+    Возвращает номера граней (T,), веса углов грани для вершин
+    треугольников (T, 3, C) и число отсечённых граней. Атрибут вершины -
+    сумма атрибутов углов с этими весами. Грани целиком перед плоскостью
+    разбиваются веером без цикла, пересекающие её отсекаются по одной,
+    остальные пропадают.
+    """
+    corner_depths = np.asarray(corner_depths, dtype=np.float64)
+    count, corners = corner_depths.shape
+    inside = corner_depths >= near
+    whole = np.flatnonzero(inside.all(axis=1))
+
+    face_ids, fan = triangulate(np.zeros((len(whole), corners), dtype=np.int64))
+    face_ids = [whole[face_ids]]
+    weights = [np.eye(corners)[fan]]
+
+    crossing = np.flatnonzero(inside.any(axis=1) & ~inside.all(axis=1))
+    for face in crossing:
+        polygon = clip_polygon(corner_depths[face], near)
+        vertex_weights = interpolate_polygon(np.eye(corners), polygon)
+        face_fan = [[0, k, k + 1] for k in range(1, len(polygon) - 1)]
+        face_ids.append(np.full(len(face_fan), face))
+        weights.append(vertex_weights[face_fan].reshape(-1, 3, corners))
+
+    return np.concatenate(face_ids), np.concatenate(weights), len(crossing)
+
+
+def empty_face_stats():
+    """Счётчики граней кадра: всего, отброшенных задних и вне обзора, обрезанных ближней плоскостью, нарисованных."""
+    return {'total': 0, 'back': 0, 'frustum': 0, 'clipped': 0, 'drawn': 0}
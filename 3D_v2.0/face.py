@@ -1,17 +1,19 @@
 from math_utils import Vector3D
 
 class Face:
-    def __init__(self, vertices, color):
-        self.vertices = vertices
+    def __init__(self, indices, color, vertices):
+        self.indices = list(indices)  # Номера вершин в общем списке вершин буквы
         self.color = color
-        self.normal = self.calculate_normal()
-        self.center = self.calculate_center()
+        self.normal = self.calculate_normal(vertices)
+        self.center = self.calculate_center(vertices)
+        self.outward = self.normal  # Нормаль наружу тела, для отсечения задних граней
 
-    def calculate_normal(self):
-        if len(self.vertices) < 3:
+    def calculate_normal(self, vertices):
+        if len(self.indices) < 3:
             return Vector3D(0, 0, 0)
-        v1 = self.vertices[1] - self.vertices[0]
-        v2 = self.vertices[2] - self.vertices[0]
+        p0, p1, p2 = (vertices[i] for i in self.indices[:3])
+        v1 = p1 - p0
+        v2 = p2 - p0
         normal = Vector3D(
             v1.y * v2.z - v1.z * v2.y,
             v1.z * v2.x - v1.x * v2.z,
@@ -19,10 +21,17 @@ class Face:
         )
         return normal.normalized()
 
-    def calculate_center(self):
-        if not self.vertices:
+    def orient_outward(self, inner_point):
+        # Обход вершин у передней и задней граней части одинаковый, поэтому
+        # направление normal не всегда наружу; outward разворачивается от точки внутри части
+        if self.normal.dot(self.center - inner_point) < 0:
+            self.outward = self.normal * -1
+
+    def calculate_center(self, vertices):
+        if not self.indices:
             return Vector3D(0, 0, 0)
-        x = sum(v.x for v in self.vertices) / len(self.vertices)
-        y = sum(v.y for v in self.vertices) / len(self.vertices)
-        z = sum(v.z for v in self.vertices) / len(self.vertices)
-        return Vector3D(x, y, z) 
\ No newline at end of file
+        points = [vertices[i] for i in self.indices]
+        x = sum(v.x for v in points) / len(points)
+        y = sum(v.y for v in points) / len(points)
+        z = sum(v.z for v in points) / len(points)
+        return Vector3D(x, y, z)
\ No newline at end of file
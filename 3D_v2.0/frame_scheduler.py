@@ -0,0 +1,316 @@
+import math
+import time
+from collections import deque
+from enum import Enum
+
+from PySide6.QtCore import QObject, QTimer, Qt, Signal
+
+
+TARGET_FPS = 60
+IDLE_MS = 200  # Пауза во вводе, после которой кадр перерисовывается в полном качестве
+PREVIEW_ABOVE_MS = 10.0  # Упрощать кадры, только если полный кадр дольше этого
+PREVIEW_SCALE = 0.5  # Доля разрешения упрощённого кадра
+RESOLUTION_TARGET_FPS = 30  # Частота, которую держит динамическое разрешение
+MIN_SCALE = 0.25
+SCALE_STEP = 1 / 16  # Разрешение меняется ступенями, чтобы буферы кадра не пересоздавались каждый кадр
+RESOLUTION_WINDOW = 4  # Кадров, по медиане которых принимается решение
+SLOWER_THAN = 1.1  # Доля бюджета кадра, выше которой качество снижается
+FASTER_THAN = 0.7  # Доля бюджета кадра, ниже которой качество повышается
+
+
+class Quality(Enum):
+    PREVIEW = "Упрощённое"
+    FULL = "Полное"
+
+
+class InputAccumulator:
+    """Ввод, пришедший между кадрами.
+
+    Повороты мышью и шаги колеса складываются, из отложенных вызовов
+    (ползунки) с одним ключом остаётся последний. take отдаёт накопленное
+    и начинает заново.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.rotation = [0.0, 0.0]  # Углы вокруг осей x и y, градусы
+        self.zoom = 0.0  # Шаги колеса, положительные - от себя
+        self.calls = {}  # Ключ -> (функция, аргументы)
+        self.events = 0
+
+    def rotate(self, angle_x, angle_y):
+        self.rotation[0] += angle_x
+        self.rotation[1] += angle_y
+        self.events += 1
+
+    def zoom_by(self, steps):
+        self.zoom += steps
+        self.events += 1
+
+    def defer(self, key, function, *args):
+        self.calls[key] = (function, args)
+        self.events += 1
+
+    def empty(self):
+        return self.events == 0
+
+    def take(self):
+        taken = InputAccumulator()
+        taken.rotation, taken.zoom, taken.calls, taken.events = self.rotation, self.zoom, self.calls, self.events
+        self.clear()
+        return taken
+
+    def run_calls(self):
+        for function, args in self.calls.values():
+            function(*args)
+
+
+class FrameScheduler(QObject):
+    """Перерисовка виджета по таймеру, не чаще одного кадра за интервал target_fps.
+
+    Обработчики ввода не меняют сцену сами, а складывают изменения
+    (rotate, zoom, defer) и просят кадр. На ближайшем тике всё
+    накопленное применяется одним вызовом apply_input и виджет
+    перерисовывается один раз. Пока ввод идёт, таймер тикает; тики,
+    пропущенные из-за долгого кадра, считаются пропущенными кадрами
+    (dropped_frames и сигнал frames_dropped). Без ввода таймер стоит.
+    """
+
+    frames_dropped = Signal(int)
+    input_received = Signal()
+
+    def __init__(self, widget, apply_input, target_fps=TARGET_FPS):
+        super().__init__(widget)
+        self.widget = widget
+        self.apply_input = apply_input
+        self.input = InputAccumulator()
+        self.frames = 0
+        self.dropped_frames = 0
+        self.input_events = 0
+        self.last_input_events = 0  # Сколько событий ввода вошло в последний кадр
+        self._requested = False
+        self._last_tick = None
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self._tick)
+        self.set_target_fps(target_fps)
+
+    def set_target_fps(self, fps):
+        self.target_fps = max(float(fps), 1.0)
+        self.interval = 1.0 / self.target_fps
+        self.timer.setInterval(max(int(round(self.interval * 1000)), 1))
+
+    def rotate(self, angle_x, angle_y):
+        self.input.rotate(angle_x, angle_y)
+        self.request()
+
+    def zoom(self, steps):
+        self.input.zoom_by(steps)
+        self.request()
+
+    def defer(self, key, function, *args):
+        """Вызвать function(*args) перед следующим кадром; из вызовов с одним ключом выполняется последний."""
+        self.input.defer(key, function, *args)
+        self.request()
+
+    def request(self):
+        self._requested = True
+        self.input_received.emit()
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+        """Применяет накопленный ввод сразу, без кадра; вернёт False, если применять нечего."""
+        if self.input.empty():
+            return False
+        taken = self.input.take()
+        self.input_events += taken.events
+        self.apply_input(taken)
+        return True
+
+    def _tick(self):
+        if not self._requested and self.input.empty():
+            # Ввода нет: таймер останавливается, простой не считается пропуском
+            self.timer.stop()
+            self._last_tick = None
+            return
+
+        now = time.perf_counter()
+        if self._last_tick is not None:
+            # Кадр, начавшийся на полтора интервала позже предыдущего, пропустил один тик
+            missed = int((now - self._last_tick) / self.interval + 0.5) - 1
+            if missed > 0:
+                self.dropped_frames += missed
+                self.frames_dropped.emit(missed)
+        self._last_tick = now
+
+        self._requested = False
+        events = self.input.events
+        self.flush()
+        self.last_input_events = events
+        self.frames += 1
+        self.widget.repaint()
+
+    def stats(self):
+        return {'frames': self.frames, 'dropped_frames': self.dropped_frames, 'input_events': self.input_events,
+                'target_fps': self.target_fps}
+
+
+class ResolutionController(QObject):
+    """Динамическое разрешение: доля разрешения кадра и уровень детализации под целевую частоту.
+
+    frame_done получает время каждого кадра, нарисованного с текущими
+    scale и lod. По медиане последних RESOLUTION_WINDOW кадров: если
+    кадр дольше бюджета 1000 / target_fps мс, сначала уменьшается scale
+    (до min_scale), затем растёт lod (до lod_levels); если кадр заметно
+    быстрее бюджета, то же в обратном порядке. Время кадра считается
+    пропорциональным числу пикселей, поэтому новая доля разрешения -
+    корень из отношения бюджета ко времени, округлённый до SCALE_STEP.
+    После каждого изменения окно замеров начинается заново. Изменения
+    сообщаются сигналом changed(scale, lod), текущее состояние - stats().
+    """
+
+    changed = Signal(float, int)
+
+    def __init__(self, parent=None, target_fps=RESOLUTION_TARGET_FPS, min_scale=MIN_SCALE, max_scale=1.0,
+                 scale=PREVIEW_SCALE, window=RESOLUTION_WINDOW):
+        super().__init__(parent)
+        self.enabled = True
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.scale = min(max(scale, min_scale), max_scale)
+        self.lod = 0  # 0 - полная детализация
+        self.lod_levels = 0  # Сколько уровней упрощения есть у текущего способа рисования
+        self.changes = 0
+        self.last_frame_ms = None
+        self.frame_times = deque(maxlen=window)
+        self.set_target_fps(target_fps)
+
+    def set_target_fps(self, fps):
+        self.target_fps = max(float(fps), 1.0)
+        self.budget_ms = 1000.0 / self.target_fps
+        self.frame_times.clear()
+
+    def set_lod_levels(self, levels):
+        self.lod_levels = max(int(levels), 0)
+        if self.lod > self.lod_levels:
+            self._set(self.scale, self.lod_levels)
+
+    def _quantize(self, scale):
+        scale = round(scale / SCALE_STEP) * SCALE_STEP
+        return min(max(scale, self.min_scale), self.max_scale)
+
+    def _set(self, scale, lod):
+        self.frame_times.clear()
+        if (scale, lod) == (self.scale, self.lod):
+            return
+        self.scale, self.lod = scale, lod
+        self.changes += 1
+        self.changed.emit(scale, lod)
+
+    def frame_done(self, frame_ms):
+        """Время кадра, нарисованного с текущими scale и lod; может изменить их для следующих кадров."""
+        self.last_frame_ms = frame_ms
+        self.frame_times.append(frame_ms)
+        if len(self.frame_times) < self.frame_times.maxlen:
+            return
+        measured = self._median()
+        if measured > self.budget_ms * SLOWER_THAN:
+            if self.scale > self.min_scale:
+                target = self._quantize(self.scale * math.sqrt(self.budget_ms / measured))
+                self._set(min(target, self._quantize(self.scale - SCALE_STEP)), self.lod)
+            elif self.lod < self.lod_levels:
+                self._set(self.scale, self.lod + 1)
+        elif measured < self.budget_ms * FASTER_THAN:
+            if self.lod > 0:
+                self._set(self.scale, self.lod - 1)
+            elif self.scale < self.max_scale:
+                # Рост с запасом до бюджета, чтобы не качаться между соседними ступенями
+                target = self._quantize(self.scale * math.sqrt(SLOWER_THAN * FASTER_THAN * self.budget_ms / measured))
+                self._set(max(target, self._quantize(self.scale + SCALE_STEP)), self.lod)
+
+    def _median(self):
+        # Медиана, а не среднее: одиночный долгий кадр (сборка мусора, пересоздание буфера) не снижает качество
+        return sorted(self.frame_times)[len(self.frame_times) // 2]
+
+    def stats(self):
+        return {'scale': self.scale, 'lod': self.lod, 'target_fps': self.target_fps, 'budget_ms': self.budget_ms,
+                'frame_ms': self._median() if self.frame_times else self.last_frame_ms,
+                'last_frame_ms': self.last_frame_ms, 'changes': self.changes}
+
+
+class QualityScheduler(QObject):
+    """Качество кадра в зависимости от ввода: упрощённое при взаимодействии, полное после паузы.
+
+    interaction() вызывается на каждом событии ввода. Пока события идут
+    чаще idle_ms, кадры упрощённые: без сглаживания, с плоским
+    затенением и в доле preview_scale разрешения (каждое упрощение
+    отключается своим атрибутом). После паузы виджет перерисовывается
+    один раз в полном качестве. Если полный кадр рисуется быстрее
+    preview_above_ms, упрощать незачем и кадры остаются полными.
+    Каждый нарисованный кадр сообщает своё качество и время сигналом
+    frame_rendered.
+
+    Пока resolution.enabled, доля разрешения и уровень детализации
+    упрощённых кадров не постоянны, а подбираются ResolutionController
+    по времени этих кадров под его целевую частоту.
+    """
+
+    frame_rendered = Signal(object, float)
+
+    def __init__(self, widget, idle_ms=IDLE_MS, preview_above_ms=PREVIEW_ABOVE_MS, preview_scale=PREVIEW_SCALE):
+        super().__init__(widget)
+        self.widget = widget
+        self.enabled = True
+        self.idle_ms = idle_ms
+        self.preview_above_ms = preview_above_ms
+        self.preview_scale = preview_scale
+        self.preview_flat = True
+        self.preview_antialias = False
+        self.interacting = False
+        self.last_quality = Quality.FULL
+        self.last_full_ms = None  # Время последнего полного кадра
+        self.resolution = ResolutionController(self, scale=preview_scale)
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.timeout.connect(self._refine)
+
+    def interaction(self):
+        self.interacting = True
+        self.idle_timer.start(self.idle_ms)
+
+    def _refine(self):
+        self.interacting = False
+        if self.last_quality != Quality.FULL:
+            self.widget.update()
+
+    def frame_quality(self):
+        """Качество следующего кадра."""
+        if not (self.enabled and self.interacting):
+            return Quality.FULL
+        if self.last_full_ms is not None and self.last_full_ms <= self.preview_above_ms:
+            return Quality.FULL
+        return Quality.PREVIEW
+
+    def frame_scale(self, quality):
+        """Доля разрешения кадра качества quality."""
+        if quality == Quality.FULL:
+            return 1.0
+        return self.resolution.scale if self.resolution.enabled else self.preview_scale
+
+    def frame_lod(self, quality):
+        """Уровень детализации кадра качества quality, 0 - полный."""
+        if quality == Quality.FULL or not self.resolution.enabled:
+            return 0
+        return self.resolution.lod
+
+    def frame_done(self, quality, frame_ms):
+        """Сообщает о нарисованном кадре: его качество и время в миллисекундах."""
+        if quality == Quality.FULL:
+            self.last_full_ms = frame_ms
+        elif self.resolution.enabled:
+            self.resolution.frame_done(frame_ms)
+        self.last_quality = quality
+        self.frame_rendered.emit(quality, frame_ms)
@@ -1,8 +1,30 @@
+import numpy as np
+
 from math_utils import Vector3D
 from face import Face
+from culling import bounding_sphere
 from PySide6.QtGui import QColor
 
 
+# Буквы из прямых штрихов между узлами сетки 3x3, пронумерованными как на цифровой клавиатуре:
+# 1 2 3 - верх, 4 5 6 - середина, 7 8 9 - низ. X и K строятся своими методами
+GLYPH_STROKES = {
+    'A': '13 17 39 46', 'B': '17 12 26 46 69 79', 'C': '13 17 79', 'D': '17 12 26 68 78',
+    'E': '13 17 79 45', 'F': '13 17 45', 'G': '13 17 79 69 56', 'H': '17 39 46', 'I': '13 28 79',
+    'J': '39 79 47', 'L': '17 79', 'M': '17 39 15 35', 'N': '17 39 19', 'O': '13 17 39 79',
+    'P': '13 17 36 46', 'Q': '13 17 39 79 59', 'R': '13 17 36 46 59', 'S': '13 14 46 69 79',
+    'T': '13 28', 'U': '17 39 79', 'V': '18 38', 'W': '17 39 75 95', 'Y': '15 35 58', 'Z': '13 37 79',
+    '0': '13 17 39 79 37', '1': '28 12', '2': '13 36 46 47 79', '3': '13 39 79 46', '4': '14 46 39',
+    '5': '13 14 46 69 79', '6': '13 17 79 69 46', '7': '13 39', '8': '13 17 39 79 46', '9': '13 14 39 79 46',
+    '-': '46', '+': '46 28', '=': '46 79', '_': '79', '/': '73',
+}
+
+
+def has_geometry(letter_type):
+    """Есть ли у символа трёхмерная форма (пробел и неизвестные символы её не имеют)."""
+    return letter_type in ('X', 'K') or letter_type in GLYPH_STROKES
+
+
 class Letter3D:
     def __init__(self, height, width, depth, offset_x=0, letter_type='X'):
         self.height = height
@@ -12,18 +34,45 @@ class Letter3D:
         self.letter_type = letter_type
         self.vertices = []
         self.faces = []
+        self.vertex_array = np.zeros((0, 3))  # Вершины (N, 3) для преобразования одной операцией
+        self.face_indices = np.zeros((0, 4), dtype=np.int64)  # Номера вершин каждой грани
+        self.face_outward = np.zeros((0, 3))  # Нормали граней наружу тела
         self.update_geometry()
 
     def update_geometry(self):
         self.vertices = []
         self.faces = []
+        self._vertex_index = {}  # Координаты -> номер вершины внутри текущей части
         h, w, d, ox = self.height, self.width, self.depth, self.offset_x
         bar_thickness = h * 0.2
 
         if self.letter_type == 'X':
             self._create_letter_X(h, w, d, ox, bar_thickness)
-        else:
+        elif self.letter_type == 'K':
             self._create_letter_K(h, w, d, ox, bar_thickness)
+        elif self.letter_type in GLYPH_STROKES:
+            self._create_letter_strokes(GLYPH_STROKES[self.letter_type], h, w, d, ox, bar_thickness)
+        self._build_buffers()
+
+    def _build_buffers(self):
+        self.vertex_array = np.array([[v.x, v.y, v.z] for v in self.vertices], dtype=np.float64).reshape(-1, 3)
+        self.face_indices = np.array([face.indices for face in self.faces],
+                                     dtype=np.int64).reshape(len(self.faces), -1)
+        self.face_outward = np.array([[f.outward.x, f.outward.y, f.outward.z] for f in self.faces],
+                                     dtype=np.float64).reshape(-1, 3)
+        # Сфера вокруг буквы: если она вне поля зрения, грани не обрабатываются
+        self.bounding_center, self.bounding_radius = bounding_sphere(self.vertex_array)
+
+    def _add_vertices(self, points):
+        # Номера точек в общем списке вершин, новые точки добавляются в конец
+        indices = []
+        for v in points:
+            key = (round(v.x, 9), round(v.y, 9), round(v.z, 9))
+            if key not in self._vertex_index:
+                self._vertex_index[key] = len(self.vertices)
+                self.vertices.append(v)
+            indices.append(self._vertex_index[key])
+        return indices
 
     def _create_letter_X(self, h, w, d, ox, bar_thickness):
         hw = w / 2
@@ -50,7 +99,6 @@ class Letter3D:
             Vector3D(ox - hw + bt, 0, hd), Vector3D(ox - hw, 0, hd)
         ]
 
-        self.vertices = front_diag1 + back_diag1 + front_diag2 + back_diag2
         colors = [QColor(255, 255, 255), QColor(255, 255, 255), QColor(255, 255, 255)]
         self._create_faces_for_part(front_diag1, back_diag1, colors)
         self._create_faces_for_part(front_diag2, back_diag2, colors)
@@ -91,29 +139,58 @@ class Letter3D:
             Vector3D(ox + hw - bt, 0, hd), Vector3D(ox - hw + bt, mid_height - bt - 2, hd)
         ]
 
-        self.vertices = (front_vert + back_vert +
-                         front_top_diag + back_top_diag +
-                         front_bottom_diag + back_bottom_diag)
-
         colors = [QColor(255, 255, 255), QColor(255, 255, 255), QColor(255, 255, 255)]
         self._create_faces_for_part(front_vert, back_vert, colors)
         self._create_faces_for_part(front_top_diag, back_top_diag, colors)
         self._create_faces_for_part(front_bottom_diag, back_bottom_diag, colors)
 
+    def _create_letter_strokes(self, strokes, h, w, d, ox, bar_thickness):
+        hw = w / 2
+        hd = d / 2
+        half = bar_thickness / 2
+
+        # Оси штрихов отступают от края ячейки на полтолщины, чтобы буква занимала w x h, как K
+        columns = (ox - hw + half, ox, ox + hw - half)
+        rows = (h - half, h / 2, half)
+        colors = [QColor(255, 255, 255), QColor(255, 255, 255), QColor(255, 255, 255)]
+        for stroke in strokes.split():
+            (x0, y0), (x1, y1) = ((columns[(int(node) - 1) % 3], rows[(int(node) - 1) // 3]) for node in stroke)
+            length = np.hypot(x1 - x0, y1 - y0)
+            ux, uy = (x1 - x0) / length * half, (y1 - y0) / length * half
+            # Прямоугольник вдоль штриха, продлённый на полтолщины с концов, чтобы углы стыков не выщербились
+            outline = [(x0 - ux - uy, y0 - uy + ux), (x1 + ux - uy, y1 + uy + ux),
+                       (x1 + ux + uy, y1 + uy - ux), (x0 - ux + uy, y0 - uy - ux)]
+            front = [Vector3D(x, y, -hd) for x, y in outline]
+            back = [Vector3D(x, y, hd) for x, y in outline]
+            self._create_faces_for_part(front, back, colors)
+
     def _create_faces_for_part(self, front_vertices, back_vertices, colors):
-        self.faces.append(Face(front_vertices, colors[0]))
-        self.faces.append(Face(back_vertices, colors[0]))
-        for i in range(len(front_vertices)):
-            next_i = (i + 1) % len(front_vertices)
+        first_face = len(self.faces)
+        # Точки совпадают только внутри части: у стыка разных частей свои вершины,
+        # иначе сглаженные нормали вершин смешали бы грани разных частей
+        self._vertex_index = {}
+        front = self._add_vertices(front_vertices)
+        back = self._add_vertices(back_vertices)
+        self.faces.append(Face(front, colors[0], self.vertices))
+        self.faces.append(Face(back, colors[0], self.vertices))
+        for i in range(len(front)):
+            next_i = (i + 1) % len(front)
             side_face = [
-                front_vertices[i],
-                front_vertices[next_i],
-                back_vertices[next_i],
-                back_vertices[i]
+                front[i],
+                front[next_i],
+                back[next_i],
+                back[i]
             ]
-            self.faces.append(Face(side_face, colors[1]))
-        if len(front_vertices) >= 4:
-            top_face = [front_vertices[0], front_vertices[1], back_vertices[1], back_vertices[0]]
-            bottom_face = [front_vertices[2], front_vertices[3], back_vertices[3], back_vertices[2]]
-            self.faces.append(Face(top_face, colors[2]))
-            self.faces.append(Face(bottom_face, colors[2]))
\ No newline at end of file
+            self.faces.append(Face(side_face, colors[1], self.vertices))
+        if len(front) >= 4:
+            top_face = [front[0], front[1], back[1], back[0]]
+            bottom_face = [front[2], front[3], back[3], back[2]]
+            self.faces.append(Face(top_face, colors[2], self.vertices))
+            self.faces.append(Face(bottom_face, colors[2], self.vertices))
+
+        # Часть выпуклая, её центр лежит внутри
+        points = front_vertices + back_vertices
+        inner_point = Vector3D(sum(v.x for v in points) / len(points), sum(v.y for v in points) / len(points),
+                               sum(v.z for v in points) / len(points))
+        for face in self.faces[first_face:]:
+            face.orient_outward(inner_point)
@@ -0,0 +1,106 @@
+import numpy as np
+
+
+AMBIENT = 0.2
+DIFFUSE = 0.7
+SPECULAR = 0.5
+SHININESS = 32
+
+
+def _normalize(vectors):
+    lengths = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, lengths, out=np.zeros_like(vectors), where=lengths > 0)
+
+
+def prepare_surfaces(positions, normals, camera_pos, dtype=np.float64):
+    """Часть освещения, не зависящая от источника света.
+
+    Возвращает (позиции (3, N), единичные нормали (3, N), развёрнутые к
+    камере, единичные направления на камеру (3, N), косинусы между ними (N,)).
+    Координаты лежат отдельными строками, и освещение считается над
+    непрерывными массивами. Пока камера и геометрия не меняются, результат
+    годится для любого положения света (light_surfaces).
+    """
+    positions = np.asarray(positions, dtype=dtype).reshape(-1, 3)
+    normals = _normalize(np.asarray(normals, dtype=dtype).reshape(-1, 3))
+    view_vec = _normalize(np.asarray(camera_pos, dtype=dtype) - positions)
+
+    # Убедимся, что нормаль направлена к камере
+    facing = np.einsum('ij,ij->i', normals, view_vec)
+    normals = np.where(facing[:, None] < 0, -normals, normals)
+    return (np.ascontiguousarray(positions.T), np.ascontiguousarray(normals.T), np.ascontiguousarray(view_vec.T),
+            np.abs(facing))
+
+
+def light_surfaces(surfaces, light_pos, ambient=AMBIENT, diffuse=DIFFUSE, specular=SPECULAR,
+                   shininess=SHININESS, blinn=False):
+    """Яркость точек, подготовленных prepare_surfaces, для источника в light_pos; считает в их типе чисел.
+
+    Направление на свет не нормализуется по отдельности: скалярные
+    произведения с ним делятся на расстояние. Отражённый луч единичный,
+    поэтому блик Фонга выражается через N·L, N·V и L·V без нормализации.
+    """
+    positions, normals, view_vec, n_dot_v = surfaces
+    dtype = positions.dtype
+    lx, ly, lz = (np.asarray(value, dtype=dtype) - row for value, row in zip(light_pos, positions))
+
+    distance = lx * lx
+    distance += ly * ly
+    distance += lz * lz
+    np.sqrt(distance, out=distance)
+    inv_distance = np.divide(1, distance, out=np.zeros_like(distance), where=distance > 0)
+
+    n_dot_l = normals[0] * lx
+    n_dot_l += normals[1] * ly
+    n_dot_l += normals[2] * lz
+    n_dot_l *= inv_distance
+    l_dot_v = view_vec[0] * lx
+    l_dot_v += view_vec[1] * ly
+    l_dot_v += view_vec[2] * lz
+    l_dot_v *= inv_distance
+
+    if blinn:
+        # |L + V|^2 = |L|^2 + 2 L·V + |V|^2, у нулевых векторов длина 0
+        half_length = (distance > 0).astype(dtype)
+        half_length += 2 * l_dot_v
+        for row in view_vec:
+            half_length += row * row
+        np.sqrt(np.maximum(half_length, 0, out=half_length), out=half_length)
+        highlight = np.divide(n_dot_l + n_dot_v, half_length, out=np.zeros_like(half_length),
+                              where=half_length > 0)
+    else:
+        # Луч отражается как L - 2 (N·L) N, его длина 1
+        highlight = l_dot_v
+        highlight -= 2 * n_dot_l * n_dot_v
+    np.maximum(highlight, 0, out=highlight)
+    highlight **= shininess
+    highlight[n_dot_l <= 0] = 0
+    diff = np.maximum(n_dot_l, 0, out=n_dot_l)
+
+    # Затухание 1 / (1 + 0.0014 d + 0.000007 d^2)
+    attenuation = 0.000007 * distance
+    attenuation += 0.0014
+    attenuation *= distance
+    attenuation += 1
+
+    intensity = diff
+    intensity *= diffuse
+    intensity += ambient
+    highlight *= specular
+    intensity += highlight
+    intensity /= attenuation
+    return np.clip(intensity, 0.2, 1.0, out=intensity)
+
+
+def compute_intensities(positions, normals, light_pos, camera_pos, ambient=AMBIENT, diffuse=DIFFUSE,
+                        specular=SPECULAR, shininess=SHININESS, blinn=False):
+    """Яркость освещения для массивов точек (N, 3) и их нормалей (N, 3) одним вызовом.
+
+    Модель прежняя: фоновая, диффузная и зеркальная составляющие, затухание
+    с расстоянием до источника, результат ограничен отрезком [0.2, 1].
+    Нормали должны быть уже в мировых координатах; нормаль, смотрящая от
+    камеры, разворачивается. blinn=True считает блик по полувектору
+    (Блинн-Фонг) вместо отражённого луча.
+    """
+    return light_surfaces(prepare_surfaces(positions, normals, camera_pos), light_pos, ambient, diffuse,
+                          specular, shininess, blinn)
@@ -1,13 +1,24 @@
 import sys
 import math
+
+import numpy as np
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                                QHBoxLayout, QSlider, QLabel, QPushButton, QScrollArea,
-                               QSizePolicy, QGroupBox, QButtonGroup, QRadioButton)
-from PySide6.QtGui import (QPainter, QPen, QBrush, QColor, QPolygonF,
+                               QSizePolicy, QGroupBox, QButtonGroup, QRadioButton, QCheckBox, QSpinBox)
+from PySide6.QtGui import (QPen, QBrush, QColor, QPolygonF,
                            QLinearGradient, QRadialGradient)
-from PySide6.QtCore import Qt, QPoint, QPointF
+from PySide6.QtCore import Qt, QPointF
 from enum import Enum, auto
 
+from camera import Camera
+from math_utils import transform_points
+from lighting import prepare_surfaces, light_surfaces
+from rasterizer import Rasterizer, interpolate
+from frame_scheduler import Quality
+from culling import (bounding_sphere, sphere_outside, transform_normals, back_facing, clip_polygon,
+                     interpolate_polygon, clipped_triangles)
+from scene_view import SceneView
+
 
 class ShadingMode(Enum):
     FLAT = auto()
@@ -15,6 +26,16 @@ class ShadingMode(Enum):
     PHONG = auto()
 
 
+# Самое дорогое затенение на каждом уровне детализации растеризации
+RASTER_LOD_SHADING = (ShadingMode.PHONG, ShadingMode.GOURAUD, ShadingMode.FLAT)
+
+
+def lod_shading(mode, lod):
+    """Затенение mode, упрощённое до уровня детализации lod."""
+    modes = list(ShadingMode)
+    return min(mode, RASTER_LOD_SHADING[lod], key=modes.index)
+
+
 class DisplayMode(Enum):
     POINTS = "Точки"
     WIREFRAME = "Каркас"
@@ -88,6 +109,9 @@ class Matrix4x4:
                     result.m[i][j] = sum(self.m[i][k] * other.m[k][j] for k in range(4))
             return result
 
+    def to_array(self):
+        return np.array(self.m, dtype=np.float64)
+
     @staticmethod
     def translation(x, y, z):
         m = Matrix4x4()
@@ -136,25 +160,32 @@ class Matrix4x4:
 
 
 class Face:
-    def __init__(self, vertices, color):
-        self.vertices = vertices
+    def __init__(self, indices, color, vertices):
+        self.indices = list(indices)  # Номера вершин в общем списке вершин буквы
         self.color = color
-        self.normal = self.calculate_normal()
-        self.center = self.calculate_center()
+        self.normal = self.calculate_normal(vertices)
+        self.center = self.calculate_center(vertices)
+        self.outward = self.normal  # Нормаль наружу тела, для отсечения задних граней
 
-    def calculate_normal(self):
-        if len(self.vertices) < 3:
+    def calculate_normal(self, vertices):
+        if len(self.indices) < 3:
             return Vector3D(0, 0, 0)
-        v1 = self.vertices[1] - self.vertices[0]
-        v2 = self.vertices[2] - self.vertices[0]
-        return v1.cross(v2).normalized()
+        p0, p1, p2 = (vertices[i] for i in self.indices[:3])
+        return (p1 - p0).cross(p2 - p0).normalized()
+
+    def orient_outward(self, inner_point):
+        # Обход вершин у передней и задней граней части одинаковый, поэтому
+        # направление normal не всегда наружу; outward разворачивается от точки внутри части
+        if self.normal.dot(self.center - inner_point) < 0:
+            self.outward = -self.normal
 
-    def calculate_center(self):
-        if not self.vertices:
+    def calculate_center(self, vertices):
+        if not self.indices:
             return Vector3D(0, 0, 0)
-        x = sum(v.x for v in self.vertices) / len(self.vertices)
-        y = sum(v.y for v in self.vertices) / len(self.vertices)
-        z = sum(v.z for v in self.vertices) / len(self.vertices)
+        points = [vertices[i] for i in self.indices]
+        x = sum(v.x for v in points) / len(points)
+        y = sum(v.y for v in points) / len(points)
+        z = sum(v.z for v in points) / len(points)
         return Vector3D(x, y, z)
 
 
@@ -164,11 +195,19 @@ class Letter3D:
         self.letter_type = letter_type
         self.vertices = []
         self.faces = []
+        # Массивы геометрии, пересчитываются только в update_geometry
+        self.vertex_array = np.zeros((0, 3))
+        self.face_indices = np.zeros((0, 4), dtype=np.int64)
+        self.face_normals = np.zeros((0, 3))
+        self.face_outward = np.zeros((0, 3))
+        self.vertex_normals = np.zeros((0, 3))
+        self.geometry_version = 0  # Растёт при каждой перестройке массивов, по нему сцена сбрасывает кэш
         self.update_geometry()
 
     def update_geometry(self):
         self.vertices = []
         self.faces = []
+        self._vertex_index = {}  # Координаты -> номер вершины внутри текущей части
         h, w, d = 100, 60, 30  # Фиксированные размеры букв
         bt = h * 0.2  # Толщина элементов буквы
 
@@ -176,6 +215,30 @@ class Letter3D:
             self._create_letter_X(h, w, d, bt)
         elif self.letter_type == 'K':
             self._create_letter_K(h, w, d, bt)
+        self._build_buffers()
+
+    def _build_buffers(self):
+        self.geometry_version += 1
+        self.vertex_array = np.array([[v.x, v.y, v.z] for v in self.vertices], dtype=np.float64).reshape(-1, 3)
+        self.face_indices = np.array([face.indices for face in self.faces],
+                                     dtype=np.int64).reshape(len(self.faces), -1)
+        self.face_normals = np.array([[f.normal.x, f.normal.y, f.normal.z] for f in self.faces],
+                                     dtype=np.float64).reshape(-1, 3)
+        self.face_colors = np.array([[f.color.red(), f.color.green(), f.color.blue()] for f in self.faces],
+                                    dtype=np.float64).reshape(-1, 3)
+        self.face_outward = np.array([[f.outward.x, f.outward.y, f.outward.z] for f in self.faces],
+                                     dtype=np.float64).reshape(-1, 3)
+        # Сфера вокруг буквы: если она вне поля зрения, грани не обрабатываются
+        self.bounding_center, self.bounding_radius = bounding_sphere(self.vertex_array)
+
+        # Нормаль вершины - нормированная сумма нормалей граней, в которые она входит
+        sums = np.zeros_like(self.vertex_array)
+        np.add.at(sums, self.face_indices, self.face_normals[:, None, :])
+        lengths = np.linalg.norm(sums, axis=1, keepdims=True)
+        self.vertex_normals = np.divide(sums, lengths, out=np.zeros_like(sums), where=lengths > 0)
+        used = np.zeros(len(self.vertex_array), dtype=bool)
+        used[self.face_indices.ravel()] = True
+        self.vertex_normals[~used] = (0, 0, 1)
 
     def _create_letter_X(self, h, w, d, bt):
         hw = w / 2
@@ -195,7 +258,6 @@ class Letter3D:
         ]
         back_diag2 = [v + Vector3D(0, 0, d) for v in front_diag2]
 
-        self.vertices = front_diag1 + back_diag1 + front_diag2 + back_diag2
         colors = [QColor(255, 255, 255)] * 3
         self._create_faces_for_part(front_diag1, back_diag1, colors)
         self._create_faces_for_part(front_diag2, back_diag2, colors)
@@ -226,29 +288,52 @@ class Letter3D:
         ]
         back_bottom = [v + Vector3D(0, 0, d) for v in front_bottom]
 
-        self.vertices = front_vert + back_vert + front_top + back_top + front_bottom + back_bottom
         colors = [QColor(255, 255, 255)] * 3
         self._create_faces_for_part(front_vert, back_vert, colors)
         self._create_faces_for_part(front_top, back_top, colors)
         self._create_faces_for_part(front_bottom, back_bottom, colors)
 
-    def _create_faces_for_part(self, front, back, colors):
-        self.faces.append(Face(front, colors[0]))
-        self.faces.append(Face(back, colors[0]))
+    def _add_vertices(self, points):
+        # Номера точек в общем списке вершин, новые точки добавляются в конец
+        indices = []
+        for v in points:
+            key = (round(v.x, 9), round(v.y, 9), round(v.z, 9))
+            if key not in self._vertex_index:
+                self._vertex_index[key] = len(self.vertices)
+                self.vertices.append(v)
+            indices.append(self._vertex_index[key])
+        return indices
+
+    def _create_faces_for_part(self, front_vertices, back_vertices, colors):
+        first_face = len(self.faces)
+        # Точки совпадают только внутри части: у стыка разных частей свои вершины,
+        # иначе сглаженные нормали вершин смешали бы грани разных частей
+        self._vertex_index = {}
+        front = self._add_vertices(front_vertices)
+        back = self._add_vertices(back_vertices)
+        self.faces.append(Face(front, colors[0], self.vertices))
+        self.faces.append(Face(back, colors[0], self.vertices))
 
         for i in range(len(front)):
             next_i = (i + 1) % len(front)
             side = [front[i], front[next_i], back[next_i], back[i]]
-            self.faces.append(Face(side, colors[1]))
+            self.faces.append(Face(side, colors[1], self.vertices))
 
         if len(front) >= 4:
             top = [front[0], front[1], back[1], back[0]]
             bottom = [front[2], front[3], back[3], back[2]]
-            self.faces.append(Face(top, colors[2]))
-            self.faces.append(Face(bottom, colors[2]))
+            self.faces.append(Face(top, colors[2], self.vertices))
+            self.faces.append(Face(bottom, colors[2], self.vertices))
 
+        # Часть выпуклая, её центр лежит внутри
+        points = front_vertices + back_vertices
+        inner_point = Vector3D(sum(v.x for v in points) / len(points), sum(v.y for v in points) / len(points),
+                               sum(v.z for v in points) / len(points))
+        for face in self.faces[first_face:]:
+            face.orient_outward(inner_point)
 
-class SceneWidget(QWidget):
+
+class SceneWidget(SceneView):
     def __init__(self):
         super().__init__()
         self.setAutoFillBackground(True)
@@ -259,161 +344,396 @@ class SceneWidget(QWidget):
         self.x_letter = Letter3D(position_x=-60, letter_type='X')
         self.k_letter = Letter3D(position_x=60, letter_type='K')
 
-        self.camera_pos = Vector3D(0, 0, -400)
-        self.camera_rot = [0, 0, 0]
+        # Экранная ось y направлена вниз, а мировая вверх
+        self.camera = Camera(position=(0, 0, -400), flip_y=True)
         self.object_transform = Matrix4x4()
         self.base_scale = 1.4
         self.light_dir = Vector3D(0.5, -0.5, -1).normalized()
         self.light_pos = self.light_dir * 150
         self.show_light_source = True
+        self.blinn = False  # Блик по полувектору (Блинн-Фонг) вместо отражённого луча
 
         self.display_mode = DisplayMode.FILLED
         self.shading_mode = ShadingMode.PHONG
+        self.frame_shading = self.shading_mode  # Затенение текущего кадра, в упрощённом кадре - плоское
+        self.frame_lod = 0
+        # Заливка программным растеризатором с z-буфером вместо сортировки граней
+        self.software_raster = False
+        self.rasterizer = Rasterizer()
+        # Отложенное освещение: результат геометрического прохода (грани или G-буфер растеризации)
+        # хранится, пока не изменились камера, объект и режимы, и смена света его только освещает
+        self.deferred = True
+        self._geometry_cache = None
 
         self.setMouseTracking(True)
 
-    def compute_lighting(self, normal, position, face_normal=None):
-        ambient = 0.2
-        diffuse = 0.7
-        specular = 0.5
-        shininess = 32
-
-        # Вектор к источнику света (учитываем все оси)
-        light_vec = (self.light_pos - position).normalized()
-
-        # Вектор к камере
-        view_vec = (self.camera_pos - position).normalized()
-
-        # Выбираем нормаль в зависимости от метода затенения
-        if self.shading_mode == ShadingMode.PHONG:
-            # Для Фонга используем нормаль вершины
-            final_normal = (self.object_transform * normal).normalized()
-        else:
-            # Для Гуро и Flat используем нормаль грани
-            final_normal = (self.object_transform * face_normal).normalized()
-
-        # Убедимся, что нормаль направлена к камере
-        if final_normal.dot(view_vec) < 0:
-            final_normal = -final_normal
+    @property
+    def camera_pos(self):
+        return Vector3D(*self.camera.position.tolist())
 
-        # Расстояние до источника света (для затухания)
-        distance = (self.light_pos - position).length()
-        attenuation = 1.0 / (1.0 + 0.0014 * distance + 0.000007 * distance * distance)
+    @camera_pos.setter
+    def camera_pos(self, value):
+        self.camera.position = (value.x, value.y, value.z)
 
-        # Диффузная составляющая
-        diff = max(0, final_normal.dot(light_vec))
+    @property
+    def camera_rot(self):
+        return self.camera.rotation.tolist()
 
-        # Отраженный свет
-        reflect_vec = (light_vec - final_normal * 2 * final_normal.dot(light_vec)).normalized()
+    @camera_rot.setter
+    def camera_rot(self, value):
+        self.camera.rotation = value
 
-        # Спеулярная составляющая
-        spec = pow(max(0, reflect_vec.dot(view_vec)), shininess) if diff > 0 else 0
-
-        # Итоговая интенсивность
-        intensity = (ambient + diffuse * diff + specular * spec) * attenuation
-        return min(1.0, max(0.2, intensity))
-
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-        painter.fillRect(self.rect(), QColor(50, 50, 50))
+    def compute_lighting(self, normal, position, face_normal=None):
+        # Яркость одной точки, для массивов точек - shade_points
+        if self.shading_mode != ShadingMode.PHONG:
+            normal = face_normal
+        intensities = self.shade_points([[position.x, position.y, position.z]], [[normal.x, normal.y, normal.z]])
+        return float(intensities[0])
+
+    def shade_points(self, positions, normals):
+        """Освещение массива мировых позиций (N, 3) с нормалями модели (N, 3) одним вызовом."""
+        return self.light_points(self.prepare_points(positions, normals))
+
+    def prepare_points(self, positions, normals, dtype=np.float64):
+        """Не зависящая от света часть освещения мировых позиций (N, 3) с нормалями модели (N, 3)."""
+        # Нормали поворачиваются вместе с объектом
+        normals = transform_points(self.object_transform.to_array(), normals)[:, :3]
+        return prepare_surfaces(positions, normals, self.camera.position, dtype)
+
+    def light_points(self, surfaces):
+        """Яркость точек, подготовленных prepare_points, при текущем источнике света."""
+        light_pos = (self.light_pos.x, self.light_pos.y, self.light_pos.z)
+        return light_surfaces(surfaces, light_pos, blinn=self.blinn)
+
+    def _prepare_frame(self, quality):
+        preview = quality == Quality.PREVIEW
+        self.frame_lod = self.quality.frame_lod(quality)
+        if preview and self.software_raster and self.quality.resolution.enabled:
+            # Детализацию растеризации выбирает динамическое разрешение
+            self.frame_shading = lod_shading(self.shading_mode, self.frame_lod)
+        elif preview and self.quality.preview_flat:
+            self.frame_shading = ShadingMode.FLAT
+        else:
+            self.frame_shading = self.shading_mode
 
+    def draw_overlays(self, painter):
         self.draw_axes(painter)
 
         # Рисуем источник света
         if self.show_light_source:
             self.draw_light_source(painter)
 
-        all_faces = []
-        all_faces.extend(self._prepare_letter_faces(self.x_letter))
-        all_faces.extend(self._prepare_letter_faces(self.k_letter))
+    def frame_labels(self):
+        return {'viewer': 'main_2', 'display': self.display_mode.name, 'shading': self.frame_shading.name,
+                'raster': self.software_raster, 'lod': self.frame_lod}
 
-        # Сортировка граней по глубине (задние грани рисуем первыми)
-        all_faces.sort(reverse=True, key=lambda x: x[0])
-
-        for depth, face, screen_points, intensities, positions, normals in all_faces:
+    def _draw_scene_faces(self, painter):
+        profiler = self.profiler
+        if self.display_mode == DisplayMode.FILLED and self.software_raster:
+            image = self.render_raster_image()
+            with profiler.stage('draw'):
+                painter.drawImage(0, 0, image)
+        else:
+            faces, surfaces = self._cached_geometry(self._face_geometry)
+            with profiler.stage('lighting'):
+                intensities = self._light_faces(surfaces)
+            with profiler.stage('draw'):
+                self._draw_faces(painter, faces, intensities)
+
+    def _draw_faces(self, painter, faces, intensities):
+        rows = intensities.tolist() if intensities is not None else None
+        for depth, face, screen_points, row, polygon in faces:
             if len(screen_points) < 3:
                 continue
 
             if self.display_mode == DisplayMode.POINTS:
                 painter.setPen(QPen(face.color, 5))
                 for point in screen_points:
-                    if point.x() != -1000 and point.y() != -1000:
-                        painter.drawPoint(point)
+                    painter.drawPoint(point)
             elif self.display_mode == DisplayMode.WIREFRAME:
                 painter.setPen(QPen(QColor(200, 200, 200), 1))
                 painter.setBrush(Qt.NoBrush)
                 painter.drawPolygon(QPolygonF(screen_points))
             elif self.display_mode == DisplayMode.FILLED:
-                if self.shading_mode == ShadingMode.FLAT:
-                    self._draw_flat_shaded_face(painter, face, screen_points, normals[0], positions[0])
-                elif self.shading_mode == ShadingMode.GOURAUD:
-                    self._draw_gouraud_shaded_face(painter, face, screen_points, intensities, positions, normals)
+                # Яркости углов грани, у отсечённой грани - в вершинах после отсечения
+                face_intensities = rows[row] if polygon is None else \
+                    interpolate_polygon(intensities[row], polygon).tolist()
+                if self.frame_shading == ShadingMode.FLAT:
+                    self._draw_flat_shaded_face(painter, face, screen_points, face_intensities[0])
+                elif self.frame_shading == ShadingMode.GOURAUD:
+                    self._draw_gouraud_shaded_face(painter, face, screen_points, face_intensities)
                 else:  # PHONG
-                    self._draw_phong_shaded_face(painter, face, screen_points, positions, normals)
+                    self._draw_phong_shaded_face(painter, face, screen_points, face_intensities)
 
-    def _prepare_letter_faces(self, letter):
-        faces = []
-        vertices = []
-        normals = []
-        world_positions = []  # Добавляем список для мировых позиций
-
-        # Применяем позицию буквы
+    def _letter_matrix(self, letter):
+        # Позиция буквы и поворот объекта - одна матрица на все вершины буквы
         translation = Matrix4x4.translation(letter.position.x, letter.position.y, letter.position.z)
-
-        for v in letter.vertices:
-            # Сохраняем мировую позицию до камерных преобразований
-            world_pos = translation * v
-            world_pos = self.object_transform * world_pos
-            world_positions.append(world_pos)
-
-            # Применяем камерные преобразования
-            cv = self.apply_camera_transform(world_pos)
-            vertices.append(cv)
-
-            # Вычисляем нормаль вершины
-            n = Vector3D(0, 0, 0)
-            count = 0
-            for face in letter.faces:
-                if v in face.vertices:
-                    n += face.normal
-                    count += 1
-            normals.append((n / count).normalized() if count > 0 else Vector3D(0, 0, 1))
-
-        for face in letter.faces:
-            fv = [vertices[letter.vertices.index(v)] for v in face.vertices]
-            fn = [normals[letter.vertices.index(v)] for v in face.vertices]
-            fw = [world_positions[letter.vertices.index(v)] for v in face.vertices]  # Мировые позиции
-
-            avg_depth = sum(v.z for v in fv) / len(fv)
-
-            screen_points = []
-            intensities = []
-            positions_for_lighting = []
-            normals_for_face = []
-
-            for i, v in enumerate(fv):
-                if v.z > 0:
-                    factor = 300 / v.z
-                    ar = self.width() / self.height()
-                    px = v.x * factor * self.base_scale * (1 / ar if ar > 1 else 1) + self.width() / 2
-                    py = -v.y * factor * self.base_scale * (1 if ar > 1 else ar) + self.height() / 2
-                    screen_points.append(QPointF(px, py))
-                    intensities.append(self.compute_lighting(fn[i], fw[i], face.normal))
-                    positions_for_lighting.append(fw[i])
-                    normals_for_face.append(fn[i])
-                else:
-                    screen_points.append(QPointF(-1000, -1000))
-                    intensities.append(0)
-                    positions_for_lighting.append(Vector3D(0, 0, 0))
-                    normals_for_face.append(Vector3D(0, 0, 1))
-
-            faces.append((avg_depth, face, screen_points, intensities, positions_for_lighting, normals_for_face))
-
+        return (self.object_transform * translation).to_array()
+
+    def _transform_letter(self, letter, model):
+        with self.profiler.stage('transform'):
+            self.profiler.count('vertices', len(letter.vertex_array))
+            world = transform_points(model, letter.vertex_array)[:, :3]
+            # Камера и проекция - ещё одно умножение на весь буфер
+            clip = transform_points(self.camera_view_projection(), world)
+        return world, clip
+
+    def _letter_in_view(self, letter, model):
+        # Сфера вокруг буквы в системе камеры против плоскостей пирамиды видимости
+        self.camera_view_projection()  # Обновляет размеры окна у камеры
+        self.face_stats['total'] += len(letter.faces)
+        with self.profiler.stage('culling'):
+            center = transform_points(self.camera.view_matrix() @ model, [letter.bounding_center])[0, :3]
+            radius = letter.bounding_radius * np.linalg.norm(model[:3, :3], axis=0).max()
+            outside = sphere_outside(self.camera.frustum_planes(), center, radius)
+        if outside:
+            self.face_stats['frustum'] += len(letter.faces)
+            return False
+        return True
+
+    def _front_faces(self, letter, model, world):
+        # Задние грани отбрасываются только при заливке: в каркасе и точках видны все рёбра
+        if self.display_mode != DisplayMode.FILLED:
+            return np.arange(len(letter.faces))
+        with self.profiler.stage('culling'):
+            centers = world[letter.face_indices].mean(axis=1)
+            back = back_facing(transform_normals(model, letter.face_outward), centers, self.camera.position)
+        self.face_stats['back'] += int(back.sum())
+        return np.flatnonzero(~back)
+
+    def _corner_normals(self, letter, visible):
+        # Режим затенения выбирает только нормали: Фонг - нормали вершин, Гуро и плоское - нормаль грани
+        with self.profiler.stage('normals'):
+            if self.frame_shading == ShadingMode.PHONG:
+                return letter.vertex_normals[letter.face_indices[visible]]
+            return np.repeat(letter.face_normals[visible, None, :], letter.face_indices.shape[1], axis=1)
+
+    def _prepare_letter_faces(self, letter, first_row=0):
+        """Видимые грани буквы после отсечения и их углы для освещения.
+
+        Возвращает записи граней (глубина, грань, экранные точки, строка
+        углов, отсечение ближней плоскостью или None), мировые позиции
+        углов (F, C, 3) и нормали углов в системе модели (F, C, 3); строки
+        углов нумеруются с first_row.
+        """
+        model = self._letter_matrix(letter)
+        if not self._letter_in_view(letter, model):
+            return [], np.zeros((0, letter.face_indices.shape[1], 3)), np.zeros((0, letter.face_indices.shape[1], 3))
+        world, clip = self._transform_letter(letter, model)
+        visible = self._front_faces(letter, model, world)
+        corners = letter.face_indices[visible]
+
+        with self.profiler.stage('project'):
+            faces = self._project_faces(letter, visible, clip[corners], first_row)
+        return faces, world[corners], self._corner_normals(letter, visible)
+
+    def _project_faces(self, letter, visible, corner_clip, first_row):
+        faces = []
+        depths = corner_clip[..., 3]  # w - глубина вершины в системе камеры
+        near = self.camera.near
+        crossing = (depths.min(axis=1) < near).tolist()
+        face_depths = depths.mean(axis=1).tolist()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            screen = (corner_clip[..., :2] / corner_clip[..., 3:]).tolist()
+
+        for k, face_id in enumerate(visible.tolist()):
+            points, polygon = screen[k], None
+            if crossing[k]:
+                # Грань пересекает ближнюю плоскость: остаётся только часть перед ней
+                polygon = clip_polygon(depths[k], near)
+                if not polygon:
+                    self.face_stats['frustum'] += 1
+                    continue
+                part = interpolate_polygon(corner_clip[k], polygon)
+                points = (part[:, :2] / part[:, 3:]).tolist()
+                self.face_stats['clipped'] += 1
+
+            screen_points = [QPointF(x, y) for x, y in points]
+            faces.append((face_depths[k], letter.faces[face_id], screen_points, first_row + k, polygon))
+
+        self.face_stats['drawn'] += len(faces)
         return faces
 
-    def _draw_flat_shaded_face(self, painter, face, points, normal, position):
-        intensity = self.compute_lighting(normal, position, face.normal)
+    def _face_geometry(self):
+        """Геометрический проход рисования через QPainter: грани обеих букв по убыванию глубины.
+
+        Для заливки углы граней заранее подготовлены к освещению
+        (prepare_points), свет применяется к ним в _light_faces.
+        """
+        faces, positions, normals = [], [], []
+        rows = 0
+        for letter in (self.x_letter, self.k_letter):
+            letter_faces, corner_positions, corner_normals = self._prepare_letter_faces(letter, rows)
+            faces.extend(letter_faces)
+            positions.append(corner_positions)
+            normals.append(corner_normals)
+            rows += len(corner_positions)
+
+        # Сортировка граней по глубине (задние грани рисуем первыми)
+        with self.profiler.stage('sort'):
+            faces.sort(reverse=True, key=lambda x: x[0])
+
+        surfaces = None
+        if self.display_mode == DisplayMode.FILLED and rows:
+            corner_count = positions[0].shape[1]
+            with self.profiler.stage('lighting'):
+                surfaces = self.prepare_points(np.concatenate(positions).reshape(-1, 3),
+                                               np.concatenate(normals).reshape(-1, 3))
+            surfaces = (surfaces, corner_count)
+        return faces, surfaces
+
+    def _light_faces(self, surfaces):
+        # Яркости углов всех граней (F, C) одним вызовом; None, если освещение не нужно
+        if surfaces is None:
+            return None
+        surfaces, corner_count = surfaces
+        return self.light_points(surfaces).reshape(-1, corner_count)
+
+    def _geometry_key(self):
+        # Всё, от чего зависит геометрический проход; свет и видимость его значка сюда не входят
+        letters = tuple((id(letter), letter.geometry_version, letter.position.x, letter.position.y, letter.position.z)
+                        for letter in (self.x_letter, self.k_letter))
+        return (self.camera_view_projection().tobytes(), self.camera.near, self.object_transform.to_array().tobytes(),
+                letters, self.display_mode, self.frame_shading, self.software_raster, self.frame_size())
+
+    def _cached_geometry(self, build):
+        """Результат геометрического прохода build() из кэша, пока камера, объект, буквы и режимы те же.
+
+        Поэтому перемещение света и его значка перезапускает только
+        освещение. С deferred = False проход выполняется каждый кадр.
+        """
+        key = self._geometry_key()
+        cache = self._geometry_cache
+        if self.deferred and cache is not None and cache['key'] == key:
+            self.face_stats = dict(cache['stats'])
+            self.profiler.count('geometry_cached')
+            return cache['geometry']
+        geometry = build()
+        self._geometry_cache = {'key': key, 'stats': dict(self.face_stats), 'geometry': geometry} \
+            if self.deferred else None
+        return geometry
+
+    def render_raster_image(self):
+        """Залитые грани обеих букв, растеризованные с z-буфером, в виде QImage размером с виджет.
+
+        Пересекающиеся грани делятся по пикселям, а не по средней глубине.
+        Плоское затенение берёт одну яркость на грань, Гуро интерполирует
+        яркости углов, Фонг интерполирует позиции и нормали и освещает
+        каждый пиксель. Растеризованный кадр хранится как G-буфер, при
+        смене одного света он только заново освещается.
+        """
+        self.rasterizer.resize(*self.frame_size())
+        geometry = self._cached_geometry(self._raster_geometry)
+        with self.profiler.stage('shade'):
+            if geometry is None:
+                return self.rasterizer.to_image(np.zeros(0, dtype=np.int64), np.zeros((0, 3)))
+            return self._shade_gbuffer(geometry)
+
+    def _raster_geometry(self):
+        """Геометрический проход z-буфера: G-буфер кадра и углы граней для плоского затенения и Гуро.
+
+        В G-буфере у каждого закрашенного пикселя базовый цвет и либо
+        подготовленные к освещению позиция и нормаль (Фонг), либо номер
+        треугольника и его веса (остальные режимы). None - рисовать нечего.
+        """
+        self.rasterizer.clear()
+        phong = self.frame_shading == ShadingMode.PHONG
+        colors, positions, normals, face_ids, corner_weights = [], [], [], [], []
+        rows = 0
+        for letter in (self.x_letter, self.k_letter):
+            model = self._letter_matrix(letter)
+            if not self._letter_in_view(letter, model):
+                continue
+            world, clip = self._transform_letter(letter, model)
+            visible = self._front_faces(letter, model, world)
+
+            # Треугольники видимых граней после отсечения ближней плоскостью;
+            # атрибуты вершин треугольников - взвешенные суммы атрибутов углов грани
+            corners = letter.face_indices[visible]
+            letter_face_ids, letter_weights, clipped = clipped_triangles(clip[corners, 3], self.camera.near)
+            drawn = len(np.unique(letter_face_ids))
+            self.face_stats['clipped'] += clipped
+            self.face_stats['frustum'] += len(visible) - drawn
+            self.face_stats['drawn'] += drawn
+
+            def triangle_values(values):
+                return np.einsum('tkc,tc...->tk...', letter_weights, values[letter_face_ids])
+
+            with self.profiler.stage('raster'):
+                triangle_clip = triangle_values(clip[corners])
+                self.rasterizer.draw_triangles(triangle_clip[..., :2] / triangle_clip[..., 3:],
+                                               triangle_clip[..., 3])
+            self.profiler.count('triangles', len(letter_face_ids))
+
+            colors.append(letter.face_colors[visible][letter_face_ids])
+            corner_normals = self._corner_normals(letter, visible)
+            if phong:
+                positions.append(triangle_values(world[corners]))
+                normals.append(triangle_values(corner_normals))
+            else:
+                positions.append(world[corners])
+                normals.append(corner_normals)
+                face_ids.append(letter_face_ids + rows)
+                corner_weights.append(letter_weights)
+                rows += len(corners)
+
+        if not colors:
+            return None
+        colors = np.concatenate(colors).astype(np.float32)
+        positions, normals = np.concatenate(positions), np.concatenate(normals)
+        geometry = {}
+        with self.profiler.stage('gbuffer'):
+            if phong:
+                # Нормали поворачиваются вместе с объектом до интерполяции, это линейно
+                normals = transform_points(self.object_transform.to_array(), normals.reshape(-1, 3))[:, :3]
+                normals = normals.reshape(positions.shape)
+                camera_pos = self.camera.position
+
+                def builder(ids, weights):
+                    surfaces = prepare_surfaces(interpolate(positions, ids, weights), interpolate(normals, ids, weights),
+                                                camera_pos, np.float32)
+                    return {'colors': np.ascontiguousarray(colors[ids].T), 'surfaces': surfaces}
+            else:
+                gouraud = self.frame_shading == ShadingMode.GOURAUD
+                if not gouraud:
+                    # Плоской грани нужна только яркость первого угла
+                    positions, normals = positions[:, :1], normals[:, :1]
+                geometry['corner_surfaces'] = self.prepare_points(positions.reshape(-1, 3), normals.reshape(-1, 3),
+                                                                  np.float32)
+                face_ids = np.concatenate(face_ids)
+                corner_weights = np.concatenate(corner_weights).astype(np.float32)
+
+                def builder(ids, weights):
+                    # Строка грани пикселя и, для Гуро, вес каждого угла грани в пикселе (C, P):
+                    # освещение потом только выбирает яркости углов и складывает их с весами
+                    attributes = {'colors': np.ascontiguousarray(colors[ids].T), 'faces': face_ids[ids]}
+                    if gouraud:
+                        attributes['weights'] = np.ascontiguousarray(
+                            np.einsum('pk,pkc->cp', weights, corner_weights[ids]), dtype=np.float32)
+                    return attributes
+            geometry['gbuffer'] = self.rasterizer.gbuffer(builder)
+        return geometry
+
+    def _shade_gbuffer(self, geometry):
+        # Проход освещения по G-буферу: только то, что зависит от света
+        pixels, attributes = geometry['gbuffer']
+        if self.frame_shading == ShadingMode.PHONG:
+            intensities = self.light_points(attributes['surfaces'])
+        else:
+            weights = attributes.get('weights')
+            corner_count = 1 if weights is None else len(weights)
+            # Яркости углов по строкам (C, F), чтобы каждая выборка шла по непрерывному массиву
+            corner_intensities = self.light_points(geometry['corner_surfaces']).reshape(-1, corner_count).T.copy()
+            faces = attributes['faces']
+            # Плоская грань - яркость первого угла, как у _draw_flat_shaded_face
+            intensities = corner_intensities[0][faces]
+            if weights is not None:
+                intensities *= weights[0]
+                for corner in range(1, corner_count):
+                    intensities += weights[corner] * corner_intensities[corner][faces]
+        return self.rasterizer.lit_image(pixels, attributes['colors'], intensities)
+
+    def _draw_flat_shaded_face(self, painter, face, points, intensity):
         color = QColor(
             min(255, int(face.color.red() * intensity)),
             min(255, int(face.color.green() * intensity)),
@@ -423,7 +743,7 @@ class SceneWidget(QWidget):
         painter.setBrush(QBrush(color))
         painter.drawPolygon(QPolygonF(points))
 
-    def _draw_gouraud_shaded_face(self, painter, face, points, intensities, positions, normals):
+    def _draw_gouraud_shaded_face(self, painter, face, points, intensities):
         if len(points) < 3:
             return
 
@@ -442,7 +762,7 @@ class SceneWidget(QWidget):
         painter.setBrush(QBrush(gradient))
         painter.drawPolygon(QPolygonF(points))
 
-    def _draw_phong_shaded_face(self, painter, face, points, positions, normals):
+    def _draw_phong_shaded_face(self, painter, face, points, intensities):
         if len(points) < 3:
             return
 
@@ -452,7 +772,7 @@ class SceneWidget(QWidget):
 
         for i, point in enumerate(points):
             pos = i / (len(points) - 1) if len(points) > 1 else 0
-            intensity = self.compute_lighting(normals[i], positions[i], face.normal)
+            intensity = intensities[i]
             color = QColor(
                 min(255, int(face.color.red() * intensity)),
                 min(255, int(face.color.green() * intensity)),
@@ -466,7 +786,7 @@ class SceneWidget(QWidget):
 
     def draw_light_source(self, painter):
         light_pos_2d = self.project_point(self.light_pos)
-        if light_pos_2d.x() == -1000:
+        if light_pos_2d is None:
             return
 
         # Рисуем источник света как желтый круг с лучами
@@ -481,54 +801,42 @@ class SceneWidget(QWidget):
             end_y = light_pos_2d.y() + 15 * math.sin(rad)
             painter.drawLine(light_pos_2d, QPointF(end_x, end_y))
 
-    def draw_axes(self, painter):
-        origin = self.project_point(Vector3D(0, 0, 0))
-        x_end = self.project_point(Vector3D(150, 0, 0))
-        y_end = self.project_point(Vector3D(0, 150, 0))
-        z_end = self.project_point(Vector3D(0, 0, 150))
-
-        painter.setPen(QPen(Qt.red, 2))
-        painter.drawLine(origin, x_end)
-        painter.drawText(x_end + QPoint(5, 5), "X")
-
-        painter.setPen(QPen(Qt.green, 2))
-        painter.drawLine(origin, y_end)
-        painter.drawText(y_end + QPoint(5, 5), "Y")
-
-        painter.setPen(QPen(Qt.blue, 2))
-        painter.drawLine(origin, z_end)
-        painter.drawText(z_end + QPoint(5, 5), "Z")
-
-    def project_point(self, point):
-        v = self.apply_camera_transform(self.object_transform * point)
-        if v.z > 0:
-            factor = 300 / v.z
-            ar = self.width() / self.height()
-            px = v.x * factor * self.base_scale * (1 / ar if ar > 1 else 1) + self.width() / 2
-            py = -v.y * factor * self.base_scale * (1 if ar > 1 else ar) + self.height() / 2
-            return QPoint(int(px), int(py))
-        return QPoint(-1000, -1000)
-
     def apply_camera_transform(self, v):
-        rot_x = Matrix4x4.rotation_x(self.camera_rot[0])
-        rot_y = Matrix4x4.rotation_y(self.camera_rot[1])
-        rot_z = Matrix4x4.rotation_z(self.camera_rot[2])
-        rotation = rot_x * rot_y * rot_z
-
-        translation = Matrix4x4.translation(
-            -self.camera_pos.x,
-            -self.camera_pos.y,
-            -self.camera_pos.z
-        )
+        x, y, z, _ = transform_points(self.camera.view_matrix(), [[v.x, v.y, v.z]])[0]
+        return Vector3D(x, y, z)
 
-        return rotation * translation * v
+    def set_shading_mode(self, mode):
+        self.shading_mode = mode
+        self.update()
 
-    def set_display_mode(self, mode):
-        self.display_mode = mode
+    def set_software_raster(self, enabled):
+        self.software_raster = enabled
+        # Упрощать детализацию динамическое разрешение может только у растеризации
+        self.quality.resolution.set_lod_levels(len(RASTER_LOD_SHADING) - 1 if enabled else 0)
         self.update()
 
-    def set_shading_mode(self, mode):
-        self.shading_mode = mode
+    def set_raster_workers(self, workers):
+        self.rasterizer.set_workers(workers)
+        self.update()
+
+    def set_deferred(self, enabled):
+        self.deferred = enabled
+        self._geometry_cache = None
+        self.update()
+
+    def set_progressive(self, enabled):
+        self.quality.enabled = enabled
+        self.update()
+
+    def set_dynamic_resolution(self, enabled):
+        self.quality.resolution.enabled = enabled
+        self.update()
+
+    def set_target_fps(self, fps):
+        self.quality.resolution.set_target_fps(fps)
+
+    def set_blinn(self, enabled):
+        self.blinn = enabled
         self.update()
 
     def toggle_light_source(self, visible):
@@ -545,11 +853,8 @@ class SceneWidget(QWidget):
             dx = -(current.x() - self.last_mouse_pos.x())
             dy = current.y() - self.last_mouse_pos.y()
 
-            rot_y = Matrix4x4.rotation_y(dx * 0.5)
-            rot_x = Matrix4x4.rotation_x(dy * 0.5)
-
-            self.object_transform = rot_y * rot_x * self.object_transform
-            self.update()
+            # Поворот применится перед кадром вместе с остальными событиями мыши
+            self.scheduler.rotate(dy * 0.5, dx * 0.5)
             self.last_mouse_pos = current
 
     def mouseReleaseEvent(self, event):
@@ -557,10 +862,20 @@ class SceneWidget(QWidget):
             self.last_mouse_pos = None
 
     def wheelEvent(self, event):
-        delta = event.angleDelta().y() / 120
-        self.camera_pos.z += delta * 10
-        self.camera_pos.z = max(self.camera_pos.z, -50)
-        self.update()
+        self.scheduler.zoom(event.angleDelta().y() / 120)
+
+    def _apply_input(self, taken):
+        # Всё, что пришло между кадрами: один поворот объекта, один сдвиг камеры, последние значения ползунков
+        angle_x, angle_y = taken.rotation
+        if angle_x or angle_y:
+            rot_y = Matrix4x4.rotation_y(angle_y)
+            rot_x = Matrix4x4.rotation_x(angle_x)
+            self.object_transform = rot_y * rot_x * self.object_transform
+        if taken.zoom:
+            position = self.camera.position
+            position[2] = max(position[2] + taken.zoom * 10, -50)
+            self.camera.position = position  # Помечает матрицы камеры устаревшими
+        taken.run_calls()
 
 
 class MainWindow(QMainWindow):
@@ -688,6 +1003,47 @@ class MainWindow(QMainWindow):
             btn_group.addButton(btn)
             group_layout.addWidget(btn)
 
+        raster_check = QCheckBox("Растеризация с z-буфером")
+        raster_check.toggled.connect(self.scene.set_software_raster)
+        group_layout.addWidget(raster_check)
+
+        workers_label = QLabel("Потоков растеризации")
+        workers_spin = QSpinBox()
+        workers_spin.setRange(1, 16)
+        workers_spin.setValue(self.scene.rasterizer.workers)
+        workers_spin.valueChanged.connect(self.scene.set_raster_workers)
+        group_layout.addWidget(workers_label)
+        group_layout.addWidget(workers_spin)
+
+        deferred_check = QCheckBox("Отложенное освещение")
+        deferred_check.setChecked(self.scene.deferred)
+        deferred_check.toggled.connect(self.scene.set_deferred)
+        group_layout.addWidget(deferred_check)
+
+        stats_check = QCheckBox("Счётчик граней")
+        stats_check.setChecked(self.scene.show_face_stats)
+        stats_check.toggled.connect(self.scene.set_show_face_stats)
+        group_layout.addWidget(stats_check)
+
+        preview_check = QCheckBox("Упрощённые кадры при вращении")
+        preview_check.setChecked(self.scene.quality.enabled)
+        preview_check.toggled.connect(self.scene.set_progressive)
+        group_layout.addWidget(preview_check)
+
+        resolution = self.scene.quality.resolution
+        dynamic_check = QCheckBox("Динамическое разрешение")
+        dynamic_check.setChecked(resolution.enabled)
+        dynamic_check.toggled.connect(self.scene.set_dynamic_resolution)
+        group_layout.addWidget(dynamic_check)
+
+        fps_label = QLabel("Целевая частота кадров")
+        fps_spin = QSpinBox()
+        fps_spin.setRange(10, 144)
+        fps_spin.setValue(int(resolution.target_fps))
+        fps_spin.valueChanged.connect(self.scene.set_target_fps)
+        group_layout.addWidget(fps_label)
+        group_layout.addWidget(fps_spin)
+
         layout.addWidget(group)
 
     def create_shading_controls(self, layout):
@@ -715,6 +1071,10 @@ class MainWindow(QMainWindow):
         btn_group.addButton(phong_btn)
         group_layout.addWidget(phong_btn)
 
+        blinn_check = QCheckBox("Блик Блинна-Фонга")
+        blinn_check.toggled.connect(self.scene.set_blinn)
+        group_layout.addWidget(blinn_check)
+
         layout.addWidget(group)
 
     def create_light_controls(self, layout):
@@ -748,15 +1108,20 @@ class MainWindow(QMainWindow):
         layout.addWidget(group)
 
     def update_letter_position(self, prefix, axis, value):
+        # Ползунок шлёт значения чаще кадров: перед кадром применяется только последнее
+        self.scene.scheduler.defer(('letter', prefix, axis), self._set_letter_position, prefix, axis, value)
+
+    def _set_letter_position(self, prefix, axis, value):
         letter = getattr(self.scene, f"{prefix}_letter")
         setattr(letter.position, axis, value)
         letter.update_geometry()
-        self.scene.update()
 
     def update_light_position(self, axis, value):
+        self.scene.scheduler.defer(('light', axis), self._set_light_position, axis, value)
+
+    def _set_light_position(self, axis, value):
         setattr(self.scene.light_pos, axis, value)
         self.scene.light_dir = self.scene.light_pos.normalized()
-        self.scene.update()
 
     def rotate_object(self, axis, angle):
         if axis == 0:
@@ -770,8 +1135,7 @@ class MainWindow(QMainWindow):
         self.scene.update()
 
     def scale_object(self, value):
-        self.scene.base_scale = value / 100.0
-        self.scene.update()
+        self.scene.scheduler.defer('scale', setattr, self.scene, 'base_scale', value / 100.0)
 
     def reset_view(self):
         self.scene.camera_pos = Vector3D(0, 0, -400)
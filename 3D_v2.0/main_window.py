@@ -1,5 +1,5 @@
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                              QPushButton, QComboBox, QLabel, QCheckBox, QSlider)
+                              QPushButton, QComboBox, QLabel, QCheckBox, QSlider, QLineEdit)
 from PySide6.QtCore import Qt
 from scene_widget import SceneWidget
 from enums import DisplayMode, ShadingMode
@@ -34,6 +34,14 @@ class MainWindow(QMainWindow):
             display_combo.addItem(mode.value)
         display_combo.currentTextChanged.connect(self.on_display_mode_changed)
         control_layout.addWidget(display_combo)
+
+        # Текст сцены
+        text_label = QLabel("Текст:")
+        control_layout.addWidget(text_label)
+
+        text_edit = QLineEdit(self.scene_widget.text.text)
+        text_edit.textChanged.connect(self.scene_widget.set_text)
+        control_layout.addWidget(text_edit)
         
         # Режим затенения
         shading_label = QLabel("Режим затенения:")
@@ -61,6 +69,11 @@ class MainWindow(QMainWindow):
         mirror_z.stateChanged.connect(lambda: self.scene_widget.set_mirror(2))
         control_layout.addWidget(mirror_z)
 
+        stats_check = QCheckBox("Счётчик граней")
+        stats_check.setChecked(self.scene_widget.show_face_stats)
+        stats_check.toggled.connect(self.scene_widget.set_show_face_stats)
+        control_layout.addWidget(stats_check)
+
         # # Направление света
         # light_label = QLabel("Направление света:")
         # control_layout.addWidget(light_label)
@@ -1,5 +1,7 @@
 import math
 
+import numpy as np
+
 class Vector3D:
     def __init__(self, x, y, z):
         self.x = x
@@ -97,4 +99,18 @@ class Matrix4x4:
         mat.m[0][0] = sx
         mat.m[1][1] = sy
         mat.m[2][2] = sz
-        return mat 
\ No newline at end of file
+        return mat
+
+    def to_array(self):
+        return np.array(self.m, dtype=np.float64)
+
+
+def transform_points(matrix, points):
+    """Применяет матрицу 4x4 (np.ndarray) ко всем точкам массива (N, 3) одной операцией.
+
+    Возвращает однородные координаты (N, 4) без деления на w: его делает
+    вызывающий код, когда w - глубина перспективной проекции. Для стопки
+    матриц (K, 4, 4) - координаты (K, N, 4), по массиву на матрицу.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    return points @ np.swapaxes(matrix[..., :3], -1, -2) + matrix[..., None, :, 3]
@@ -0,0 +1,178 @@
+import json
+import os
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+
+HISTORY = 120  # Кадров в скользящем окне для FPS и процентилей
+PERCENTILES = (50, 95, 99)
+
+
+class CountingPainter:
+    """Обёртка над QPainter, считающая вызовы рисования (draw*, fill*) в counts['painter_calls']."""
+
+    def __init__(self, painter, counts):
+        self.painter = painter
+        self._counts = counts
+
+    def __getattr__(self, name):
+        attribute = getattr(self.painter, name)
+        if not name.startswith(('draw', 'fill')):
+            return attribute
+
+        def counted(*args, **kwargs):
+            self._counts['painter_calls'] = self._counts.get('painter_calls', 0) + 1
+            return attribute(*args, **kwargs)
+        return counted
+
+
+class FrameProfiler:
+    """Замеры кадра: время этапов, счётчики и скользящая статистика по последним кадрам.
+
+    Кадр открывается begin_frame и закрывается end_frame; внутри этапы
+    замеряются блоками with profiler.stage('имя'), время одноимённых
+    блоков складывается. Пока enabled ложно, все вызовы ничего не делают.
+    Закрытые кадры можно дописывать в файл JSON lines (export) - по
+    строке на кадр. Запись замеров и их вывод поверх кадра (show_overlay)
+    независимы: пакетный рендер пишет замеры без наложения.
+    """
+
+    def __init__(self, history=HISTORY, enabled=False):
+        self.enabled = enabled
+        self.show_overlay = False
+        self.last_dump = None  # Файл последнего dump_snapshot
+        self.frames = deque(maxlen=history)
+        self.frame_count = 0
+        self._frame_start = None
+        self._stages = {}
+        self._counts = {}
+        self._export = None
+
+    @contextmanager
+    def _measure(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._stages[name] = self._stages.get(name, 0.0) + time.perf_counter() - start
+
+    def toggle_overlay(self):
+        """Включает или выключает наложение; замеры идут, пока видно наложение или идёт export."""
+        self.show_overlay = not self.show_overlay
+        self.enabled = self.show_overlay or self._export is not None
+
+    def stage(self, name):
+        if self._frame_start is None:
+            return nullcontext()
+        return self._measure(name)
+
+    def count(self, name, amount=1):
+        if self._frame_start is not None:
+            self._counts[name] = self._counts.get(name, 0) + amount
+
+    def wrap_painter(self, painter):
+        """QPainter кадра: при включённых замерах - со счётчиком вызовов рисования."""
+        if self._frame_start is None:
+            return painter
+        return CountingPainter(painter, self._counts)
+
+    def begin_frame(self):
+        if not self.enabled:
+            self._frame_start = None
+            return
+        self._frame_start = time.perf_counter()
+        self._stages = {}
+        self._counts = {}
+
+    def end_frame(self, **info):
+        """Закрывает кадр и возвращает его запись; info - метки кадра (режимы, размер окна и т.п.)."""
+        if self._frame_start is None:
+            return None
+        end = time.perf_counter()
+        record = {
+            'frame': self.frame_count,
+            'timestamp': time.time(),
+            'start': self._frame_start,
+            'frame_ms': (end - self._frame_start) * 1000,
+            'stages_ms': {name: value * 1000 for name, value in self._stages.items()},
+            'counts': dict(self._counts),
+        }
+        record.update(info)
+        self._frame_start = None
+        self.frame_count += 1
+        self.frames.append(record)
+        if self._export is not None:
+            self._export.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self._export.flush()
+        return record
+
+    def fps(self):
+        """Частота кадров по времени начала кадров в окне, а не по их длительности."""
+        if len(self.frames) < 2:
+            return 0.0
+        span = self.frames[-1]['start'] - self.frames[0]['start']
+        return (len(self.frames) - 1) / span if span > 0 else 0.0
+
+    def percentiles(self, percents=PERCENTILES):
+        """Длительности кадров окна в миллисекундах для процентилей percents."""
+        if not self.frames:
+            return {percent: 0.0 for percent in percents}
+        values = np.percentile([frame['frame_ms'] for frame in self.frames], percents)
+        return dict(zip(percents, values.tolist()))
+
+    def summary(self):
+        """Сводка по окну: FPS, процентили кадра и средние времена этапов."""
+        stages = {}
+        for frame in self.frames:
+            for name, value in frame['stages_ms'].items():
+                stages[name] = stages.get(name, 0.0) + value
+        count = max(len(self.frames), 1)
+        return {
+            'frames': len(self.frames),
+            'fps': self.fps(),
+            'frame_ms': {f'p{percent}': value for percent, value in self.percentiles().items()},
+            'stages_ms': {name: value / count for name, value in stages.items()},
+        }
+
+    def overlay_lines(self):
+        """Строки текста для наложения на кадр: сводка и этапы последнего кадра."""
+        if not self.frames:
+            return []
+        last = self.frames[-1]
+        times = ', '.join(f'p{percent} {value:.1f}' for percent, value in self.percentiles().items())
+        lines = [f"FPS {self.fps():.1f}, кадр {last['frame_ms']:.1f} мс ({times})"]
+        lines += [f"  {name}: {value:.2f} мс" for name, value in last['stages_ms'].items()]
+        lines += [f"  {name}: {value}" for name, value in last['counts'].items()]
+        if self.last_dump:
+            lines.append(f"Записано в {self.last_dump}")
+        return lines
+
+    def export(self, path):
+        """Дописывать закрытые кадры в файл JSON lines path; None прекращает запись.
+
+        После остановки замеры продолжаются, только если видно наложение.
+        """
+        if self._export is not None:
+            self._export.close()
+            self._export = None
+        if path is not None:
+            self._export = open(path, 'a', encoding='utf-8')
+        self.enabled = self.show_overlay or self._export is not None
+
+    def dump(self, path):
+        """Записывает кадры текущего окна в файл JSON lines."""
+        with open(path, 'w', encoding='utf-8') as file:
+            for frame in self.frames:
+                file.write(json.dumps(frame, ensure_ascii=False) + '\n')
+
+    def dump_snapshot(self, directory='.'):
+        """Записывает окно кадров в новый файл profile_<дата>_<время>_<мс>.jsonl в directory и возвращает его путь."""
+        now = time.time()
+        name = time.strftime('profile_%Y%m%d_%H%M%S', time.localtime(now)) + f'_{int(now * 1000) % 1000:03d}.jsonl'
+        path = os.path.join(directory, name)
+        self.dump(path)
+        self.last_dump = path
+        return path
@@ -0,0 +1,271 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PySide6.QtGui import QImage
+
+
+FRAGMENT_BUDGET = 1 << 20  # Пикселей-кандидатов, обрабатываемых за один проход NumPy
+TILE_SIZE = 128  # Сторона плитки кадра, плитки растеризуются и закрашиваются независимо
+
+
+def triangulate(face_indices):
+    """Разбиение граней (F, n) на треугольники веером из первого угла.
+
+    Возвращает номера граней (T,) и номера углов внутри грани (T, 3).
+    """
+    count, corners = face_indices.shape
+    fan = np.array([[0, i, i + 1] for i in range(1, corners - 1)], dtype=np.int64).reshape(-1, 3)
+    face_ids = np.repeat(np.arange(count), len(fan))
+    return face_ids, np.tile(fan, (count, 1))
+
+
+def interpolate(values, ids, weights):
+    """Значения в пикселях по значениям в вершинах треугольников (T, 3, ...)."""
+    return np.einsum('pk,pk...->p...', weights, values[ids])
+
+
+class Rasterizer:
+    """Программная растеризация треугольников с z-буфером на массивах NumPy.
+
+    Буфер хранит для каждого пикселя обратную глубину 1/w ближайшего
+    треугольника, его номер и перспективно-корректные барицентрические
+    координаты. Цвет считается после растеризации один раз на пиксель,
+    поэтому перекрытые грани не освещаются. Пиксели описанных
+    прямоугольников многих треугольников проверяются одним плоским
+    массивом, а не циклом по треугольникам.
+
+    Кадр делится на плитки TILE_SIZE x TILE_SIZE, треугольники
+    раскладываются по плиткам, которые они задевают. Плитки пишут в
+    непересекающиеся части буферов, и при workers > 1 их обрабатывает
+    пул потоков. Ускорение от потоков не подтверждено: основные операции
+    (np.maximum.at, выборка по массиву индексов) не отпускают GIL, поэтому
+    по умолчанию поток один.
+    """
+
+    def __init__(self, width=1, height=1, workers=1, tile_size=TILE_SIZE):
+        self.width = 0
+        self.height = 0
+        self.tile_size = tile_size
+        self.workers = 1
+        self._pool = None
+        self.resize(width, height)
+        self.set_workers(workers)
+
+    def set_workers(self, workers):
+        workers = max(int(workers), 1)
+        if workers == self.workers and (self._pool is not None or workers == 1):
+            return
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    def tiles(self):
+        """Прямоугольники плиток (x0, y0, x1, y1) с включёнными границами."""
+        size = self.tile_size
+        return [(x, y, min(x + size, self.width) - 1, min(y + size, self.height) - 1)
+                for y in range(0, self.height, size) for x in range(0, self.width, size)]
+
+    def _run(self, function, jobs):
+        # Плитки в пуле потоков или по очереди, если поток один; результаты в порядке jobs
+        if self._pool is None or len(jobs) < 2:
+            return [function(*job) for job in jobs]
+        return list(self._pool.map(lambda job: function(*job), jobs))  # Пробрасывает исключения потоков
+
+    def resize(self, width, height):
+        width, height = max(int(width), 1), max(int(height), 1)
+        if (width, height) == (self.width, self.height):
+            return
+        self.width, self.height = width, height
+        self.inv_depth = np.zeros(width * height)
+        self.triangle_ids = np.full(width * height, -1, dtype=np.int64)
+        self.weights = np.zeros((width * height, 3), dtype=np.float32)
+        # Изображение из to_image ссылается на этот буфер и действительно до следующего кадра
+        self.color_buffer = np.zeros(width * height, dtype=np.uint32)
+        self.triangle_count = 0
+
+    def clear(self):
+        self.inv_depth.fill(0)  # 0 - бесконечно далеко
+        self.triangle_ids.fill(-1)
+        self.triangle_count = 0
+
+    def draw_triangles(self, screen, depth):
+        """Растеризация треугольников: экранные координаты (T, 3, 2) и глубины вершин (T, 3).
+
+        Треугольники нумеруются по порядку всех вызовов после clear, в
+        том же порядке нужно передавать их атрибуты в interpolate.
+        Треугольники должны быть заранее отсечены ближней плоскостью
+        (culling.clipped_triangles); с вершинами за камерой пропускаются.
+        """
+        screen = np.asarray(screen, dtype=np.float64).reshape(-1, 3, 2)
+        depth = np.asarray(depth, dtype=np.float64).reshape(-1, 3)
+        ids = self.triangle_count + np.arange(len(screen))
+        self.triangle_count += len(screen)
+
+        # Подготовка всех треугольников сразу: барицентрическая координата
+        # l_k = a_k * x + b_k * y + c_k, внутри треугольника все l_k >= 0
+        x, y = screen[..., 0], screen[..., 1]
+        x1, y1 = np.roll(x, -1, axis=1), np.roll(y, -1, axis=1)
+        x2, y2 = np.roll(x, -2, axis=1), np.roll(y, -2, axis=1)
+        area = (x1[:, 0] - x[:, 0]) * (y2[:, 0] - y[:, 0]) - (x2[:, 0] - x[:, 0]) * (y1[:, 0] - y[:, 0])
+        keep = (np.abs(area) > 1e-9) & np.all(depth > 0, axis=1)
+
+        # Пиксели, центры которых могут попасть в треугольник
+        left = np.clip(np.ceil(x.min(axis=1) - 0.5), 0, self.width)
+        right = np.clip(np.floor(x.max(axis=1) - 0.5), -1, self.width - 1)
+        top = np.clip(np.ceil(y.min(axis=1) - 0.5), 0, self.height)
+        bottom = np.clip(np.floor(y.max(axis=1) - 0.5), -1, self.height - 1)
+        keep &= (right >= left) & (bottom >= top)
+        if not keep.any():
+            return
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            a = (y1 - y2) / area[:, None]
+            b = (x2 - x1) / area[:, None]
+            c = (x1 * y2 - x2 * y1) / area[:, None]
+        setup = (a[keep], b[keep], c[keep], 1.0 / depth[keep], ids[keep],
+                 left[keep].astype(np.int64), top[keep].astype(np.int64),
+                 right[keep].astype(np.int64), bottom[keep].astype(np.int64))
+
+        # Раскладка по плиткам: треугольник попадает во все плитки, которые задевает его прямоугольник
+        left, top, right, bottom = setup[5:]
+        jobs = []
+        for tile in self.tiles():
+            x0, y0, x1, y1 = tile
+            hit = np.flatnonzero((left <= x1) & (right >= x0) & (top <= y1) & (bottom >= y0))
+            if len(hit):
+                jobs.append((tile, tuple(value[hit] for value in setup)))
+        self._run(self._rasterize_tile, jobs)
+
+    def _rasterize_tile(self, tile, setup):
+        x0, y0, x1, y1 = tile
+        a, b, c, inv_w, ids, left, top, right, bottom = setup
+        top = np.maximum(top, y0)
+        rows = np.minimum(bottom, y1) - top + 1
+
+        # Строки пикселей каждого треугольника внутри плитки
+        triangle = np.repeat(np.arange(len(rows)), rows)
+        y = top[triangle] + np.arange(len(triangle)) - np.repeat(np.cumsum(rows) - rows, rows)
+
+        # Отрезок строки внутри треугольника: l_k = a_k * x + base_k >= 0 для всех k
+        slope = a[triangle]
+        base = b[triangle] * (y[:, None] + 0.5) + c[triangle]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bound = -base / slope
+        low = np.where(slope > 0, bound, -np.inf)
+        high = np.where(slope < 0, bound, np.inf)
+        x_low = np.maximum(np.maximum(low[:, 0], low[:, 1]), low[:, 2])
+        x_high = np.minimum(np.minimum(high[:, 0], high[:, 1]), high[:, 2])
+        x_high[((slope == 0) & (base < 0)).any(axis=1)] = -np.inf
+
+        first = np.maximum(np.ceil(np.maximum(x_low, left[triangle] - 1.0) - 0.5), x0)
+        last = np.minimum(np.floor(np.minimum(x_high, right[triangle] + 1.0) - 0.5), x1)
+        spans = np.flatnonzero(last >= first)
+        if not len(spans):
+            return
+        triangle, y = triangle[spans], y[spans]
+        first = first[spans].astype(np.int64)
+        counts = last[spans].astype(np.int64) - first + 1
+        # Барицентрические координаты в начале отрезка и их шаг на пиксель
+        slope = slope[spans]
+        start_l = slope[:, :2] * (first[:, None] + 0.5) + base[spans, :2]
+
+        # Отрезки порциями, в каждой не больше FRAGMENT_BUDGET пикселей
+        ends = np.cumsum(counts)
+        start = 0
+        while start < len(ends):
+            offset = ends[start - 1] if start else 0
+            stop = max(int(np.searchsorted(ends, offset + FRAGMENT_BUDGET, side='right')), start + 1)
+            part, tri = slice(start, stop), triangle[start:stop]
+            self._rasterize_spans(y[part] * self.width + first[part], counts[part], start_l[part],
+                                  slope[part, :2], inv_w[tri], ids[tri])
+            start = stop
+
+    def _rasterize_spans(self, starts, counts, start_l, step_l, inv_w, ids):
+        # Все пиксели отрезков одним плоским массивом
+        step = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        pixels = np.repeat(starts, counts) + step
+        l0 = np.repeat(start_l[:, 0], counts) + np.repeat(step_l[:, 0], counts) * step
+        l1 = np.repeat(start_l[:, 1], counts) + np.repeat(step_l[:, 1], counts) * step
+        l2 = 1.0 - l0 - l1  # Барицентрические координаты в сумме дают 1
+
+        # 1/w линейна в экранных координатах, атрибуты делятся на w для перспективы
+        w0 = l0 * np.repeat(inv_w[:, 0], counts)
+        w1 = l1 * np.repeat(inv_w[:, 1], counts)
+        w2 = l2 * np.repeat(inv_w[:, 2], counts)
+        inv_depth = w0 + w1 + w2
+
+        # Из нескольких фрагментов одного пикселя остаётся ближайший
+        np.maximum.at(self.inv_depth, pixels, inv_depth)
+        nearest = np.flatnonzero(inv_depth >= self.inv_depth[pixels])
+        pixels = pixels[nearest]
+        self.triangle_ids[pixels] = np.repeat(ids, counts)[nearest]
+        self.weights[pixels] = np.stack((w0[nearest], w1[nearest], w2[nearest]), axis=1) / inv_depth[nearest, None]
+
+    def fragments(self):
+        """Закрашенные пиксели: их номера (P,), номера треугольников (P,) и веса вершин (P, 3)."""
+        pixels = np.flatnonzero(self.triangle_ids >= 0)
+        return pixels, self.triangle_ids[pixels], self.weights[pixels]
+
+    def shade(self, shader):
+        """QImage кадра, закрашенного по плиткам: shader(ids, weights) возвращает цвета (P, 3).
+
+        shader получает номера треугольников и веса вершин закрашенных
+        пикселей одной плитки; при workers > 1 он вызывается из разных
+        потоков одновременно и не должен менять общее состояние.
+        """
+        self.color_buffer.fill(0)
+        self._run(self._shade_tile, [(tile, shader) for tile in self.tiles()])
+        return self.image()
+
+    def _tile_pixels(self, tile):
+        # Закрашенные пиксели плитки
+        x0, y0, x1, y1 = tile
+        pixels = (np.arange(y0, y1 + 1)[:, None] * self.width + np.arange(x0, x1 + 1)).ravel()
+        return pixels[self.triangle_ids[pixels] >= 0]
+
+    def _shade_tile(self, tile, shader):
+        pixels = self._tile_pixels(tile)
+        if len(pixels):
+            self._pack(pixels, shader(self.triangle_ids[pixels], self.weights[pixels]))
+
+    def gbuffer(self, builder):
+        """G-буфер кадра: (номера закрашенных пикселей (P,), атрибуты этих пикселей).
+
+        builder(ids, weights) получает номера треугольников и веса вершин
+        всех закрашенных пикселей кадра и возвращает их атрибуты, например
+        позиции, нормали и цвет. Буфер собирается одним вызовом, а не по
+        плиткам: свет проходит по нему целиком, без склейки плиток. Буфер
+        не зависит от следующих растеризаций и освещается (lit_image)
+        сколько угодно раз без повторной интерполяции.
+        """
+        pixels, ids, weights = self.fragments()
+        return pixels, builder(ids, weights)
+
+    def lit_image(self, pixels, colors, intensities):
+        """QImage кадра: базовые цвета (3, P) от 0 до 255, умноженные на яркости (P,), в пикселях pixels.
+
+        Цвет собирается по каналам из непрерывных строк, без массива (P, 3)
+        и его ограничения; ограничиваются только яркости, на месте.
+        """
+        np.clip(intensities, 0, 1, out=intensities)
+        packed = np.full(len(pixels), 0xFF000000, dtype=np.uint32)
+        for shift, channel in zip((16, 8, 0), colors):
+            packed |= (channel * intensities).astype(np.uint32) << np.uint32(shift)
+        self.color_buffer.fill(0)
+        self.color_buffer[pixels] = packed
+        return self.image()
+
+    def to_image(self, pixels, colors):
+        """QImage кадра: цвета (P, 3) в пикселях pixels, остальное прозрачно."""
+        self.color_buffer.fill(0)
+        self._pack(pixels, colors)
+        return self.image()
+
+    def _pack(self, pixels, colors):
+        colors = np.clip(colors, 0, 255).astype(np.uint32)
+        self.color_buffer[pixels] = 0xFF000000 | (colors[:, 0] << 16) | (colors[:, 1] << 8) | colors[:, 2]
+
+    def image(self):
+        return QImage(self.color_buffer, self.width, self.height, self.width * 4,
+                      QImage.Format_ARGB32_Premultiplied)
@@ -0,0 +1,158 @@
+"""Рендер сцены main_2 в PNG без окна.
+
+Примеры:
+    python render_batch.py --orbit 36 --shading flat,phong --out frames
+    python render_batch.py --angles 0,45,90 --pitch -20 --size 320x240
+    python render_batch.py --path camera_path.txt --raster
+    python render_batch.py --orbit 12 --profile profile.jsonl
+
+Файл пути камеры: по строке на кадр, "x y z rx ry rz" - положение и
+поворот камеры, как camera_pos и camera_rot виджета; строки с # пропускаются.
+"""
+import argparse
+import os
+import sys
+import time
+
+# Без дисплея: Qt рисует в память, окно не создаётся
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+from PySide6.QtGui import QImage
+from PySide6.QtWidgets import QApplication
+
+from camera import orbit_pose
+from culling import bounding_sphere
+from main_2 import SceneWidget, ShadingMode, DisplayMode
+
+
+def read_camera_path(path):
+    """Кадры пути камеры из текстового файла: список (положение, поворот)."""
+    poses = []
+    with open(path, encoding='utf-8') as file:
+        for number, line in enumerate(file, 1):
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            values = [float(value) for value in line.replace(',', ' ').split()]
+            if len(values) != 6:
+                raise ValueError(f"{path}:{number}: нужно 6 чисел 'x y z rx ry rz', получено {len(values)}")
+            poses.append((values[:3], values[3:]))
+    return poses
+
+
+def orbit_poses(angles, pitch, distance, target):
+    """Кадры облёта target: по кадру на каждый угол поворота вокруг оси y."""
+    return [orbit_pose(angle, pitch, distance, target) for angle in angles]
+
+
+def scene_center(scene):
+    # Центр сферы вокруг обеих букв с учётом их положения
+    points = [letter.vertex_array + (letter.position.x, letter.position.y, letter.position.z)
+              for letter in (scene.x_letter, scene.k_letter)]
+    return bounding_sphere(np.concatenate(points))[0]
+
+
+def render_sequence(scene, poses, out_dir, shading_modes, prefix='frame'):
+    """Рендер кадров poses для каждого режима затенения в PNG, возвращает пути файлов.
+
+    Геометрия букв, растеризатор и изображение создаются один раз на всю
+    серию; матрицы камеры пересчитываются один раз на кадр пути, а
+    режимы затенения перебираются внутри кадра.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    image = QImage(scene.width(), scene.height(), QImage.Format_ARGB32_Premultiplied)
+    paths = []
+    for index, (position, rotation) in enumerate(poses):
+        scene.camera.position = position
+        scene.camera.rotation = rotation
+        for mode in shading_modes:
+            scene.shading_mode = mode
+            scene.render(image)
+            path = os.path.join(out_dir, f'{prefix}_{mode.name.lower()}_{index:04d}.png')
+            if not image.save(path):
+                raise OSError(f"Не удалось записать {path}")
+            paths.append(path)
+    return paths
+
+
+def _enum_list(enum, text):
+    try:
+        return [enum[name.strip().upper()] for name in text.split(',') if name.strip()]
+    except KeyError as error:
+        raise argparse.ArgumentTypeError(
+            f"неизвестный режим {error}, допустимы: {', '.join(m.name.lower() for m in enum)}")
+
+
+def _float_list(text):
+    return [float(value) for value in text.split(',') if value.strip()]
+
+
+def _size(text):
+    width, _, height = text.lower().partition('x')
+    return int(width), int(height)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Рендер сцены с буквами X и K в PNG без окна.")
+    poses = parser.add_mutually_exclusive_group()
+    poses.add_argument('--orbit', type=int, metavar='N', help="N кадров облёта по кругу (по умолчанию 12)")
+    poses.add_argument('--angles', type=_float_list, metavar='A,B,...', help="углы облёта вокруг оси y в градусах")
+    poses.add_argument('--path', metavar='FILE', help="файл пути камеры")
+    parser.add_argument('--pitch', type=float, default=0.0, help="наклон камеры при облёте, градусы")
+    parser.add_argument('--distance', type=float, default=400.0, help="расстояние от камеры до центра сцены")
+    parser.add_argument('--shading', type=lambda text: _enum_list(ShadingMode, text), default=[ShadingMode.PHONG],
+                        metavar='flat,gouraud,phong', help="режимы затенения, по серии кадров на каждый")
+    parser.add_argument('--display', type=lambda text: _enum_list(DisplayMode, text)[0], default=DisplayMode.FILLED,
+                        metavar='points|wireframe|filled', help="режим отображения")
+    parser.add_argument('--size', type=_size, default=(320, 240), metavar='WxH', help="размер кадра")
+    parser.add_argument('--scale', type=float, default=1.4, help="масштаб сцены, как ползунок в окне / 100")
+    parser.add_argument('--raster', action='store_true', help="заливка растеризатором с z-буфером")
+    parser.add_argument('--workers', type=int, default=None, help="потоков растеризации")
+    parser.add_argument('--blinn', action='store_true', help="блик Блинна-Фонга")
+    parser.add_argument('--no-light-source', action='store_true', help="не рисовать источник света")
+    parser.add_argument('--stats', action='store_true', help="рисовать счётчики граней")
+    parser.add_argument('--out', default='frames', help="каталог для PNG")
+    parser.add_argument('--prefix', default='frame', help="начало имён файлов")
+    parser.add_argument('--profile', metavar='FILE', help="дописывать замеры каждого кадра в файл JSON lines")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Ссылку на приложение держит сам Qt (QApplication.instance()), своя не нужна
+    QApplication.instance() or QApplication(sys.argv[:1])
+
+    scene = SceneWidget()
+    scene.resize(*args.size)
+    scene.base_scale = args.scale
+    scene.display_mode = args.display
+    scene.software_raster = args.raster
+    scene.blinn = args.blinn
+    scene.show_light_source = not args.no_light_source
+    scene.show_face_stats = args.stats
+    if args.workers is not None:
+        scene.rasterizer.set_workers(args.workers)
+    if args.profile:
+        # Замеры пишутся в файл, наложение с ними на кадры не попадает
+        scene.profiler.export(args.profile)
+
+    if args.path:
+        poses = read_camera_path(args.path)
+    else:
+        angles = args.angles
+        if angles is None:
+            count = args.orbit or 12
+            angles = [360.0 * i / count for i in range(count)]
+        poses = orbit_poses(angles, args.pitch, args.distance, scene_center(scene))
+
+    start = time.perf_counter()
+    paths = render_sequence(scene, poses, args.out, args.shading, args.prefix)
+    elapsed = time.perf_counter() - start
+    scene.profiler.export(None)
+    print(f"{len(paths)} кадров в {args.out} за {elapsed:.2f} с "
+          f"({elapsed / max(len(paths), 1) * 1000:.1f} мс на кадр)")
+
+
+if __name__ == '__main__':
+    main()
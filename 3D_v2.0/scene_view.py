@@ -0,0 +1,177 @@
+import time
+
+from PySide6.QtWidgets import QWidget
+from PySide6.QtGui import QPainter, QPen, QColor, QImage
+from PySide6.QtCore import Qt, QPoint, QPointF, QSize
+
+from math_utils import Vector3D, transform_points
+from culling import clip_segment, empty_face_stats
+from profiler import FrameProfiler
+from frame_scheduler import FrameScheduler, QualityScheduler, Quality
+
+
+class SceneView(QWidget):
+    """Общая часть виджетов сцены обоих окон: кадр, его качество, замеры и служебные надписи.
+
+    paintEvent рисует кадр по шагам, которые задаёт подкласс:
+    _prepare_frame(quality) - настройки кадра, draw_overlays(painter) -
+    оси и значки в полном разрешении, _draw_scene_faces(painter) - грани,
+    при упрощённом кадре в уменьшенное изображение, frame_labels() -
+    метки кадра для профилировщика. Подкласс задаёт camera, base_scale,
+    object_transform, display_mode и _apply_input(taken).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.face_stats = empty_face_stats()  # Сколько граней отброшено и нарисовано в последнем кадре
+        self.show_face_stats = True
+        self.profiler = FrameProfiler()  # Замеры этапов кадра, включаются клавишей F3
+        # Мышь и ползунки копят изменения, таймер применяет их и рисует не чаще одного кадра за интервал
+        self.scheduler = FrameScheduler(self, self._apply_input)
+        # Во время вращения кадры упрощаются (без сглаживания, в меньшем разрешении), после паузы рисуется полный
+        self.quality = QualityScheduler(self)
+        self.scheduler.input_received.connect(self.quality.interaction)
+        self.render_scale = 1.0  # Доля разрешения окна, в которой рисуются грани текущего кадра
+        self._frame_image = None
+        self.setFocusPolicy(Qt.StrongFocus)  # Для клавиш профилировщика
+
+    def paintEvent(self, event):
+        profiler = self.profiler
+        profiler.begin_frame()
+        start = time.perf_counter()
+        quality = self.quality.frame_quality()
+        preview = quality == Quality.PREVIEW
+        self._prepare_frame(quality)
+        antialias = not preview or self.quality.preview_antialias
+
+        painter = profiler.wrap_painter(QPainter(self))
+        painter.setRenderHint(QPainter.Antialiasing, antialias)
+        painter.fillRect(self.rect(), QColor(50, 50, 50))
+        self.face_stats = empty_face_stats()
+
+        # Оси и значки дёшевы и рисуются в полном разрешении
+        self.render_scale = 1.0
+        with profiler.stage('overlays'):
+            self.draw_overlays(painter)
+
+        self.render_scale = self.quality.frame_scale(quality)
+        if self.frame_size() != (self.width(), self.height()):
+            # Грани рисуются в уменьшенное прозрачное изображение, которое растягивается на всё окно
+            image = self._scaled_frame_image()
+            image.fill(Qt.transparent)
+            scene_painter = profiler.wrap_painter(QPainter(image))
+            scene_painter.setRenderHint(QPainter.Antialiasing, antialias)
+            self._draw_scene_faces(scene_painter)
+            scene_painter.end()
+            with profiler.stage('upscale'):
+                painter.drawImage(self.rect(), image)
+        else:
+            self._draw_scene_faces(painter)
+
+        self.draw_face_stats(painter)
+        profiler.count('faces_drawn', self.face_stats['drawn'])
+        profiler.count('faces_total', self.face_stats['total'])
+        profiler.count('input_events', self.scheduler.last_input_events)
+        profiler.count('dropped_frames', self.scheduler.dropped_frames)
+        self.quality.frame_done(quality, (time.perf_counter() - start) * 1000)
+        profiler.end_frame(size=[self.width(), self.height()], quality=quality.name, scale=self.render_scale,
+                           **self.frame_labels())
+        if profiler.show_overlay:
+            self.draw_profiler_overlay(painter)
+
+    def _prepare_frame(self, quality):
+        pass
+
+    def draw_overlays(self, painter):
+        self.draw_axes(painter)
+
+    def frame_labels(self):
+        return {}
+
+    def _scaled_frame_image(self):
+        # Изображение кадра переиспользуется, пока размер кадра тот же
+        width, height = self.frame_size()
+        if self._frame_image is None or self._frame_image.size() != QSize(width, height):
+            self._frame_image = QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+        return self._frame_image
+
+    def camera_view_projection(self):
+        # Матрица камеры пересчитывается, только если камера или окно изменились
+        width, height = self.frame_size()
+        self.camera.set_viewport(width, height, self.base_scale * width / max(self.width(), 1))
+        return self.camera.view_projection_matrix()
+
+    def frame_size(self):
+        """Размер кадра граней в пикселях: окно, уменьшенное в render_scale раз."""
+        return max(int(self.width() * self.render_scale), 1), max(int(self.height() * self.render_scale), 1)
+
+    def draw_axes(self, painter):
+        origin = Vector3D(0, 0, 0)
+        for end, color, label in ((Vector3D(150, 0, 0), Qt.red, "X"), (Vector3D(0, 150, 0), Qt.green, "Y"),
+                                  (Vector3D(0, 0, 150), Qt.blue, "Z")):
+            segment = self.project_segment(origin, end)
+            if segment is None:
+                continue
+            painter.setPen(QPen(color, 2))
+            painter.drawLine(*segment)
+            painter.drawText(segment[1] + QPointF(5, 5), label)
+
+    def project_point(self, point):
+        """Экранная точка или None, если точка ближе ближней плоскости камеры."""
+        matrix = self.camera_view_projection() @ self.object_transform.to_array()
+        x, y, _, w = transform_points(matrix, [[point.x, point.y, point.z]])[0]
+        if w >= self.camera.near:
+            return QPoint(int(x / w), int(y / w))
+        return None
+
+    def project_segment(self, start, end):
+        """Экранные концы отрезка, отсечённого ближней плоскостью, или None, если он целиком за ней."""
+        matrix = self.camera_view_projection() @ self.object_transform.to_array()
+        clip = transform_points(matrix, [[start.x, start.y, start.z], [end.x, end.y, end.z]])
+        part = clip_segment(clip[0, 3], clip[1, 3], self.camera.near)
+        if part is None:
+            return None
+        points = [clip[0] + t * (clip[1] - clip[0]) for t in part]
+        return [QPointF(x / w, y / w) for x, y, _, w in points]
+
+    def draw_face_stats(self, painter):
+        if not self.show_face_stats:
+            return
+        stats = self.face_stats
+        text = (f"Грани {stats['drawn']}/{stats['total']}: задние {stats['back']}, "
+                f"вне обзора {stats['frustum']}, обрезаны {stats['clipped']}")
+        # В узком окне строка обрезается многоточием, а не уходит за край
+        text = painter.fontMetrics().elidedText(text, Qt.ElideRight, max(self.width() - 20, 0))
+        painter.setPen(QPen(QColor(200, 200, 200), 1))
+        painter.drawText(10, self.height() - 10, text)
+
+    def draw_profiler_overlay(self, painter):
+        lines = self.profiler.overlay_lines()
+        if not lines:
+            return
+        metrics = painter.fontMetrics()
+        height = metrics.height()
+        width = max(metrics.horizontalAdvance(line) for line in lines)
+        painter.fillRect(5, 5, width + 10, height * len(lines) + 10, QColor(0, 0, 0, 160))
+        painter.setPen(QPen(QColor(120, 255, 120), 1))
+        for i, line in enumerate(lines):
+            painter.drawText(10, 10 + metrics.ascent() + i * height, line)
+
+    def set_show_face_stats(self, visible):
+        self.show_face_stats = visible
+        self.update()
+
+    def set_display_mode(self, mode):
+        self.display_mode = mode
+        self.update()
+
+    def keyPressEvent(self, event):
+        # F3 - замеры кадра и их вывод поверх сцены, F4 - запись замеров окна в файл JSON lines
+        if event.key() == Qt.Key_F3:
+            self.profiler.toggle_overlay()
+            self.update()
+        elif event.key() == Qt.Key_F4 and self.profiler.frames:
+            self.profiler.dump_snapshot()
+            self.update()
+        else:
+            super().keyPressEvent(event)
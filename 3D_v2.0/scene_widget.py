@@ -1,23 +1,27 @@
-from PySide6.QtWidgets import QWidget
-from PySide6.QtGui import QPainter, QPen, QBrush, QColor, QPolygonF
-from PySide6.QtCore import Qt, QPoint, QPointF
-from math_utils import Vector3D, Matrix4x4
-from letter3d import Letter3D
+from PySide6.QtGui import QPen, QBrush, QColor, QPolygonF
+from PySide6.QtCore import Qt, QPointF
+import numpy as np
+
+from math_utils import Vector3D, Matrix4x4, transform_points
+from camera import Camera
+from text3d import Text3D
 from enums import DisplayMode, ShadingMode
+from culling import spheres_outside, transform_normals, back_facing, clip_polygon, interpolate_polygon
+from scene_view import SceneView
 
 
-class SceneWidget(QWidget):
+class SceneWidget(SceneView):
     def __init__(self):
         super().__init__()
         self.setAutoFillBackground(True)
         p = self.palette()
         p.setColor(self.backgroundRole(), QColor(0, 0, 0))
         self.setPalette(p)
-        self.x_letter = Letter3D(100, 60, 30, offset_x=-60, letter_type='X')
-        self.k_letter = Letter3D(100, 60, 30, offset_x=60, letter_type='K')
-        self.camera_pos = Vector3D(0, 0, -400)
-        self.camera_rot = [0, 0, 0]
-        self.object_transform = Matrix4x4.rotation_z(180)
+        # Буквы сцены - копии общей геометрии букв, каждая со своей матрицей
+        self.text = Text3D('XK')
+        # Ось y направлена вверх, как в main_2: с поворотом на 180 вокруг z вместо flip_y текст выходил зеркальным
+        self.camera = Camera(position=(0, 0, -400), flip_y=True)
+        self.object_transform = Matrix4x4()
         self.scale = 1.0
         self.base_scale = 1.4
         self.auto_scale = True
@@ -29,29 +33,44 @@ class SceneWidget(QWidget):
         self.is_rotating = False
         self.rotation_speed = 0.5
 
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-        painter.fillRect(self.rect(), QColor(50, 50, 50))
-        self.draw_axes(painter)
+    @property
+    def camera_pos(self):
+        return Vector3D(*self.camera.position.tolist())
 
-        all_faces = []
+    @camera_pos.setter
+    def camera_pos(self, value):
+        self.camera.position = (value.x, value.y, value.z)
+
+    @property
+    def camera_rot(self):
+        return self.camera.rotation.tolist()
+
+    @camera_rot.setter
+    def camera_rot(self, value):
+        self.camera.rotation = value
 
-        x_faces = self._prepare_letter_faces(self.x_letter)
-        all_faces.extend(x_faces)
+    def frame_labels(self):
+        return {'viewer': 'main', 'display': self.display_mode.name}
 
-        k_faces = self._prepare_letter_faces(self.k_letter)
-        all_faces.extend(k_faces)
+    def _draw_scene_faces(self, painter):
+        profiler = self.profiler
+        all_faces = []
+        for glyph, matrices in self.text.groups():
+            all_faces.extend(self._prepare_glyph_faces(glyph, matrices))
+
+        with profiler.stage('sort'):
+            all_faces.sort(reverse=True, key=lambda x: x[0])
 
-        all_faces.sort(reverse=True, key=lambda x: x[0])
+        with profiler.stage('draw'):
+            self._draw_faces(painter, all_faces)
 
+    def _draw_faces(self, painter, all_faces):
         for depth, face, screen_points in all_faces:
             if len(screen_points) >= 3:
                 if self.display_mode == DisplayMode.POINTS:
                     painter.setPen(QPen(face.color, 5))
                     for point in screen_points:
-                        if point.x() != -1000 and point.y() != -1000:
-                            painter.drawPoint(point)
+                        painter.drawPoint(point)
                 elif self.display_mode == DisplayMode.WIREFRAME:
                     polygon = QPolygonF(screen_points)
                     painter.setPen(QPen(face.color, 2))
@@ -62,77 +81,91 @@ class SceneWidget(QWidget):
                     painter.setBrush(QBrush(face.color))
                     painter.drawPolygon(QPolygonF(screen_points))
 
-    def _prepare_letter_faces(self, letter):
+    def _prepare_glyph_faces(self, glyph, matrices):
+        """Грани всех копий одной буквы: матрицы копий (K, 4, 4) применяются к общим вершинам разом."""
         faces_with_depth = []
-        transformed_vertices = []
+        instances = self.model_matrix() @ matrices  # Копия, затем зеркало и поворот объекта
+        face_count = len(glyph.faces)
+        self.face_stats['total'] += face_count * len(instances)
+        self.profiler.count('instances', len(instances))
+
+        # Копии целиком вне поля зрения: сфера вокруг буквы снаружи одной из плоскостей пирамиды
+        self.camera_view_projection()  # Обновляет размеры окна у камеры
+        with self.profiler.stage('culling'):
+            centers = transform_points(self.camera.view_matrix() @ instances, [glyph.bounding_center])[:, 0, :3]
+            radii = glyph.bounding_radius * np.linalg.norm(instances[:, :3, :3], axis=1).max(axis=1)
+            outside = spheres_outside(self.camera.frustum_planes(), centers, radii)
+        self.face_stats['frustum'] += face_count * int(outside.sum())
+        instances = instances[~outside]
+        if not len(instances):
+            return faces_with_depth
+
+        # Вершины всех копий проходят свою матрицу, камеру и проекцию одной операцией: (K, N, 4)
+        with self.profiler.stage('transform'):
+            self.profiler.count('vertices', len(instances) * len(glyph.vertex_array))
+            clip = transform_points(self.camera_view_projection() @ instances, glyph.vertex_array)
+
+        # Задние грани отбрасываются только при заливке: в каркасе и точках видны все рёбра
+        visible = np.ones((len(instances), face_count), dtype=bool)
+        if self.display_mode == DisplayMode.FILLED:
+            with self.profiler.stage('culling'):
+                world = transform_points(instances, glyph.vertex_array)[..., :3]
+                back = back_facing(transform_normals(instances, glyph.face_outward),
+                                   world[:, glyph.face_indices].mean(axis=2), self.camera.position)
+            self.face_stats['back'] += int(back.sum())
+            visible = ~back
+
+        with self.profiler.stage('project'):
+            instance_ids, face_ids = np.nonzero(visible)
+            corner_clip = clip[instance_ids[:, None], glyph.face_indices[face_ids]]
+            faces_with_depth = self._project_faces(glyph, face_ids, corner_clip)
+        self.face_stats['drawn'] += len(faces_with_depth)
+        return faces_with_depth
 
+    def _project_faces(self, letter, face_ids, corner_clip):
+        faces_with_depth = []
+        depths = corner_clip[..., 3]  # w после проекции - глубина вершины в системе камеры
+        near = self.camera.near
+        crossing = (depths.min(axis=1) < near).tolist()
+        face_depths = depths.mean(axis=1).tolist()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            screen = (corner_clip[..., :2] / corner_clip[..., 3:]).tolist()
+
+        for k, face_id in enumerate(face_ids.tolist()):
+            points = screen[k]
+            if crossing[k]:
+                # Грань пересекает ближнюю плоскость: остаётся только часть перед ней
+                polygon = clip_polygon(depths[k], near)
+                if not polygon:
+                    self.face_stats['frustum'] += 1
+                    continue
+                part = interpolate_polygon(corner_clip[k], polygon)
+                points = (part[:, :2] / part[:, 3:]).tolist()
+                self.face_stats['clipped'] += 1
+            screen_points = [QPointF(px, py) for px, py in points]
+            faces_with_depth.append((face_depths[k], letter.faces[face_id], screen_points))
+        return faces_with_depth
+
+    def model_matrix(self):
+        # Зеркало и поворот объекта
         mirror_matrix = Matrix4x4.scaling(
             -1 if self.mirror_x else 1,
             -1 if self.mirror_y else 1,
             -1 if self.mirror_z else 1
         )
+        return (self.object_transform * mirror_matrix).to_array()
 
-        for v in letter.vertices:
-            v_mirrored = mirror_matrix * v
-            v_transformed = self.object_transform * v_mirrored
-            v_camera = self.apply_camera_transform(v_transformed)
-            transformed_vertices.append(v_camera)
-
-        for face in letter.faces:
-            face_vertices = [transformed_vertices[letter.vertices.index(v)] for v in face.vertices]
-            avg_depth = sum(v.z for v in face_vertices) / len(face_vertices)
-
-            screen_points = []
-            for v in face_vertices:
-                if v.z > 0:
-                    factor = 300 / v.z
-                    aspect_ratio = self.width() / self.height()
-                    px = v.x * factor * self.base_scale * (
-                        1 / aspect_ratio if aspect_ratio > 1 else 1) + self.width() / 2
-                    py = v.y * factor * self.base_scale * (1 if aspect_ratio > 1 else aspect_ratio) + self.height() / 2
-                    screen_points.append(QPointF(px, py))
-                else:
-                    screen_points.append(QPointF(-1000, -1000))
-
-            faces_with_depth.append((avg_depth, face, screen_points))
-
-        return faces_with_depth
+    def view_projection_matrix(self):
+        """Зеркало, поворот объекта, камера и перспектива, собранные в одну матрицу 4x4.
 
-    def draw_axes(self, painter):
-        origin = self.project_point(Vector3D(0, 0, 0))
-        x_end = self.project_point(Vector3D(150, 0, 0))
-        y_end = self.project_point(Vector3D(0, 150, 0))
-        z_end = self.project_point(Vector3D(0, 0, 150))
-        painter.setPen(QPen(Qt.red, 2))
-        painter.drawLine(origin, x_end)
-        painter.drawText(x_end + QPoint(5, 5), "X")
-        painter.setPen(QPen(Qt.green, 2))
-        painter.drawLine(origin, y_end)
-        painter.drawText(y_end + QPoint(5, 5), "Y")
-        painter.setPen(QPen(Qt.blue, 2))
-        painter.drawLine(origin, z_end)
-        painter.drawText(z_end + QPoint(5, 5), "Z")
-
-    def project_point(self, point):
-        v_transformed = self.object_transform * point
-        v_camera = self.apply_camera_transform(v_transformed)
-        if v_camera.z > 0:
-            factor = 300 / v_camera.z
-            aspect_ratio = self.width() / self.height()
-            px = v_camera.x * factor * self.base_scale * (
-                1 / aspect_ratio if aspect_ratio > 1 else 1) + self.width() / 2
-            py = v_camera.y * factor * self.base_scale * (1 if aspect_ratio > 1 else aspect_ratio) + self.height() / 2
-            return QPoint(int(px), int(py))
-        return QPoint(-1000, -1000)
+        После умножения x и y - экранные координаты, умноженные на w,
+        а w - глубина z в системе камеры.
+        """
+        return self.camera_view_projection() @ self.model_matrix()
 
     def apply_camera_transform(self, v):
-        rot_x = Matrix4x4.rotation_x(self.camera_rot[0])
-        rot_y = Matrix4x4.rotation_y(self.camera_rot[1])
-        rot_z = Matrix4x4.rotation_z(self.camera_rot[2])
-        rotation = rot_x * rot_y * rot_z
-        translation = Matrix4x4.translation(-self.camera_pos.x, -self.camera_pos.y, -self.camera_pos.z)
-        camera_transform = rotation * translation
-        return camera_transform * v
+        x, y, z, _ = transform_points(self.camera.view_matrix(), [[v.x, v.y, v.z]])[0]
+        return Vector3D(x, y, z)
 
     def auto_scale_view(self):
         if self.auto_scale:
@@ -151,8 +184,8 @@ class SceneWidget(QWidget):
             self.mirror_z = not self.mirror_z
         self.update()
 
-    def set_display_mode(self, mode):
-        self.display_mode = mode
+    def set_text(self, text):
+        self.text.set_text(text)
         self.update()
 
     def mousePressEvent(self, event):
@@ -168,16 +201,21 @@ class SceneWidget(QWidget):
     def mouseMoveEvent(self, event):
         if self.is_rotating and self.last_mouse_pos:
             delta = -(event.position() - self.last_mouse_pos)
-            rot_x = Matrix4x4.rotation_x(-delta.y() * self.rotation_speed)
-            rot_y = Matrix4x4.rotation_y(delta.x() * self.rotation_speed)
-            self.object_transform = rot_y * rot_x * self.object_transform
+            # Поворот применится перед кадром вместе с остальными событиями мыши
+            self.scheduler.rotate(-delta.y() * self.rotation_speed, delta.x() * self.rotation_speed)
             self.last_mouse_pos = event.position()
-            self.update()
 
     def wheelEvent(self, event):
-        delta = event.angleDelta().y()
-        if delta > 0:
-            self.base_scale *= 1.1
-        else:
-            self.base_scale /= 1.1
-        self.update()
\ No newline at end of file
+        # Каждое событие колеса - шаг в 1.1 раза
+        self.scheduler.zoom(1 if event.angleDelta().y() > 0 else -1)
+
+    def _apply_input(self, taken):
+        # Всё, что пришло между кадрами: один поворот объекта и одно изменение масштаба
+        angle_x, angle_y = taken.rotation
+        if angle_x or angle_y:
+            rot_x = Matrix4x4.rotation_x(angle_x)
+            rot_y = Matrix4x4.rotation_y(angle_y)
+            self.object_transform = rot_y * rot_x * self.object_transform
+        if taken.zoom:
+            self.base_scale *= 1.1 ** taken.zoom
+        taken.run_calls()
\ No newline at end of file
@@ -0,0 +1,58 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from math_utils import Vector3D, Matrix4x4, transform_points
+from camera import Camera
+
+VERTEX_COUNT = 10 ** 5
+SLOW_COUNT = 10 ** 4  # Поточечный путь меряем на меньшем числе вершин
+FRAMES = 100
+WIDTH, HEIGHT, BASE_SCALE = 800, 600, 1.4
+
+
+def project_per_vertex(camera_pos, camera_rot, vertices):
+    """Прежний путь: матрица камеры собирается заново для каждой вершины."""
+    result = []
+    for v in vertices:
+        rotation = (Matrix4x4.rotation_x(camera_rot[0]) * Matrix4x4.rotation_y(camera_rot[1]) *
+                    Matrix4x4.rotation_z(camera_rot[2]))
+        translation = Matrix4x4.translation(-camera_pos.x, -camera_pos.y, -camera_pos.z)
+        cv = rotation * translation * v
+        if cv.z > 0:
+            factor = 300 / cv.z
+            aspect_ratio = WIDTH / HEIGHT
+            result.append((cv.x * factor * BASE_SCALE / aspect_ratio + WIDTH / 2,
+                           cv.y * factor * BASE_SCALE + HEIGHT / 2))
+    return result
+
+
+def project_cached(camera, vertex_array):
+    camera.set_viewport(WIDTH, HEIGHT, BASE_SCALE)
+    clip = transform_points(camera.view_projection_matrix(), vertex_array)
+    return clip[:, :2] / clip[:, 3:]
+
+
+if __name__ == "__main__":
+    vertex_array = np.random.uniform(-100, 100, (VERTEX_COUNT, 3))
+
+    vertices = [Vector3D(*v) for v in vertex_array[:SLOW_COUNT].tolist()]
+    start = time.perf_counter()
+    project_per_vertex(Vector3D(0, 0, -400), [10, 20, 0], vertices)
+    slow_rate = SLOW_COUNT / (time.perf_counter() - start)
+
+    camera = Camera(position=(0, 0, -400), rotation=(10, 20, 0))
+    start = time.perf_counter()
+    for frame in range(FRAMES):
+        if frame % 10 == 0:
+            camera.move(dz=1)  # Изредка двигаем камеру, как колесом мыши
+        project_cached(camera, vertex_array)
+    fast_rate = VERTEX_COUNT * FRAMES / (time.perf_counter() - start)
+
+    print(f"матрица на каждую вершину: {slow_rate:14,.0f} вершин/с")
+    print(f"кэшированная камера:       {fast_rate:14,.0f} вершин/с ({fast_rate / slow_rate:.0f}x)")
+    print(f"пересчётов камеры за {FRAMES} кадров: {camera.rebuilds}")
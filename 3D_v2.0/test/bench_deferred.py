@@ -0,0 +1,91 @@
+import os
+import sys
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+from PySide6.QtGui import QImage
+from PySide6.QtWidgets import QApplication
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from culling import bounding_sphere
+from main_2 import SceneWidget, Letter3D, ShadingMode, DisplayMode, Vector3D
+
+RINGS, SEGMENTS = 250, 400  # 10^5 четырёхугольных граней
+RADIUS = 250
+WIDTH, HEIGHT = 800, 600
+FRAMES = 10
+FRAME_BUDGET = 1 / 60  # Смена одного света должна укладываться в кадр при 60 кадрах/с
+
+
+class SphereLetter(Letter3D):
+    """Сфера из RINGS x SEGMENTS граней вместо буквы; массивы строятся сразу, без объектов Face.
+
+    Годится только для растеризации с z-буфером: рисованию через QPainter
+    нужны объекты граней.
+    """
+
+    def update_geometry(self):
+        theta = np.linspace(0, np.pi, RINGS + 1)
+        phi = np.linspace(0, 2 * np.pi, SEGMENTS, endpoint=False)
+        directions = np.stack([np.sin(theta)[:, None] * np.cos(phi), np.cos(theta)[:, None] * np.ones_like(phi),
+                               np.sin(theta)[:, None] * np.sin(phi)], axis=-1).reshape(-1, 3)
+        ring, segment = np.meshgrid(np.arange(RINGS), np.arange(SEGMENTS), indexing='ij')
+        following = (segment + 1) % SEGMENTS
+        self.vertex_array = directions * RADIUS
+        self.face_indices = np.stack([ring * SEGMENTS + segment, ring * SEGMENTS + following,
+                                      (ring + 1) * SEGMENTS + following, (ring + 1) * SEGMENTS + segment],
+                                     axis=-1).reshape(-1, 4)
+        corners = self.vertex_array[self.face_indices]
+        normals = corners.mean(axis=1)
+        self.face_normals = normals / np.linalg.norm(normals, axis=1, keepdims=True)
+        self.face_outward = self.face_normals
+        self.vertex_normals = directions
+        self.face_colors = np.full((len(self.face_indices), 3), 255.0)
+        self.faces = [None] * len(self.face_indices)
+        self.bounding_center, self.bounding_radius = bounding_sphere(self.vertex_array)
+        self.geometry_version += 1
+
+
+def frame_time(scene, image, move_light):
+    """Медиана времени кадра: одиночные задержки машины не сдвигают её."""
+    times = []
+    for i in range(FRAMES):
+        if move_light:
+            scene.light_pos = Vector3D(150 * np.cos(i), 100, -150 + 50 * np.sin(i))
+        start = time.perf_counter()
+        scene.render(image)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv[:1])
+    scene = SceneWidget()
+    scene.resize(WIDTH, HEIGHT)
+    scene.x_letter = SphereLetter()
+    scene.k_letter.position = Vector3D(10 ** 4, 0, 0)  # Вне поля зрения
+    scene.display_mode = DisplayMode.FILLED
+    scene.software_raster = True
+    scene.show_face_stats = False
+    image = QImage(WIDTH, HEIGHT, QImage.Format_ARGB32_Premultiplied)
+
+    missed = []
+    print(f"{len(scene.x_letter.faces):,} граней, кадр {WIDTH}x{HEIGHT}, потоков {scene.rasterizer.workers}")
+    for mode in ShadingMode:
+        scene.shading_mode = mode
+        scene.set_deferred(False)
+        full = frame_time(scene, image, True)
+        scene.set_deferred(True)
+        scene.render(image)  # Первый кадр заполняет G-буфер
+        light_only = frame_time(scene, image, True)
+        print(f"{mode.name:8s} полный проход {full * 1000:7.1f} мс, только свет {light_only * 1000:6.1f} мс "
+              f"({full / light_only:.1f}x, {1 / light_only:.0f} кадров/с)")
+        if light_only > FRAME_BUDGET:
+            missed.append(mode.name)
+
+    if missed:
+        print(f"Только свет дольше {FRAME_BUDGET * 1000:.1f} мс: {', '.join(missed)}")
+        sys.exit(1)
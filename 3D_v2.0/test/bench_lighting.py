@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lighting import compute_intensities
+from math_utils import Vector3D, Matrix4x4
+
+POINT_COUNT = 10 ** 5
+SLOW_COUNT = 10 ** 4  # Поточечный путь меряем на меньшем числе точек
+REPEATS = 5  # Массивный путь короткий, берём лучший из нескольких замеров
+LIGHT_POS = (100, 100, -200)
+CAMERA_POS = (0, 0, -400)
+
+
+def compute_lighting(normal, position, light_pos, camera_pos, object_transform):
+    """Прежний SceneWidget.compute_lighting из main_2 (режим Фонга): одна точка на Vector3D."""
+    ambient = 0.2
+    diffuse = 0.7
+    specular = 0.5
+    shininess = 32
+
+    light_vec = (light_pos - position).normalized()
+    view_vec = (camera_pos - position).normalized()
+    final_normal = (object_transform * normal).normalized()
+    if final_normal.dot(view_vec) < 0:
+        final_normal = final_normal * -1  # У Vector3D нет унарного минуса
+
+    distance = (light_pos - position).length()
+    attenuation = 1.0 / (1.0 + 0.0014 * distance + 0.000007 * distance * distance)
+    diff = max(0, final_normal.dot(light_vec))
+    reflect_vec = (light_vec - final_normal * 2 * final_normal.dot(light_vec)).normalized()
+    spec = pow(max(0, reflect_vec.dot(view_vec)), shininess) if diff > 0 else 0
+
+    intensity = (ambient + diffuse * diff + specular * spec) * attenuation
+    return min(1.0, max(0.2, intensity))
+
+
+def shade_per_point(positions, normals):
+    """Прежний путь: compute_lighting для каждой вершины."""
+    light_pos, camera_pos, transform = Vector3D(*LIGHT_POS), Vector3D(*CAMERA_POS), Matrix4x4()
+    return [compute_lighting(Vector3D(*n), Vector3D(*p), light_pos, camera_pos, transform)
+            for p, n in zip(positions.tolist(), normals.tolist())]
+
+
+if __name__ == "__main__":
+    positions = np.random.uniform(-100, 100, (POINT_COUNT, 3))
+    normals = np.random.uniform(-1, 1, (POINT_COUNT, 3))
+
+    start = time.perf_counter()
+    reference = shade_per_point(positions[:SLOW_COUNT], normals[:SLOW_COUNT])
+    slow_rate = SLOW_COUNT / (time.perf_counter() - start)
+    error = np.abs(compute_intensities(positions[:SLOW_COUNT], normals[:SLOW_COUNT], LIGHT_POS, CAMERA_POS)
+                   - reference).max()
+
+    rates = {}
+    for blinn in (False, True):
+        times = []
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            compute_intensities(positions, normals, LIGHT_POS, CAMERA_POS, blinn=blinn)
+            times.append(time.perf_counter() - start)
+        rates[blinn] = POINT_COUNT / min(times)
+
+    print(f"Vector3D на каждую точку: {slow_rate:14,.0f} точек/с")
+    print(f"массив, Фонг:             {rates[False]:14,.0f} точек/с ({rates[False] / slow_rate:.0f}x)")
+    print(f"массив, Блинн-Фонг:       {rates[True]:14,.0f} точек/с ({rates[True] / slow_rate:.0f}x)")
+    print(f"расхождение с прежним путём: {error:.2e}")
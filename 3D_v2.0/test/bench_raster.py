@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lighting import compute_intensities
+from rasterizer import Rasterizer, interpolate
+
+WIDTH, HEIGHT = 1920, 1080
+TRIANGLE_COUNT = 5 * 10 ** 4
+FRAMES = 3
+WORKERS = (1, 2, 4, 8)
+LIGHT_POS = (100, 100, -200)
+CAMERA_POS = (0, 0, -400)
+
+
+def make_scene(count):
+    """Случайные треугольники по всему кадру: экранные координаты, глубины, позиции и нормали вершин."""
+    rng = np.random.default_rng(0)
+    centers = rng.uniform((0, 0), (WIDTH, HEIGHT), (count, 1, 2))
+    screen = centers + rng.normal(0, 12, (count, 3, 2))
+    depth = rng.uniform(100, 500, (count, 1)) + rng.uniform(-5, 5, (count, 3))
+    positions = rng.uniform(-100, 100, (count, 3, 3))
+    normals = rng.normal(0, 1, (count, 3, 3))
+    return screen, depth, positions, normals
+
+
+def render(rasterizer, screen, depth, positions, normals):
+    """Кадр с освещением Фонга в каждом пикселе; возвращает время растеризации и закраски."""
+    start = time.perf_counter()
+    rasterizer.clear()
+    rasterizer.draw_triangles(screen, depth)
+    raster_time = time.perf_counter() - start
+
+    def shader(ids, weights):
+        intensities = compute_intensities(interpolate(positions, ids, weights),
+                                          interpolate(normals, ids, weights), LIGHT_POS, CAMERA_POS)
+        return np.repeat(intensities[:, None] * 255, 3, axis=1)
+
+    start = time.perf_counter()
+    rasterizer.shade(shader)
+    return raster_time, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    scene = make_scene(TRIANGLE_COUNT)
+    print(f"{WIDTH}x{HEIGHT}, {TRIANGLE_COUNT} треугольников, ядер: {os.cpu_count()}")
+
+    base = None
+    for workers in WORKERS:
+        rasterizer = Rasterizer(WIDTH, HEIGHT, workers=workers)
+        render(rasterizer, *scene)  # Прогрев пула и буферов
+        times = np.array([render(rasterizer, *scene) for _ in range(FRAMES)]).mean(axis=0)
+        total = times.sum()
+        base = base or total
+        print(f"потоков {workers}: растеризация {times[0] * 1000:7.1f} мс, закраска {times[1] * 1000:7.1f} мс, "
+              f"кадр {total * 1000:7.1f} мс ({base / total:.2f}x)")
+        rasterizer.set_workers(1)
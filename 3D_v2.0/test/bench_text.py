@@ -0,0 +1,82 @@
+import os
+import sys
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtWidgets import QApplication
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from culling import empty_face_stats
+from letter3d import Letter3D
+from math_utils import Matrix4x4
+from scene_widget import SceneWidget
+from text3d import GlyphCache, Text3D
+
+LINE = "THE QUICK BROWN FOX JUMPS OVER THE LAZY DOG 0123456789 "
+LINES = 6  # Строк по len(LINE) символов, без пробелов 270 букв
+FRAMES = 20
+WIDTH, HEIGHT = 800, 600
+
+
+def build_text(cache):
+    text = Text3D(cache=cache)
+    for row in range(LINES):
+        for column, char in enumerate(LINE):
+            text.add(char, Matrix4x4.translation((column - len(LINE) / 2) * 120, -row * 150, 0).to_array())
+    return text
+
+
+def build_letters():
+    """Прежний путь: у каждой буквы строки свои вершины и объекты граней."""
+    return [Letter3D(100, 60, 30, offset_x=(column - len(LINE) / 2) * 120, letter_type=char)
+            for _ in range(LINES) for column, char in enumerate(LINE) if char != ' ']
+
+
+def faces_per_instance(scene):
+    # Те же копии, но каждая преобразуется отдельным вызовом
+    faces = []
+    for glyph, matrices in scene.text.groups():
+        for matrix in matrices:
+            faces.extend(scene._prepare_glyph_faces(glyph, matrix[None]))
+    return faces
+
+
+def faces_batched(scene):
+    faces = []
+    for glyph, matrices in scene.text.groups():
+        faces.extend(scene._prepare_glyph_faces(glyph, matrices))
+    return faces
+
+
+def frame_time(function, scene):
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        scene.face_stats = empty_face_stats()
+        function(scene)
+    return (time.perf_counter() - start) / FRAMES
+
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv[:1])
+
+    start = time.perf_counter()
+    letters = build_letters()
+    separate = time.perf_counter() - start
+    start = time.perf_counter()
+    cache = GlyphCache()
+    text = build_text(cache)
+    cached = time.perf_counter() - start
+    print(f"{len(text.instances)} букв: геометрия каждой отдельно {separate * 1000:.1f} мс, "
+          f"{len(cache)} общих букв из кэша {cached * 1000:.1f} мс")
+
+    scene = SceneWidget()
+    scene.resize(WIDTH, HEIGHT)
+    scene.base_scale = 0.12
+    scene.text = text
+    per_instance = frame_time(faces_per_instance, scene)
+    batched = frame_time(faces_batched, scene)
+    print(f"Подготовка граней: по копии {per_instance * 1000:.1f} мс, "
+          f"копии одной буквы разом {batched * 1000:.1f} мс ({per_instance / batched:.1f}x), "
+          f"граней {scene.face_stats['drawn']} из {scene.face_stats['total']}")
@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtWidgets import QApplication
+from math_utils import Vector3D, Matrix4x4, transform_points
+from scene_widget import SceneWidget
+
+VERTEX_COUNT = 10 ** 5
+SLOW_COUNT = 10 ** 4  # Поточечный путь меряем на меньшем числе вершин и пересчитываем
+FRAME_BUDGET = 1 / 60
+
+
+def transform_per_vertex(widget, vertices):
+    """Прежний путь: три умножения Matrix4x4 на каждую вершину."""
+    mirror_matrix = Matrix4x4.scaling(1, 1, 1)
+    result = []
+    for v in vertices:
+        v_transformed = widget.object_transform * (mirror_matrix * v)
+        result.append(widget.apply_camera_transform(v_transformed))
+    return result
+
+
+def transform_buffer(widget, vertex_array):
+    clip = transform_points(widget.view_projection_matrix(), vertex_array)
+    return clip[:, :2] / clip[:, 3:]
+
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    widget = SceneWidget()
+    widget.resize(800, 600)
+    vertex_array = np.random.uniform(-100, 100, (VERTEX_COUNT, 3))
+
+    slow_vertices = [Vector3D(*v) for v in vertex_array[:SLOW_COUNT].tolist()]
+    start = time.perf_counter()
+    transform_per_vertex(widget, slow_vertices)
+    slow_time = (time.perf_counter() - start) * VERTEX_COUNT / SLOW_COUNT
+
+    transform_buffer(widget, vertex_array)  # Прогрев
+    runs = 50
+    start = time.perf_counter()
+    for _ in range(runs):
+        transform_buffer(widget, vertex_array)
+    fast_time = (time.perf_counter() - start) / runs
+
+    print(f"{VERTEX_COUNT} вершин")
+    print(f"  Matrix4x4 на каждую вершину: {slow_time * 1000:9.1f} мс")
+    print(f"  одна матрица на буфер:       {fast_time * 1000:9.2f} мс "
+          f"({fast_time / FRAME_BUDGET:.0%} кадра при 60 fps)")
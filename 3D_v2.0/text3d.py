@@ -0,0 +1,78 @@
+import numpy as np
+
+from letter3d import Letter3D, has_geometry
+from math_utils import Matrix4x4
+
+
+GLYPH_HEIGHT, GLYPH_WIDTH, GLYPH_DEPTH = 100, 60, 30
+ADVANCE = 120  # Шаг между соседними буквами строки
+
+
+class GlyphCache:
+    """Геометрия букв одного размера: каждая буква строится один раз и общая у всех её копий."""
+
+    def __init__(self, height=GLYPH_HEIGHT, width=GLYPH_WIDTH, depth=GLYPH_DEPTH):
+        self.height = height
+        self.width = width
+        self.depth = depth
+        self._glyphs = {}
+
+    def get(self, char):
+        """Letter3D буквы char или None, если у символа нет формы (пробел, неизвестный символ)."""
+        char = char.upper()
+        if char not in self._glyphs:
+            self._glyphs[char] = Letter3D(self.height, self.width, self.depth, letter_type=char) \
+                if has_geometry(char) else None
+        return self._glyphs[char]
+
+    def __len__(self):
+        return sum(glyph is not None for glyph in self._glyphs.values())
+
+
+GLYPHS = GlyphCache()  # Общий кэш для строк, которым не передан свой
+
+
+class Text3D:
+    """Трёхмерный текст: список копий букв, у каждой своя матрица 4x4 относительно строки.
+
+    Вершины и грани букв берутся из GlyphCache и не копируются. groups()
+    собирает копии одной буквы вместе, чтобы сцена преобразовала их все
+    одной операцией над общим массивом вершин.
+    """
+
+    def __init__(self, text='', cache=None, advance=ADVANCE):
+        self.cache = cache if cache is not None else GLYPHS
+        self.advance = advance
+        self.text = ''
+        self.instances = []  # (буква, матрица 4x4)
+        self._groups = None
+        self.set_text(text)
+
+    def set_text(self, text):
+        """Заменяет копии строкой text в одну линию вдоль x с центром в начале координат."""
+        self.clear()
+        self.text = text
+        for i, char in enumerate(text):
+            x = (i - (len(text) - 1) / 2) * self.advance
+            self.add(char, Matrix4x4.translation(x, 0, 0).to_array())
+
+    def add(self, char, matrix):
+        """Добавляет копию буквы char с матрицей matrix (4x4); символы без формы пропускаются."""
+        if self.cache.get(char) is None:
+            return
+        self.instances.append((char.upper(), np.asarray(matrix, dtype=np.float64)))
+        self._groups = None
+
+    def clear(self):
+        self.text = ''
+        self.instances = []
+        self._groups = None
+
+    def groups(self):
+        """Копии, собранные по буквам: список (Letter3D, матрицы копий (K, 4, 4))."""
+        if self._groups is None:
+            matrices = {}
+            for char, matrix in self.instances:
+                matrices.setdefault(char, []).append(matrix)
+            self._groups = [(self.cache.get(char), np.stack(group)) for char, group in matrices.items()]
+        return self._groups
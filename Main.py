@@ -4,6 +4,9 @@ from PySide6.QtWidgets import QApplication, QWidget, QVBoxLayout, QHBoxLayout, Q
 from PySide6.QtGui import QPainter, QPen, QFont, QColor, QBrush
 from PySide6.QtCore import Qt
 
+from PysideGraph.data import compiled_expressions
+from PysideGraph.plots.decimation import m4_indices
+
 
 class PlotWidget(QWidget):
     def __init__(self):
@@ -62,13 +65,16 @@ class PlotWidget(QWidget):
             if self.x_min >= self.x_max:
                 raise ValueError("Минимум X должен быть меньше максимума X")
 
-            # Создаем функцию
-            func = lambda x, f=func_text: eval(f, {'np': np, 'x': x})
+            # Создаем функцию: берём скомпилированную из общего кэша,
+            # а выражения, которые не разбирает sympy, считаем через eval
+            try:
+                func = compiled_expressions.get(func_text).evaluate
+            except Exception:
+                func = lambda x, f=func_text: eval(f, {'np': np, 'x': x})
 
             # Генерируем точки графика
             x_values = np.linspace(self.x_min, self.x_max, 500)  # Увеличиваем количество точек
-            y_values = func(x_values)
-            graph_points = list(zip(x_values, y_values))
+            y_values = np.broadcast_to(np.asarray(func(x_values), dtype=float), x_values.shape)
 
             # Генерируем цилиндры (уменьшаем количество цилиндров)
             x_cyl = np.linspace(self.x_min, self.x_max, 20)  # Уменьшаем количество цилиндров до 30
@@ -78,7 +84,8 @@ class PlotWidget(QWidget):
             # Добавляем график и цилиндры в список с уникальным цветом
             color = self._get_soft_color()  # Используем мягкий цвет
             self.graphs.append({
-                'points': graph_points,
+                'x': x_values,
+                'y': y_values,
                 'cylinders': cylinders,
                 'color': color
             })
@@ -149,13 +156,14 @@ class PlotWidget(QWidget):
         y_max = 2  # Фиксированное максимальное значение по Y
         for idx, graph in enumerate(self.graphs):
             painter.setPen(QPen(graph['color'], 2))
-            prev_x, prev_y = None, None
-            for x, y in graph['points']:
-                x_scaled = 50 + (x - self.x_min) / (self.x_max - self.x_min) * (width - 100)
-                y_scaled = center_y - (y / y_max) * (graph_height / 2)  # Масштабируем по y_max
-                if prev_x is not None:
-                    painter.drawLine(prev_x, prev_y, x_scaled, y_scaled)
-                prev_x, prev_y = x_scaled, y_scaled
+            x_scaled = 50 + (graph['x'] - self.x_min) / (self.x_max - self.x_min) * (width - 100)
+            y_scaled = center_y - (graph['y'] / y_max) * (graph_height / 2)  # Масштабируем по y_max
+
+            # Не больше четырёх точек на столбец пикселей, пересчитывается при каждом размере окна
+            kept = m4_indices(x_scaled, y_scaled)
+            x_scaled, y_scaled = x_scaled[kept].tolist(), y_scaled[kept].tolist()
+            for j in range(1, len(x_scaled)):
+                painter.drawLine(x_scaled[j - 1], y_scaled[j - 1], x_scaled[j], y_scaled[j])
 
         # Рисуем цилиндры (инвертированные)
         for idx, graph in enumerate(self.graphs):
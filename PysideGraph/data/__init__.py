@@ -1 +1,2 @@
 from .data_processer import *
+from .data_source import *
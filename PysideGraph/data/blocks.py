@@ -0,0 +1,37 @@
+import numpy as np
+
+
+BLOCK_SIZE = 64  # Точек ряда в блоке нижнего уровня пирамиды
+CHUNK_SIZE = 1 << 20  # Точек, читаемых за раз при построении нижнего уровня
+
+
+def block_min_max(values, block_size=BLOCK_SIZE, start=0, stop=None):
+    """Минимумы и максимумы блоков по block_size точек в values[start:stop].
+
+    start должен быть кратен block_size. Ряд читается кусками, поэтому
+    на массивах np.memmap в памяти не оказывается весь файл.
+    """
+    stop = len(values) if stop is None else stop
+    chunk = max(CHUNK_SIZE // block_size, 1) * block_size
+    mins, maxs = [], []
+    for chunk_start in range(start, stop, chunk):
+        data = np.asarray(values[chunk_start:min(chunk_start + chunk, stop)], dtype=np.float64)
+        tail = -len(data) % block_size
+        if tail:
+            data = np.append(data, np.full(tail, np.nan))
+        data = data.reshape(-1, block_size)
+        mins.append(np.fmin.reduce(data, axis=1))
+        maxs.append(np.fmax.reduce(data, axis=1))
+    if not mins:
+        return np.empty(0), np.empty(0)
+    return np.concatenate(mins), np.concatenate(maxs)
+
+
+def is_sorted(values):
+    """Проверка неубывания ряда кусками, без копии всего ряда в памяти."""
+    for start in range(0, len(values), CHUNK_SIZE):
+        # Куски перекрываются на одну точку, чтобы проверить и их стыки
+        data = np.asarray(values[start:start + CHUNK_SIZE + 1], dtype=np.float64)
+        if np.any(data[1:] < data[:-1]):
+            return False
+    return True
@@ -1,30 +1,144 @@
 import numpy as np
 import ast
+import importlib.util
 import sympy as sp
 
+from .expression_cache import ExpressionCache
+from .sample_cache import SampleCache
+from .parallel import CHUNK_SIZE, evaluate_parallel
+
+
+x_sym = sp.Symbol('x')  # Символ x, общий для всех выражений
+
+# scipy даёт векторные версии специальных функций (besselj, erf, ...)
+LAMBDIFY_MODULES = ['scipy', 'numpy'] if importlib.util.find_spec('scipy') is not None else ['numpy']
+
+
+class CompiledExpression:
+    """Выражение, разобранное один раз и скомпилированное в функцию NumPy."""
+
+    def __init__(self, text):
+        self.text = text
+        self.expr = sp.sympify(text)  # Преобразуем строку в sympy-выражение
+        try:
+            self.func = sp.lambdify(x_sym, self.expr, modules=LAMBDIFY_MODULES)
+        except Exception:
+            self.func = None
+
+    def evaluate(self, x_range):
+        """Вычисляет значения y для всего массива x одним вызовом."""
+        x_range = np.asarray(x_range, dtype=np.float64)
+        if self.func is not None:
+            try:
+                return self._evaluate_vectorized(x_range)
+            except Exception:
+                # Выражение не переводится в NumPy (например, неизвестная функция)
+                self.func = None
+        return self.evaluate_slow(x_range)
+
+    def _evaluate_vectorized(self, x_range):
+        with np.errstate(all='ignore'):
+            y_data = np.asarray(self.func(x_range))
+        if np.iscomplexobj(y_data):
+            # Комплексные значения не рисуются, как и в медленном пути
+            y_data = np.where(y_data.imag == 0, y_data.real, np.nan)
+        y_data = np.asarray(y_data, dtype=np.float64)
+        # Константы возвращаются скаляром, растягиваем их на всю сетку
+        y_data = np.array(np.broadcast_to(y_data, x_range.shape), dtype=np.float64)
+        y_data[~np.isfinite(y_data)] = np.nan  # Полюса помечаем так же, как subs/evalf
+        return y_data
+
+    def evaluate_slow(self, x_range):
+        """Поточечное вычисление через subs/evalf, запасной путь."""
+        y_data = np.empty(len(x_range), dtype=np.float64)
+        for i, x_val in enumerate(x_range):
+            value = self.expr.subs(x_sym, x_val).evalf()
+            y_data[i] = float(value) if value.is_real and value.is_finite else np.nan
+        return y_data
+
+
+# Общий для процесса кэш: повторное построение тех же функций не вызывает sympify
+compiled_expressions = ExpressionCache(CompiledExpression, max_size=128)
+
+# Общий кэш посчитанных точек: x, уже посчитанные для выражения, не пересчитываются
+sampled_values = SampleCache(max_bytes=64 * 1024 * 1024)
+
+
+class ProcessingCancelled(Exception):
+    """Вычисление прервано: пользователь запросил новый график."""
+
 
 class DataProcessor:
-    def __init__(self, functions, range_str):
+    def __init__(self, functions, range_str, vectorized=True, sample_cache=sampled_values, workers=1):
         self.functions = functions
+        # Текст читаем сразу: process_data может выполняться не в потоке GUI
+        self.texts = [func if isinstance(func, str) else func.text() for func in functions]
         self.range_str = range_str
+        self.vectorized = vectorized
+        self.sample_cache = sample_cache  # None отключает кэш точек
+        self.workers = workers  # Больше 1 - считаем функции на пуле процессов
 
-    def process_data(self):
-        y_values = []
+    def parse_range(self):
         num = 300
         try:
             start, stop, num = map(ast.literal_eval, self.range_str.split(','))
         except:
             start, stop = map(ast.literal_eval, self.range_str.split(','))
+        return np.linspace(start, stop, num)  # Генерируем массив x
 
-        x_range = np.linspace(start, stop, num)  # Генерируем массив x
-        x_sym = sp.Symbol('x')  # Объявляем символ x
+    def process_data(self, progress=None, is_cancelled=None):
+        """Считает y для всех функций.
 
-        for func in self.functions:
-            expr = sp.sympify(func.text())  # Преобразуем строку в sympy-выражение
+        progress(done, total) вызывается по мере готовности кусков,
+        is_cancelled() проверяется между кусками и прерывает работу
+        исключением ProcessingCancelled.
+        """
+        x_range = self.parse_range()
+        if self.workers > 1 and self.vectorized:
+            return x_range, self.process_parallel(x_range, progress, is_cancelled)
 
-            # Вычисляем значения y для каждого x из x_range
-            y_data = np.array([expr.subs(x_sym, x_val).evalf() for x_val in x_range])
+        total = len(x_range) * len(self.texts)
+        done = 0
+
+        def evaluate_chunked(evaluate, x_values):
+            nonlocal done
+            y_data = np.empty(len(x_values), dtype=np.float64)
+            for start in range(0, len(x_values), CHUNK_SIZE):
+                if is_cancelled is not None and is_cancelled():
+                    raise ProcessingCancelled()
+                stop = min(start + CHUNK_SIZE, len(x_values))
+                y_data[start:stop] = evaluate(x_values[start:stop])
+                done += stop - start
+                if progress is not None:
+                    progress(done, total)
+            return y_data
+
+        y_values = []
+        for i, text in enumerate(self.texts):
+            if is_cancelled is not None and is_cancelled():
+                raise ProcessingCancelled()
+            compiled = compiled_expressions.get(text)
+
+            # Вычисляем значения y для всего x_range
+            evaluate = compiled.evaluate if self.vectorized else compiled.evaluate_slow
+            chunked = lambda x_values, evaluate=evaluate: evaluate_chunked(evaluate, x_values)
+            if self.sample_cache is not None:
+                y_data = self.sample_cache.evaluate(compiled.text, x_range, chunked)
+            else:
+                y_data = chunked(x_range)
 
             y_values.append(y_data)  # Добавляем результат в список
-        print(y_data)
-        return x_range, np.array(y_values)
+            # Точки, взятые из кэша, тоже считаем готовыми
+            done = (i + 1) * len(x_range)
+            if progress is not None:
+                progress(done, total)
+        return x_range, np.array(y_values, dtype=np.float64)
+
+    def process_parallel(self, x_range, progress=None, is_cancelled=None):
+        # Разбираем выражения заранее, чтобы ошибки ввода появлялись здесь, а не в пуле
+        texts = [compiled_expressions.get(text).text for text in self.texts]
+        y_values = evaluate_parallel(texts, x_range, self.workers,
+                                     progress=progress, is_cancelled=is_cancelled)
+        if y_values is None:
+            raise ProcessingCancelled()
+        return y_values
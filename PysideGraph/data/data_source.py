@@ -0,0 +1,142 @@
+import os
+
+import numpy as np
+
+from .blocks import BLOCK_SIZE, CHUNK_SIZE, block_min_max, is_sorted
+from .data_processer import ProcessingCancelled
+
+
+class UniformAxis:
+    """Равномерная ось x[i] = start + i * step, значения вычисляются по запросу.
+
+    Заменяет np.linspace для длинных записей: массив x размером с файл
+    не создаётся. Поддерживает то, что нужно моделям графиков: len,
+    индексы и срезы, searchsorted, min и max.
+    """
+
+    def __init__(self, start, step, count):
+        self.start = float(start)
+        self.step = float(step)
+        self.count = int(count)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.start + np.arange(*index.indices(self.count)) * self.step
+        index = np.asarray(index)
+        index = np.where(index < 0, index + self.count, index)
+        if index.ndim == 0:
+            return self.start + int(index) * self.step
+        return self.start + index * self.step
+
+    def __array__(self, dtype=None, copy=None):
+        return self[:].astype(dtype or np.float64)
+
+    def searchsorted(self, values, side='left'):
+        position = (np.asarray(values, dtype=np.float64) - self.start) / self.step
+        if side == 'left':
+            index = np.ceil(position)
+        else:
+            index = np.floor(position) + 1
+        return np.clip(index, 0, self.count).astype(np.int64)
+
+    def min(self, axis=None, out=None):
+        return self.start
+
+    def max(self, axis=None, out=None):
+        return self.start + (self.count - 1) * self.step
+
+
+class MappedSeries(list):
+    """Столбцы файла (np.memmap) вместе с минимумами и максимумами их блоков.
+
+    Передаётся моделям графиков вместо матрицы y: блоки посчитаны при
+    открытии файла, и пирамида для масштабирования строится из них без
+    повторного чтения всего файла.
+    """
+
+    def __init__(self, columns, block_extrema, block_size):
+        super().__init__(columns)
+        self.block_extrema = block_extrema  # Для каждого столбца (минимумы, максимумы) блоков
+        self.block_size = block_size
+        self.x_sorted = True  # x проверен на неубывание при открытии
+
+
+class FileDataSource:
+    """Записанные измерения из .npy или сырого двоичного файла через np.memmap.
+
+    Используется вместо DataProcessor: process_data возвращает x и столбцы
+    y, которые остаются отображёнными на файл, а не загружаются в память.
+    Сырой файл - строки по columns чисел типа dtype подряд. x берётся из
+    столбца x_column или, если он не задан, строится как x_start + i * x_step.
+    """
+
+    def __init__(self, path, dtype='float64', columns=1, x_column=None, x_start=0.0, x_step=1.0, offset=0):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.columns = columns
+        self.x_column = x_column
+        self.x_start = x_start
+        self.x_step = x_step
+        self.offset = offset  # Байт заголовка перед данными сырого файла
+
+    def open(self):
+        """Матрица (точки, столбцы), отображённая на файл."""
+        if self.path.endswith('.npy'):
+            data = np.load(self.path, mmap_mode='r')
+        else:
+            row_bytes = self.dtype.itemsize * self.columns
+            rows = (os.path.getsize(self.path) - self.offset) // row_bytes
+            data = np.memmap(self.path, dtype=self.dtype, mode='r', offset=self.offset,
+                             shape=(rows, self.columns))
+        if data.ndim == 1:
+            data = data.reshape(-1, 1)
+        if data.ndim != 2:
+            raise ValueError(f"Ожидался один или два измерения, в файле {data.ndim}")
+        return data
+
+    @property
+    def labels(self):
+        # Подписи рядов вместо текста функций
+        count = self.columns - (self.x_column is not None)
+        return [f"{os.path.basename(self.path)}[{i}]" for i in range(count)]
+
+    def process_data(self, progress=None, is_cancelled=None):
+        """Открывает файл и один раз проходит его кусками, считая минимумы и максимумы блоков.
+
+        Интерфейс тот же, что у DataProcessor.process_data, поэтому источник
+        можно передать в PlotTask.
+        """
+        data = self.open()
+        self.columns = data.shape[1]
+        if self.x_column is not None:
+            x_values = data[:, self.x_column]
+            if not is_sorted(x_values):
+                raise ValueError(f"Столбец x {self.x_column} не отсортирован по возрастанию")
+            y_columns = [data[:, i] for i in range(data.shape[1]) if i != self.x_column]
+        else:
+            x_values = UniformAxis(self.x_start, self.x_step, len(data))
+            y_columns = [data[:, i] for i in range(data.shape[1])]
+
+        total = len(data) * len(y_columns)
+        done = 0
+        block_extrema = []
+        step = CHUNK_SIZE // BLOCK_SIZE * BLOCK_SIZE
+        for column in y_columns:
+            mins, maxs = [], []
+            for start in range(0, len(column), step):
+                if is_cancelled is not None and is_cancelled():
+                    raise ProcessingCancelled()
+                stop = min(start + step, len(column))
+                chunk_mins, chunk_maxs = block_min_max(column, BLOCK_SIZE, start, stop)
+                mins.append(chunk_mins)
+                maxs.append(chunk_maxs)
+                done += stop - start
+                if progress is not None:
+                    progress(done, total)
+            block_extrema.append((np.concatenate(mins) if mins else np.empty(0),
+                                  np.concatenate(maxs) if maxs else np.empty(0)))
+
+        return x_values, MappedSeries(y_columns, block_extrema, BLOCK_SIZE)
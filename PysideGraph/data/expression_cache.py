@@ -0,0 +1,73 @@
+import re
+import threading
+from collections import OrderedDict
+
+
+class ExpressionCache:
+    """LRU-кэш скомпилированных выражений, общий для всего процесса.
+
+    Ключ - нормализованный текст выражения, значение - результат factory(text).
+    """
+
+    def __init__(self, factory, max_size=128):
+        self.factory = factory
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def normalize(text):
+        # Пробелы и префиксы numpy не меняют смысла: "np.sin( x )" == "sin(x)"
+        text = "".join(text.split())
+        return re.sub(r"\b(?:np|numpy)\.", "", text)
+
+    def get(self, text):
+        key = self.normalize(text)
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+
+        # Разбор и компиляция идут без блокировки, ошибки разбора не кэшируются
+        compiled = self.factory(key)
+
+        with self._lock:
+            self._entries[key] = compiled
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return compiled
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, text):
+        return self.normalize(text) in self._entries
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hit_rate,
+        }
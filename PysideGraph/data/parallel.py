@@ -0,0 +1,95 @@
+import atexit
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+CHUNK_SIZE = 1 << 18  # Точек x в одной задаче для больших сеток
+
+_executors = {}  # Количество процессов -> пул, пулы живут до выхода
+
+
+def get_executor(workers):
+    if workers not in _executors:
+        # spawn: fork процесса с запущенным Qt небезопасен
+        context = multiprocessing.get_context('spawn')
+        _executors[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+    return _executors[workers]
+
+
+@atexit.register
+def shutdown_executors():
+    for executor in _executors.values():
+        executor.shutdown(cancel_futures=True)
+    _executors.clear()
+
+
+def _evaluate_chunk(text, x_name, y_name, num, rows, row, start, stop):
+    """Выполняется в дочернем процессе: считает y[row, start:stop]."""
+    from .data_processer import compiled_expressions
+
+    x_shm = shared_memory.SharedMemory(name=x_name)
+    y_shm = shared_memory.SharedMemory(name=y_name)
+    try:
+        x_range = np.ndarray((num,), dtype=np.float64, buffer=x_shm.buf)
+        y_values = np.ndarray((rows, num), dtype=np.float64, buffer=y_shm.buf)
+        y_values[row, start:stop] = compiled_expressions.get(text).evaluate(x_range[start:stop])
+        del x_range, y_values
+    finally:
+        x_shm.close()
+        y_shm.close()
+
+
+def evaluate_parallel(texts, x_range, workers, chunk_size=CHUNK_SIZE, progress=None, is_cancelled=None):
+    """Считает все выражения на пуле процессов, строки результата идут в порядке texts.
+
+    Сетка x и матрица y лежат в разделяемой памяти, задачам передаются
+    только имена блоков и границы своего куска. Если is_cancelled()
+    вернул True, оставшиеся задачи отменяются и возвращается None.
+    """
+    x_range = np.ascontiguousarray(x_range, dtype=np.float64)
+    num, rows = len(x_range), len(texts)
+    x_shm = shared_memory.SharedMemory(create=True, size=max(x_range.nbytes, 1))
+    y_shm = shared_memory.SharedMemory(create=True, size=max(rows * num * 8, 1))
+    x_shared = y_shared = None
+    try:
+        x_shared = np.ndarray((num,), dtype=np.float64, buffer=x_shm.buf)
+        x_shared[:] = x_range
+        y_shared = np.ndarray((rows, num), dtype=np.float64, buffer=y_shm.buf)
+
+        executor = get_executor(workers)
+        sizes = {}  # Задача -> число точек в ней
+        for row, text in enumerate(texts):
+            for start in range(0, num, chunk_size):
+                stop = min(start + chunk_size, num)
+                future = executor.submit(_evaluate_chunk, text, x_shm.name, y_shm.name, num, rows, row,
+                                         start, stop)
+                sizes[future] = stop - start
+
+        total, done = rows * num, 0
+        pending = set(sizes)
+        cancelled = False
+        while pending:
+            finished, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            done += sum(sizes[future] for future in finished)
+            if progress is not None and finished:
+                progress(done, total)
+            if not cancelled and is_cancelled is not None and is_cancelled():
+                cancelled = True
+                for future in pending:
+                    future.cancel()
+        # К этому моменту все задачи завершены, никто не пишет в память после её освобождения
+        if cancelled:
+            return None
+        for future in sizes:
+            future.result()  # Пробрасываем ошибки из дочерних процессов
+
+        return y_shared.copy()
+    finally:
+        x_shared = y_shared = None
+        x_shm.close()
+        x_shm.unlink()
+        y_shm.close()
+        y_shm.unlink()
@@ -0,0 +1,111 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class SampleCache:
+    """Кэш вычисленных точек (x, y) для каждого выражения.
+
+    Точки выражения хранятся одной отсортированной таблицей. Новый запрос
+    (та же сетка np.linspace, что запросил пользователь) берёт из неё x,
+    совпадающие точно, вычисляются только недостающие, и в таблицу
+    дописываются только они. Память ограничена max_bytes, вытесняются
+    таблицы давно не использованных выражений.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._tables = OrderedDict()  # ключ -> (x, y), x по возрастанию; порядок LRU
+        self._lock = threading.Lock()
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.reused_points = 0
+        self.computed_points = 0
+        self.evictions = 0
+
+    def evaluate(self, key, x_range, func):
+        """Возвращает func(x_range), переиспользуя уже посчитанные точки."""
+        x_range = np.asarray(x_range, dtype=np.float64)
+        y_data = np.empty(len(x_range), dtype=np.float64)
+        known = np.zeros(len(x_range), dtype=bool)
+
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                table_x, table_y = table
+                index = np.clip(np.searchsorted(table_x, x_range), 0, len(table_x) - 1)
+                known = table_x[index] == x_range
+                y_data[known] = table_y[index[known]]
+
+        missing = ~known
+        count = int(missing.sum())
+        if count:
+            y_data[missing] = func(x_range[missing])
+        self.reused_points += len(x_range) - count
+        self.computed_points += count
+
+        if count:
+            with self._lock:
+                self._store(key, x_range[missing], y_data[missing])
+        return y_data
+
+    def _store(self, key, new_x, new_y):
+        # В таблицу вставляются только новые точки; повторы внутри запроса отбрасываются
+        new_x, first = np.unique(new_x, return_index=True)
+        new_y = new_y[first]
+        old = self._tables.pop(key, None)
+        if old is not None:
+            self.nbytes -= old[0].nbytes + old[1].nbytes
+            # Другой поток мог успеть добавить те же x
+            fresh = ~np.isin(new_x, old[0])
+            new_x, new_y = new_x[fresh], new_y[fresh]
+            position = np.searchsorted(old[0], new_x)
+            table_x, table_y = np.insert(old[0], position, new_x), np.insert(old[1], position, new_y)
+        else:
+            table_x, table_y = new_x, new_y
+
+        size = table_x.nbytes + table_y.nbytes
+        if size > self.max_bytes:
+            # Таблица одного выражения больше всего бюджета: оставляем только последний запрос
+            table_x, table_y = new_x, new_y
+            size = table_x.nbytes + table_y.nbytes
+            if size > self.max_bytes:
+                return
+        self._tables[key] = (table_x, table_y)
+        self.nbytes += size
+        self._evict()
+
+    def _evict(self):
+        while self.nbytes > self.max_bytes and self._tables:
+            table_x, table_y = self._tables.popitem(last=False)[1]
+            self.nbytes -= table_x.nbytes + table_y.nbytes
+            self.evictions += 1
+
+    def set_max_bytes(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        """Удаляет все точки и обнуляет счётчики попаданий."""
+        with self._lock:
+            self._tables.clear()
+            self.nbytes = 0
+            self._reset_counters()
+
+    def stats(self):
+        total = self.reused_points + self.computed_points
+        return {
+            'expressions': len(self._tables),
+            'points': sum(len(table_x) for table_x, _ in self._tables.values()),
+            'nbytes': self.nbytes,
+            'max_bytes': self.max_bytes,
+            'reused_points': self.reused_points,
+            'computed_points': self.computed_points,
+            'reuse_rate': self.reused_points / total if total else 0.0,
+            'evictions': self.evictions,
+        }
@@ -1,7 +1,9 @@
+from PySide6.QtCore import QThreadPool
 from PySide6.QtWidgets import (QMainWindow, QWidget, QLineEdit, QPushButton,
-                               QLabel, QVBoxLayout, QHBoxLayout)
+                               QLabel, QVBoxLayout, QHBoxLayout, QProgressBar, QFileDialog)
 from .plot_widget import PlotWidget
-from data import DataProcessor
+from .plot_task import PlotTask
+from data import DataProcessor, FileDataSource
 from plots.plot_generator import PlotGenerator
 
 
@@ -20,9 +22,20 @@ class MainWindow(QMainWindow):
         self.min_input = QLineEdit("1.0")
         self.max_input = QLineEdit("10.0")
         self.cylinder_count = QLineEdit("5")
+        self.workers_input = QLineEdit("1")
+        self.file_columns_input = QLineEdit("1")
 
         self.add_function_button = QPushButton("Добавить функцию")
         self.plot_button = QPushButton("Построить график")
+        self.open_file_button = QPushButton("Открыть файл измерений")
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.hide()
+
+        # Вычисления идут в пуле потоков, окно принимает только последний запрос
+        self.thread_pool = QThreadPool.globalInstance()
+        self.plot_generation = 0
+        self.running_tasks = {}  # поколение -> (задача, тип графика, подписи рядов на момент запуска)
 
         # Установка макета
         main_layout = QVBoxLayout(self.central_widget)
@@ -36,11 +49,21 @@ class MainWindow(QMainWindow):
         range_layout.addWidget(self.max_input)
         range_layout.addWidget(QLabel("Кол-во цилиндров:"))
         range_layout.addWidget(self.cylinder_count)
+        range_layout.addWidget(QLabel("Процессов:"))
+        range_layout.addWidget(self.workers_input)
 
         main_layout.addLayout(range_layout)
         main_layout.addLayout(self.function_layout)
         main_layout.addWidget(self.add_function_button)
         main_layout.addWidget(self.plot_button)
+
+        file_layout = QHBoxLayout()
+        file_layout.addWidget(QLabel("Столбцов в сыром файле:"))
+        file_layout.addWidget(self.file_columns_input)
+        file_layout.addWidget(self.open_file_button)
+        main_layout.addLayout(file_layout)
+
+        main_layout.addWidget(self.progress_bar)
         main_layout.addWidget(self.plot_widget)
 
         # Добавление первого ввода функции
@@ -49,6 +72,7 @@ class MainWindow(QMainWindow):
         # Подключение сигналов
         self.add_function_button.clicked.connect(self.add_function_input)
         self.plot_button.clicked.connect(self.plot_graph)
+        self.open_file_button.clicked.connect(self.open_file)
 
     def add_function_input(self):
         function_input = QLineEdit()
@@ -64,20 +88,74 @@ class MainWindow(QMainWindow):
             min_val = float(self.min_input.text())
             max_val = float(self.max_input.text())
             count = int(self.cylinder_count.text())
+            workers = int(self.workers_input.text())
 
             # Формируем строку параметров для DataProcessor
             range_str = f"{min_val},{max_val},{count}"
 
-            data_processor = DataProcessor(self.function_inputs, range_str)
-            x_values, y_values = data_processor.process_data()
-
-            plot_generator = PlotGenerator(
-                "Gistogram parallepiped",  # Тип графика
-                x_values,
-                y_values,
-                self.function_inputs
-            )
-            plot_generator.generate_plot(self.plot_widget)
+            data_processor = DataProcessor(self.function_inputs, range_str, workers=workers)
         except ValueError:
             print("Ошибка ввода данных. Убедитесь, что введены корректные числовые значения.")
+            return
+
+        self.start_task(data_processor, "Gistogram parallepiped", list(self.function_inputs))
+
+    def open_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Файл измерений", "",
+                                              "Массивы NumPy (*.npy);;Сырые float64 (*)")
+        if not path:
+            return
+        try:
+            columns = int(self.file_columns_input.text())
+        except ValueError:
+            print("Ошибка ввода данных. Число столбцов должно быть целым.")
+            return
+
+        # Файл не загружается в память: x - номер строки, y - столбцы, отображённые на файл
+        source = FileDataSource(path, columns=columns)
+        self.start_task(source, "Line Plot", source.labels)
+
+    def start_task(self, data_processor, plot_base, labels):
+        # Предыдущий запрос больше не нужен
+        for task, _, _ in self.running_tasks.values():
+            task.cancel()
+
+        self.plot_generation += 1
+        task = PlotTask(self.plot_generation, data_processor)
+        task.signals.progress.connect(self.on_plot_progress)
+        task.signals.finished.connect(self.on_plot_finished)
+        task.signals.failed.connect(self.on_plot_failed)
+        task.signals.cancelled.connect(self.on_plot_cancelled)
+        self.running_tasks[self.plot_generation] = (task, plot_base, labels)
+
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.thread_pool.start(task)
+
+    def on_plot_progress(self, generation, percent):
+        if generation == self.plot_generation:
+            self.progress_bar.setValue(percent)
+
+    def on_plot_finished(self, generation, x_values, y_values):
+        _, plot_base, labels = self.running_tasks.pop(generation)
+        if generation != self.plot_generation:
+            return  # Результат устаревшего запроса
+
+        self.progress_bar.hide()
+        plot_generator = PlotGenerator(
+            plot_base,  # Тип графика
+            x_values,
+            y_values,
+            labels
+        )
+        plot_generator.generate_plot(self.plot_widget)
+
+    def on_plot_failed(self, generation, message):
+        self.running_tasks.pop(generation)
+        if generation == self.plot_generation:
+            self.progress_bar.hide()
+            print(f"Ошибка построения графика: {message}")
+
+    def on_plot_cancelled(self, generation):
+        self.running_tasks.pop(generation)
 
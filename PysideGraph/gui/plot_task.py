@@ -0,0 +1,54 @@
+import threading
+
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from data import ProcessingCancelled
+
+
+class PlotTaskSignals(QObject):
+    progress = Signal(int, int)  # поколение, проценты
+    finished = Signal(int, object, object)  # поколение, x, y
+    failed = Signal(int, str)
+    cancelled = Signal(int)
+
+
+class PlotTask(QRunnable):
+    """Вычисление данных графика в пуле потоков Qt.
+
+    generation - номер запроса построения: окно принимает результат
+    только от последнего запроса, остальные отбрасываются.
+    """
+
+    def __init__(self, generation, data_processor):
+        super().__init__()
+        self.generation = generation
+        self.data_processor = data_processor
+        self.signals = PlotTaskSignals()
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+
+    def report_progress(self, done, total):
+        self.signals.progress.emit(self.generation, int(100 * done / total) if total else 100)
+
+    def run(self):
+        try:
+            x_values, y_values = self.data_processor.process_data(
+                progress=self.report_progress,
+                is_cancelled=self.is_cancelled
+            )
+        except ProcessingCancelled:
+            self.signals.cancelled.emit(self.generation)
+            return
+        except Exception as e:
+            self.signals.failed.emit(self.generation, str(e))
+            return
+
+        if self.is_cancelled():
+            self.signals.cancelled.emit(self.generation)
+        else:
+            self.signals.finished.emit(self.generation, x_values, y_values)
@@ -1,5 +1,8 @@
+import time
+
 from PySide6.QtWidgets import QWidget
-from PySide6.QtGui import QPainter
+from PySide6.QtGui import QPainter, QColor
+from PySide6.QtCore import Qt
 from plots import PlotStyle, PlotLine, PlotDiagram, PlotTriangle
 
 
@@ -7,10 +10,18 @@ class PlotWidget(QWidget):
     def __init__(self):
         super().__init__()
         self.plot_base = None
+        self.plot_model = None  # Готовый объект графика, строится один раз в set_data
         self.x_values = None
         self.y_values = None
 
+        # Время последних этапов в миллисекундах: построение модели,
+        # пересчёт раскладки под размер виджета и отрисовка
+        self.timings = {'build': 0.0, 'layout': 0.0, 'draw': 0.0}
+        self.show_timings = False  # Показ замеров переключается клавишей F3
+        self.drag_x = None  # Позиция мыши при перетаскивании графика
+
         self.setMinimumSize(600, 400)
+        self.setFocusPolicy(Qt.StrongFocus)  # Чтобы виджет получал нажатия клавиш
         self.style = PlotStyle()
 
     def set_data(self, plot_base, x_values, y_values, function_input):
@@ -18,8 +29,78 @@ class PlotWidget(QWidget):
         self.y_values = y_values
         self.plot_base = plot_base
         self.function_input = function_input
+
+        start = time.perf_counter()
+        self.plot_model = self.build_model()
+        self.timings['build'] = (time.perf_counter() - start) * 1000
+        self.update_geometry()
+        self.update()
+
+    def build_model(self):
+        if self.plot_base == "Line Plot":
+            return PlotLine(self.x_values, self.y_values)
+        elif self.plot_base == "Diagram Plot":
+            return PlotDiagram(self.x_values, self.y_values)
+        elif self.plot_base == "Gistogram parallepiped":
+            return PlotTriangle(self.x_values, self.y_values, self.function_input)
+        return None
+
+    def update_geometry(self):
+        if self.plot_model is None:
+            return
+        start = time.perf_counter()
+        self.plot_model.set_geometry(self.width(), self.height())
+        self.timings['layout'] = (time.perf_counter() - start) * 1000
+
+    def resizeEvent(self, event):
+        self.update_geometry()
+        super().resizeEvent(event)
+
+    def set_view(self, min_x, max_x):
+        # Масштабировать и сдвигать умеют только линии и диаграммы
+        if not hasattr(self.plot_model, 'set_view'):
+            return
+        start = time.perf_counter()
+        self.plot_model.set_view(min_x, max_x)
+        self.timings['layout'] = (time.perf_counter() - start) * 1000
         self.update()
 
+    def wheelEvent(self, event):
+        # Масштаб колесом относительно точки под курсором
+        if not hasattr(self.plot_model, 'set_view') or self.width() <= 0:
+            return
+        model = self.plot_model
+        factor = 0.8 if event.angleDelta().y() > 0 else 1.25
+        anchor = model.min_x + event.position().x() / self.width() * (model.max_x - model.min_x)
+        self.set_view(anchor - (anchor - model.min_x) * factor, anchor + (model.max_x - anchor) * factor)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.drag_x = event.position().x()
+
+    def mouseMoveEvent(self, event):
+        if self.drag_x is None or not hasattr(self.plot_model, 'set_view') or self.width() <= 0:
+            return
+        model = self.plot_model
+        shift = (self.drag_x - event.position().x()) / self.width() * (model.max_x - model.min_x)
+        self.drag_x = event.position().x()
+        self.set_view(model.min_x + shift, model.max_x + shift)
+
+    def mouseReleaseEvent(self, event):
+        self.drag_x = None
+
+    def mouseDoubleClickEvent(self, event):
+        if hasattr(self.plot_model, 'reset_view'):
+            self.plot_model.reset_view()
+            self.update()
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key_F3:
+            self.show_timings = not self.show_timings
+            self.update()
+        else:
+            super().keyPressEvent(event)
+
     def paintEvent(self, event):
         painter = QPainter(self)
         painter.setRenderHint(QPainter.Antialiasing)
@@ -28,18 +109,25 @@ class PlotWidget(QWidget):
         painter.setBrush(self.style.background_color)
         painter.drawRect(self.rect())
 
-        if self.plot_base == "Line Plot":
-            self.plot_base = PlotLine(self.x_values, self.y_values)
-        elif self.plot_base == "Diagram Plot":
-            self.plot_base = PlotDiagram(self.x_values, self.y_values)
-        elif self.plot_base == "Gistogram parallepiped":
-            self.plot_base = PlotTriangle(self.x_values, self.y_values, self.function_input, self.width(), self.height())
+        if self.plot_model:
+            start = time.perf_counter()
 
-        if self.plot_base:
             # Рисуем сетку
-            self.plot_base.draw_grid(painter, self.style)
+            self.plot_model.draw_grid(painter, self.style)
 
             # Рисуем график
-            self.plot_base.draw_plot(painter)
+            self.plot_model.draw_plot(painter)
+
+            self.timings['draw'] = (time.perf_counter() - start) * 1000
+
+        if self.show_timings:
+            self.draw_timings(painter)
 
         painter.end()
+
+    def draw_timings(self, painter):
+        text = "модель {build:.1f} мс, раскладка {layout:.1f} мс, отрисовка {draw:.1f} мс".format(**self.timings)
+        if hasattr(self.plot_model, 'pyramid_nbytes'):
+            text += ", пирамида {:.1f} МБ".format(self.plot_model.pyramid_nbytes() / 2 ** 20)
+        painter.setPen(QColor(0, 0, 0))
+        painter.drawText(self.rect().adjusted(5, 5, -5, -5), Qt.AlignTop | Qt.AlignRight, text)
@@ -0,0 +1,40 @@
+import numpy as np
+
+
+def m4_indices(x_mapped, y_mapped):
+    """Индексы точек ряда, достаточных для отрисовки без видимых отличий (M4).
+
+    Для каждого столбца пикселей (целая часть x_mapped) оставляются первая,
+    последняя, минимальная и максимальная точки. x_mapped должен быть
+    монотонным, как у сетки из np.linspace. Границы участков, где y не
+    определён, сохраняются, чтобы разрывы линии остались на месте.
+    """
+    count = len(x_mapped)
+    if count < 2:
+        return np.arange(count)
+
+    columns = np.floor(x_mapped).astype(np.int64)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(columns)) + 1))
+    if 4 * len(starts) >= count:
+        return np.arange(count)  # Точек и так не больше, чем нужно
+    stops = np.append(starts[1:], count) - 1
+
+    finite = np.isfinite(y_mapped)
+    y_low = np.where(finite, y_mapped, np.inf)
+    y_high = np.where(finite, y_mapped, -np.inf)
+    group = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, count)))
+
+    argmin = _first_in_group(y_low == np.minimum.reduceat(y_low, starts)[group], group)
+    argmax = _first_in_group(y_high == np.maximum.reduceat(y_high, starts)[group], group)
+
+    # Точки по обе стороны от границы определённых и неопределённых значений
+    edges = np.flatnonzero(finite[1:] != finite[:-1])
+
+    return np.unique(np.concatenate((starts, stops, argmin, argmax, edges, edges + 1)))
+
+
+def _first_in_group(mask, group):
+    # Первый индекс в каждой группе, где mask истинна
+    indices = np.flatnonzero(mask)
+    first = np.concatenate(([True], group[indices[1:]] != group[indices[:-1]]))
+    return indices[first]
@@ -3,53 +3,123 @@ from PySide6.QtCore import QRect,  Qt
 
 import numpy as np
 
+from .plot_line import grid_step, is_sorted
+from .pyramid import MinMaxPyramid, column_bounds
+
 
 class Diagram:
     def __init__(self, x_values, y_values):
         self.x_values = x_values
         self.y_values = y_values
-        self.min_x = np.min(x_values)
-        self.max_x = np.max(x_values)
-        self.min_y = np.mean([np.min(data) for data in self.y_values]) 
-        self.max_y = np.mean([np.max(data) for data in self.y_values]) 
+        self.pyramids = None
+        self.x_sorted = getattr(y_values, 'x_sorted', None)
+
+        # Ряды из файла приходят отсортированными по x и с посчитанными блоками
+        block_extrema = getattr(y_values, 'block_extrema', None)
+        if block_extrema is not None:
+            self.pyramids = [MinMaxPyramid(data, y_values.block_size, base)
+                             for data, base in zip(self.y_values, block_extrema)]
+            y_ranges = [pyramid.value_range() for pyramid in self.pyramids]
+            self.min_x, self.max_x = x_values[0], x_values[-1]
+        else:
+            with np.errstate(all='ignore'):
+                y_ranges = [(np.nanmin(data), np.nanmax(data)) for data in self.y_values]
+            self.min_x = np.min(x_values)
+            self.max_x = np.max(x_values)
+        self.data_min_x, self.data_max_x = self.min_x, self.max_x  # min_x/max_x меняются при масштабировании
+        with np.errstate(all='ignore'):
+            self.min_y = np.mean([low for low, _ in y_ranges])
+            self.max_y = np.mean([high for _, high in y_ranges])
 
         # Ограничиваем значения min_y и max_y
         min_y_limit = -2  # Минимальное значение для min_y
         max_y_limit = 2  # Максимальное значение для max_y
 
-        if self.min_y > min_y_limit:
+        if not np.isfinite(self.min_y) or self.min_y > min_y_limit:
             self.min_y = min_y_limit
-        if self.max_y < max_y_limit:
+        if not np.isfinite(self.max_y) or self.max_y < max_y_limit:
             self.max_y = max_y_limit
 
+        self.widget_width = 0
+        self.widget_height = 0
+        self.visible = slice(0, len(x_values))  # Индексы точек в видимом окне
+        self.columns = None  # Для каждой функции (x, min, max) по столбцам пикселей, если точек больше пикселей
+
+    def set_geometry(self, widget_width, widget_height):
+        # Пересчёт всего, что зависит от размера виджета
+        self.widget_width = widget_width
+        self.widget_height = widget_height
+
+        x_values = self.x_values
+        if not hasattr(x_values, 'searchsorted'):
+            x_values = np.asarray(x_values, dtype=np.float64)
+        if self.x_sorted is None:
+            self.x_sorted = is_sorted(x_values)
+        if not self.x_sorted:
+            # Без порядка по x окно не найти поиском: рисуем все столбики, лишние обрежет виджет
+            self.visible = slice(0, len(x_values))
+            self.columns = None
+            return
+        start = int(x_values.searchsorted(self.min_x, side='left'))
+        stop = int(x_values.searchsorted(self.max_x, side='right'))
+        self.visible = slice(start, stop)
+
+        columns = int(widget_width)
+        if columns > 0 and stop - start > columns:
+            # Столбиков больше, чем пикселей: рисуем по одному на столбец пикселей
+            if self.pyramids is None:
+                self.pyramids = [MinMaxPyramid(data) for data in self.y_values]
+            starts, stops = column_bounds(x_values, self.min_x, self.max_x, columns)
+            filled = np.flatnonzero(starts < stops)
+            self.columns = [(filled, *pyramid.query(starts[filled], stops[filled])) for pyramid in self.pyramids]
+        else:
+            self.columns = None
+
+    def set_view(self, min_x, max_x):
+        # Видимый диапазон по x, данные при этом не пересчитываются
+        if not min_x < max_x:
+            return
+        self.min_x, self.max_x = min_x, max_x
+        self.set_geometry(self.widget_width, self.widget_height)
+
+    def reset_view(self):
+        self.set_view(self.data_min_x, self.data_max_x)
+
+    def pyramid_nbytes(self):
+        # Сколько памяти занимают пирамиды сверх самих рядов
+        return sum(pyramid.nbytes for pyramid in self.pyramids) if self.pyramids else 0
+
     def map_to_widget(self, x, y, widget_width, widget_height):
         x_mapped = int((x - self.min_x) / (self.max_x - self.min_x) * widget_width)
         y_mapped = int(widget_height - (y - self.min_y) / (self.max_y - self.min_y) * widget_height)
         return x_mapped, y_mapped
 
-    def draw_grid(self, painter, widget_width, widget_height, style):
+    def draw_grid(self, painter, style):
         raise NotImplementedError("Subclasses should implement this method")
 
-    def draw_plot(self, painter, widget_width, widget_height):
+    def draw_plot(self, painter):
         raise NotImplementedError("Subclasses should implement this method")
 
 
 class PlotDiagram(Diagram):
-    def draw_grid(self, painter, widget_width, widget_height, style):
+    def draw_grid(self, painter, style):
+        widget_width, widget_height = self.widget_width, self.widget_height
         pen = QPen(style.grid_color)
         pen.setWidth(style.grid_width)
         pen.setStyle(Qt.DashLine)  # Устанавливаем пунктирный стиль
         painter.setPen(pen)
 
         # Рисуем вертикальные линии сетки
-        for x in range(int(self.min_x), int(np.ceil(self.max_x))):
+        step = grid_step(self.max_x - self.min_x)
+        for x in range(int(self.min_x // step * step), int(np.ceil(self.max_x)), step):
             x_mapped = int((x - self.min_x) / (self.max_x - self.min_x) * widget_width)
             painter.drawLine(x_mapped, 0, x_mapped, widget_height)
 
         # Рисуем горизонтальные линии сетки
         y_zero_mapped = int(widget_height - (0 - self.min_y) / (self.max_y - self.min_y) * widget_height)
         max_value = np.max([abs(int(self.min_y)), int(self.max_y)])
-        for y in range(1, max_value + 1):
+        y_step = grid_step(max_value)
+        for y in range(y_step, max_value + 1, y_step):
             y_mapped = int(y_zero_mapped - (y - self.min_y) / (self.max_y - self.min_y) * widget_height)
             painter.drawLine(0, y_zero_mapped - y_mapped, widget_width, y_zero_mapped - y_mapped)
             painter.drawLine(0, y_zero_mapped + y_mapped, widget_width, y_zero_mapped + y_mapped)
@@ -64,16 +134,21 @@ class PlotDiagram(Diagram):
         x_zero_mapped = int((0 - self.min_x) / (self.max_x - self.min_x) * widget_width)
         painter.drawLine(x_zero_mapped, 0, x_zero_mapped, widget_height)
 
-    def draw_plot(self, painter, widget_width, widget_height):
+    def draw_plot(self, painter):
+        widget_width, widget_height = self.widget_width, self.widget_height
         bar_styles = [
             QColor(210, 0, 107),
             QColor(255, 108, 0),
             QColor(0, 158, 142),
         ]
-        
-        
-        bar_width = widget_width // len(self.x_values)  # Ширина каждого прямоугольника
+
         y_zero_mapped = int(widget_height - (0 - self.min_y) / (self.max_y - self.min_y) * widget_height)
+        if self.columns is not None:
+            self.draw_columns(painter, bar_styles)
+            return
+
+        visible_count = max(self.visible.stop - self.visible.start, 1)
+        bar_width = widget_width // visible_count  # Ширина каждого прямоугольника
         for i, y_data in enumerate(self.y_values):
             bar_color = bar_styles[i % len(bar_styles)]
             pen = QPen(bar_color)
@@ -81,7 +156,9 @@ class PlotDiagram(Diagram):
             painter.setPen(pen)
             painter.setBrush(bar_color)
 
-            for j in range(len(self.x_values)):
+            for j in range(self.visible.start, self.visible.stop):
+                if not np.isfinite(y_data[j]):
+                    continue  # Функция не определена в этой точке
                 x, y = self.map_to_widget(self.x_values[j], y_data[j], widget_width, widget_height)
                 bar_height = widget_height - y
                 if y_data[j] >= 0:
@@ -89,5 +166,15 @@ class PlotDiagram(Diagram):
                 else:
                     painter.drawRect(x - bar_width , y_zero_mapped, bar_width, y - y_zero_mapped)
 
-
-
+    def draw_columns(self, painter, bar_styles):
+        # Столбик каждого пикселя от нуля до максимума и до минимума точек, попавших в него
+        for i, (filled, mins, maxs) in enumerate(self.columns):
+            bar_color = bar_styles[i % len(bar_styles)]
+            painter.setPen(QPen(bar_color))
+            painter.setBrush(bar_color)
+            for x, low, high in zip(filled.tolist(), mins.tolist(), maxs.tolist()):
+                if not np.isfinite(low):
+                    continue
+                _, y_high = self.map_to_widget(0, max(high, 0), self.widget_width, self.widget_height)
+                _, y_low = self.map_to_widget(0, min(low, 0), self.widget_width, self.widget_height)
+                painter.drawLine(x, y_high, x, y_low)
@@ -1,54 +1,199 @@
-from PySide6.QtGui import QPen, QColor
+from PySide6.QtGui import QPen, QColor, QPolygonF
 from PySide6.QtCore import Qt
+import shiboken6
 
 import numpy as np
 
+try:
+    from ..data.blocks import is_sorted
+except ImportError:
+    # plots загружен как пакет верхнего уровня (main.py и test/bench_* рядом с data)
+    from data.blocks import is_sorted
+
+from .decimation import m4_indices
+from .pyramid import MinMaxPyramid, column_bounds
+
+
+def polygon_from_arrays(x_mapped, y_mapped):
+    """QPolygonF, заполненный прямо из массивов float64 без создания QPointF на каждую точку."""
+    polygon = QPolygonF()
+    polygon.resize(len(x_mapped))
+    if len(x_mapped):
+        # QPolygonF хранит точки подряд как пары double, пишем в его память напрямую
+        buffer = shiboken6.VoidPtr(polygon.data(), len(x_mapped) * 16, True)
+        points = np.frombuffer(buffer, dtype=np.float64).reshape(-1, 2)
+        points[:, 0] = x_mapped
+        points[:, 1] = y_mapped
+    return polygon
+
+
+def grid_step(span, max_lines=50):
+    # Шаг линий сетки: 1, а на длинных диапазонах 10, 100, ... чтобы линий было не больше max_lines
+    if span <= max_lines:
+        return 1
+    return int(10 ** np.ceil(np.log10(span / max_lines)))
+
 
 class Line:
     def __init__(self, x_values, y_values):
         self.x_values = x_values
         self.y_values = y_values
-        self.min_x = np.min(self.x_values)
-        self.max_x = np.max(self.x_values)
-        self.min_y = np.mean([np.min(data) for data in self.y_values])
-        self.max_y = np.mean([np.max(data) for data in self.y_values])
+        self.pyramids = None  # Пирамиды min/max, строятся при первом масштабировании большого ряда
+        self.x_sorted = getattr(y_values, 'x_sorted', None)
+
+        # Ряды из файла приходят с посчитанными блоками: пирамида и диапазон y без чтения файла
+        block_extrema = getattr(y_values, 'block_extrema', None)
+        if block_extrema is not None:
+            self.pyramids = [MinMaxPyramid(data, y_values.block_size, base)
+                             for data, base in zip(self.y_values, block_extrema)]
+            y_ranges = [pyramid.value_range() for pyramid in self.pyramids]
+        else:
+            with np.errstate(all='ignore'):
+                y_ranges = [(np.nanmin(data), np.nanmax(data)) for data in self.y_values]
+
+        if self.x_sorted:
+            self.min_x, self.max_x = self.x_values[0], self.x_values[-1]
+        else:
+            self.min_x = np.min(self.x_values)
+            self.max_x = np.max(self.x_values)
+        self.data_min_x, self.data_max_x = self.min_x, self.max_x  # min_x/max_x меняются при масштабировании
+        with np.errstate(all='ignore'):
+            self.min_y = np.mean([low for low, _ in y_ranges])
+            self.max_y = np.mean([high for _, high in y_ranges])
 
         # Ограничиваем значения min_y и max_y
         min_y_limit = -2  # Минимальное значение для min_y
         max_y_limit = 2  # Максимальное значение для max_y
 
-        if self.min_y > min_y_limit:
+        if not np.isfinite(self.min_y) or self.min_y > min_y_limit:
             self.min_y = min_y_limit
-        if self.max_y < max_y_limit:
+        if not np.isfinite(self.max_y) or self.max_y < max_y_limit:
             self.max_y = max_y_limit
 
+        self.widget_width = 0
+        self.widget_height = 0
+        self.segments = []  # Для каждой функции - QPolygonF с парами концов отрезков
+
+    def set_geometry(self, widget_width, widget_height):
+        # Пересчёт всего, что зависит от размера виджета
+        self.widget_width = widget_width
+        self.widget_height = widget_height
+        self.segments = [self.build_segments(y_data, i) for i, y_data in enumerate(self.y_values)]
+
+    def set_view(self, min_x, max_x):
+        # Видимый диапазон по x, данные при этом не пересчитываются
+        if not min_x < max_x:
+            return
+        self.min_x, self.max_x = min_x, max_x
+        self.set_geometry(self.widget_width, self.widget_height)
+
+    def reset_view(self):
+        self.set_view(self.data_min_x, self.data_max_x)
+
+    def pyramid_nbytes(self):
+        # Сколько памяти занимают пирамиды сверх самих рядов
+        return sum(pyramid.nbytes for pyramid in self.pyramids) if self.pyramids else 0
+
+    def map_to_widget_arrays(self, x, y, widget_width, widget_height):
+        # То же, что map_to_widget, но сразу для массивов и без округления
+        x_mapped = (x - self.min_x) / (self.max_x - self.min_x) * widget_width
+        y_mapped = widget_height - (y - self.min_y) / (self.max_y - self.min_y) * widget_height
+        return x_mapped, y_mapped
+
+    def build_segments(self, y_data, index=0):
+        # Ряды могут быть отображены на файл: целиком не копируем, читаем только видимое окно
+        x_values = self.x_values
+        if not hasattr(x_values, 'searchsorted'):
+            x_values = np.asarray(x_values, dtype=np.float64)
+        columns = int(self.widget_width)
+
+        if self.x_sorted is None:
+            self.x_sorted = is_sorted(x_values)
+        if self.x_sorted and columns > 0:
+            # Видимое окно плюс по точке с каждой стороны, чтобы линия доходила до краёв
+            start = max(int(x_values.searchsorted(self.min_x, side='left')) - 1, 0)
+            stop = min(int(x_values.searchsorted(self.max_x, side='right')) + 1, len(x_values))
+            if stop - start > 4 * columns:
+                x_mapped, y_mapped = self.build_envelope(x_values, y_data, index, start, stop, columns)
+            else:
+                x_mapped, y_mapped = self.map_to_widget_arrays(x_values[start:stop], y_data[start:stop],
+                                                               self.widget_width, self.widget_height)
+        else:
+            x_mapped, y_mapped = self.map_to_widget_arrays(np.asarray(x_values, dtype=np.float64),
+                                                           np.asarray(y_data, dtype=np.float64),
+                                                           self.widget_width, self.widget_height)
+
+            # Точек больше, чем столбцов пикселей: оставляем по четыре на столбец
+            if len(x_mapped) > 4 * self.widget_width:
+                kept = m4_indices(x_mapped, y_mapped)
+                x_mapped, y_mapped = x_mapped[kept], y_mapped[kept]
+
+        # Отрезки с неопределённым концом пропускаем, линия там прерывается
+        finite = np.isfinite(y_mapped)
+        valid = finite[:-1] & finite[1:]
+        x_pairs = np.column_stack((x_mapped[:-1][valid], x_mapped[1:][valid])).ravel()
+        y_pairs = np.column_stack((y_mapped[:-1][valid], y_mapped[1:][valid])).ravel()
+        return polygon_from_arrays(x_pairs, y_pairs)
+
+    def build_envelope(self, x_values, y_data, index, start, stop, columns):
+        """Первая, минимальная, максимальная и последняя точки каждого столбца пикселей.
+
+        Минимум и максимум берутся из пирамиды, поэтому стоимость зависит
+        от ширины окна и логарифма длины ряда, а не от числа видимых точек.
+        """
+        if self.pyramids is None:
+            self.pyramids = [MinMaxPyramid(data) for data in self.y_values]
+        starts, stops = column_bounds(x_values, self.min_x, self.max_x, columns)
+        filled = starts < stops
+        starts, stops = starts[filled], stops[filled]
+        mins, maxs = self.pyramids[index].query(starts, stops)
+
+        column_x = (np.flatnonzero(filled) + 0.5) * (self.widget_width / columns)
+        envelope = np.column_stack((np.asarray(y_data[starts], dtype=np.float64), mins, maxs,
+                                    np.asarray(y_data[stops - 1], dtype=np.float64))).ravel()
+        x_points = np.repeat(column_x, 4)
+        _, y_points = self.map_to_widget_arrays(0.0, envelope, self.widget_width, self.widget_height)
+
+        # Соседние точки за краями окна, если они есть
+        edges = np.array([start, stop - 1])
+        edge_x, edge_y = self.map_to_widget_arrays(np.asarray(x_values[edges], dtype=np.float64),
+                                                   np.asarray(y_data[edges], dtype=np.float64),
+                                                   self.widget_width, self.widget_height)
+        before = slice(0, 1) if x_values[start] < self.min_x else slice(0, 0)
+        after = slice(1, 2) if x_values[stop - 1] > self.max_x else slice(0, 0)
+        return (np.concatenate((edge_x[before], x_points, edge_x[after])),
+                np.concatenate((edge_y[before], y_points, edge_y[after])))
+
     def map_to_widget(self, x, y, widget_width, widget_height):
         x_mapped = int((x - self.min_x) / (self.max_x - self.min_x) * widget_width)
         y_mapped = int(widget_height - (y - self.min_y) / (self.max_y - self.min_y) * widget_height)
         return x_mapped, y_mapped
 
-    def draw_grid(self, painter, widget_width, widget_height, style):
+    def draw_grid(self, painter, style):
         raise NotImplementedError("Subclasses should implement this method")
 
-    def draw_plot(self, painter, widget_width, widget_height):
+    def draw_plot(self, painter):
         raise NotImplementedError("Subclasses should implement this method")
 
 class PlotLine(Line):
-    def draw_grid(self, painter, widget_width, widget_height, style):
+    def draw_grid(self, painter, style):
+        widget_width, widget_height = self.widget_width, self.widget_height
         pen = QPen(style.grid_color)
         pen.setWidth(style.grid_width)
         pen.setStyle(Qt.DashLine)  # Устанавливаем пунктирный стиль
         painter.setPen(pen)
 
         # Рисуем вертикальные линии сетки
-        for x in range(int(self.min_x), int(np.ceil(self.max_x))):
+        step = grid_step(self.max_x - self.min_x)
+        for x in range(int(self.min_x // step * step), int(np.ceil(self.max_x)), step):
             x_mapped = int((x - self.min_x) / (self.max_x - self.min_x) * widget_width)
             painter.drawLine(x_mapped, 0, x_mapped, widget_height)
 
         # Рисуем горизонтальные линии сетки
         y_zero_mapped = int(widget_height - (0 - self.min_y) / (self.max_y - self.min_y) * widget_height)
         max_value = np.max([abs(int(self.min_y)), int(self.max_y)])
-        for y in range(1, max_value + 1):
+        y_step = grid_step(max_value)
+        for y in range(y_step, max_value + 1, y_step):
             y_mapped = int(y_zero_mapped - (y - self.min_y) / (self.max_y - self.min_y) * widget_height)
             painter.drawLine(0, y_zero_mapped - y_mapped, widget_width, y_zero_mapped - y_mapped)
             painter.drawLine(0, y_zero_mapped + y_mapped, widget_width, y_zero_mapped + y_mapped)
@@ -63,7 +208,7 @@ class PlotLine(Line):
         x_zero_mapped = int((0 - self.min_x) / (self.max_x - self.min_x) * widget_width)
         painter.drawLine(x_zero_mapped, 0, x_zero_mapped, widget_height)
 
-    def draw_plot(self, painter, widget_width, widget_height):
+    def draw_plot(self, painter):
         # Список стилей для каждой функции
         line_styles = [
             (QColor(255, 0, 0), 2),  # Красные линии, толщина 2
@@ -71,14 +216,14 @@ class PlotLine(Line):
             (QColor(0, 0, 255), 2)   # Синие линии, толщина 2
         ]
 
-        for i, y_data in enumerate(self.y_values):
+        for i, segments in enumerate(self.segments):
             line_color, line_width = line_styles[i % len(line_styles)]
             pen = QPen(line_color)
             pen.setWidth(line_width)
             painter.setPen(pen)
 
-            for j in range(len(self.x_values) - 1):
-                x1, y1 = self.map_to_widget(self.x_values[j], y_data[j], widget_width, widget_height)
-                x2, y2 = self.map_to_widget(self.x_values[j + 1], y_data[j + 1], widget_width, widget_height)
-                painter.drawLine(x1, y1, x2, y2)
+            # Все отрезки функции одним вызовом вместо drawLine на каждый.
+            # drawLines, а не drawPolyline: обводка длинной ломаной с
+            # соединениями в Qt во много раз дороже отдельных отрезков
+            painter.drawLines(segments)
 
@@ -2,7 +2,6 @@ from PySide6.QtGui import QPen, QColor, QPainter, QPolygon, QBrush, QPainterPath
 from PySide6.QtCore import Qt, QPoint, QPointF, QRectF
 from PySide6.QtWidgets import QApplication, QMainWindow, QWidget
 import numpy as np
-from sympy import Float
 import math
 
 from scipy.stats import gaussian_kde, mode
@@ -10,7 +9,7 @@ import itertools
 
 
 class PlotTriangle:
-    def __init__(self, x_values, y_values, function_input, widget_width, widget_height):
+    def __init__(self, x_values, y_values, function_input):
         self.function_input = function_input
         self.x_values = x_values
         self.unclear_value = y_values
@@ -19,16 +18,15 @@ class PlotTriangle:
 
         self.window_start = 50
         self.window_end = 15
-        self.widget_width = widget_width - self.window_start - self.window_end
-        self.widget_height = widget_height - self.window_start
+        self.widget_width = 0
+        self.widget_height = 0
 
         self.y_values = []
         self.x_grid = [[0] * len(y_values[0]) for _ in range(len(y_values))]
         for sublist in self.unclear_value:
-            cleaned_sublist = [
-                float(value) if isinstance(value, (int, float, Float)) else 0
-                for value in sublist
-            ]
+            # Неопределённые точки (nan, inf) рисуем как нулевые
+            cleaned_sublist = np.asarray(sublist, dtype=np.float64)
+            cleaned_sublist = np.where(np.isfinite(cleaned_sublist), cleaned_sublist, 0.0)
             self.y_values.append(cleaned_sublist)
 
         all_y_values = np.concatenate(self.y_values)
@@ -37,8 +35,8 @@ class PlotTriangle:
         upper_bound = np.percentile(all_y_values, 95)
         self.min_y = lower_bound
         self.max_y = upper_bound
-        self.max_y_without_padd = np.max(y_values)
-        self.min_y_without_padd = np.min(y_values)
+        self.max_y_without_padd = np.max(all_y_values)
+        self.min_y_without_padd = np.min(all_y_values)
         # Добавляем отступ для визуального комфорта
         y_range = self.max_y - self.min_y
         padding = y_range * 0.6
@@ -50,6 +48,12 @@ class PlotTriangle:
         if self.max_y < 0:
             self.max_y = 0 + padding
 
+    def set_geometry(self, widget_width, widget_height):
+        # Пересчёт всего, что зависит от размера виджета
+        self.widget_width = widget_width - self.window_start - self.window_end
+        self.widget_height = widget_height - self.window_start
+        self.calculate_x_mapped()
+
     def calculate_x_mapped(self):
         gap_size = 20  # Размер промежутка между группами цилиндров
 
@@ -113,7 +117,6 @@ class PlotTriangle:
         painter.setPen(pen)
 
         # Рисуем вертикальные линии сетки
-        self.calculate_x_mapped()
         transorm_grid = np.array(self.x_grid).T
 
         for j in range(len(self.x_values)):
@@ -0,0 +1,121 @@
+import numpy as np
+
+try:
+    from ..data.blocks import BLOCK_SIZE, block_min_max
+except ImportError:
+    # plots загружен как пакет верхнего уровня (main.py и test/bench_* рядом с data)
+    from data.blocks import BLOCK_SIZE, block_min_max
+
+
+class MinMaxPyramid:
+    """Пирамида минимумов и максимумов ряда по блокам 64, 128, 256, ... точек.
+
+    Уровень k хранит min и max каждого блока из block_size * 2**k точек.
+    Нижний уровень можно передать готовым (base), иначе он считается при
+    первом запросе; верхние уровни строятся лениво, каждый из предыдущего.
+    Сам ряд читается только на краях запрошенных интервалов, поэтому его
+    можно держать в np.memmap. Неопределённые значения (NaN) пропускаются.
+    """
+
+    def __init__(self, values, block_size=BLOCK_SIZE, base=None):
+        self.values = values
+        self.block_size = block_size
+        self._mins = [base[0]] if base is not None else []
+        self._maxs = [base[1]] if base is not None else []
+
+    @property
+    def built_levels(self):
+        return len(self._mins)
+
+    @property
+    def nbytes(self):
+        # Дополнительная память сверх самого ряда
+        return sum(level.nbytes for level in self._mins) + sum(level.nbytes for level in self._maxs)
+
+    def _level(self, k):
+        if not self._mins:
+            mins, maxs = block_min_max(self.values, self.block_size)
+            self._mins.append(mins)
+            self._maxs.append(maxs)
+        while len(self._mins) <= k:
+            mins, maxs = self._mins[-1], self._maxs[-1]
+            if len(mins) % 2:
+                # Нечётный хвост образует блок сам с собой
+                mins, maxs = np.append(mins, mins[-1]), np.append(maxs, maxs[-1])
+            self._mins.append(np.fmin(mins[0::2], mins[1::2]))
+            self._maxs.append(np.fmax(maxs[0::2], maxs[1::2]))
+        return self._mins[k], self._maxs[k]
+
+    def value_range(self):
+        # Минимум и максимум всего ряда
+        mins, maxs = self._level(0)
+        if not len(mins):
+            return np.nan, np.nan
+        return np.fmin.reduce(mins), np.fmax.reduce(maxs)
+
+    def query(self, starts, stops):
+        """Минимум и максимум ряда на полуинтервалах [starts[i], stops[i]).
+
+        Целые блоки внутри интервала раскладываются на O(log N) блоков
+        пирамиды, края короче блока читаются из ряда. Все интервалы
+        обрабатываются одновременно. Для пустых и целиком неопределённых
+        интервалов возвращается NaN.
+        """
+        starts = np.asarray(starts, dtype=np.int64)
+        stops = np.asarray(stops, dtype=np.int64)
+        size = self.block_size
+
+        # Первый и последний целые блоки внутри интервала
+        low = -(-starts // size)
+        high = stops // size
+        inner = low < high
+        head_stop = np.where(inner, low * size, stops)
+        tail_start = np.where(inner, high * size, stops)
+
+        result_min, result_max = self._raw_min_max(starts, head_stop)
+        tail_min, tail_max = self._raw_min_max(tail_start, stops)
+        result_min, result_max = np.fmin(result_min, tail_min), np.fmax(result_max, tail_max)
+
+        low, high = np.where(inner, low, 0), np.where(inner, high, 0)
+        k = 0
+        active = low < high
+        while active.any():
+            mins, maxs = self._level(k)
+            # Левый край нечётный: блок low не входит в пару, берём его целиком
+            take = active & (low % 2 == 1)
+            result_min[take] = np.fmin(result_min[take], mins[low[take]])
+            result_max[take] = np.fmax(result_max[take], maxs[low[take]])
+            low[take] += 1
+            # Правый край нечётный: аналогично с блоком high - 1
+            take = (low < high) & (high % 2 == 1)
+            result_min[take] = np.fmin(result_min[take], mins[high[take] - 1])
+            result_max[take] = np.fmax(result_max[take], maxs[high[take] - 1])
+            high[take] -= 1
+
+            low //= 2
+            high //= 2
+            active = low < high
+            k += 1
+        return result_min, result_max
+
+    def _raw_min_max(self, starts, stops):
+        # Интервалы короче двух блоков: читаем точки ряда напрямую
+        lengths = stops - starts
+        width = int(lengths.max()) if len(lengths) else 0
+        if width <= 0:
+            return np.full(len(starts), np.nan), np.full(len(starts), np.nan)
+        offsets = np.arange(width)
+        inside = offsets < lengths[:, None]
+        indices = np.where(inside, starts[:, None] + offsets, 0)
+        data = np.asarray(self.values[indices[inside]], dtype=np.float64)
+        values = np.full(indices.shape, np.nan)
+        values[inside] = data
+        return np.fmin.reduce(values, axis=1), np.fmax.reduce(values, axis=1)
+
+
+def column_bounds(x_values, x_min, x_max, columns):
+    """Границы индексов отсортированного x_values для каждого столбца пикселей окна [x_min, x_max]."""
+    edges = np.linspace(x_min, x_max, columns + 1)
+    bounds = x_values.searchsorted(edges, side='left')
+    bounds[-1] = x_values.searchsorted(x_max, side='right')
+    return bounds[:-1], bounds[1:]
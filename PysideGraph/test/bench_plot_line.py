@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtGui import QGuiApplication, QImage, QPainter, QPen, QColor
+from plots import PlotLine
+
+SIZES = [10 ** 3, 10 ** 5, 10 ** 6, 10 ** 7]
+SLOW_LIMIT = 10 ** 6  # Построчную отрисовку дольше не ждём
+WIDTH, HEIGHT = 1200, 600
+
+
+def draw_per_segment(plot, painter):
+    """Прежняя реализация PlotLine.draw_plot для сравнения."""
+    for y_data in plot.y_values:
+        painter.setPen(QPen(QColor(255, 0, 0), 2))
+        for j in range(len(plot.x_values) - 1):
+            x1, y1 = plot.map_to_widget(plot.x_values[j], y_data[j], WIDTH, HEIGHT)
+            x2, y2 = plot.map_to_widget(plot.x_values[j + 1], y_data[j + 1], WIDTH, HEIGHT)
+            painter.drawLine(x1, y1, x2, y2)
+
+
+def frame_time(draw):
+    image = QImage(WIDTH, HEIGHT, QImage.Format_ARGB32_Premultiplied)
+    image.fill(QColor(255, 255, 255))
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.Antialiasing)
+    start = time.perf_counter()
+    draw(painter)
+    elapsed = time.perf_counter() - start
+    painter.end()
+    return elapsed
+
+
+if __name__ == "__main__":
+    app = QGuiApplication(sys.argv)
+    frame_time(lambda painter: painter.drawLine(0, 0, WIDTH, HEIGHT))  # Прогрев растеризатора
+    print(f"{'точек':>10} {'drawLine, мс':>14} {'раскладка, мс':>14} {'drawLines, мс':>17}")
+
+    for num in SIZES:
+        x_values = np.linspace(0, 100, num)
+        y_values = np.array([np.sin(x_values) + 0.1 * np.random.randn(num)])
+        plot = PlotLine(x_values, y_values)
+
+        start = time.perf_counter()
+        plot.set_geometry(WIDTH, HEIGHT)
+        layout_time = time.perf_counter() - start
+        fast_time = frame_time(plot.draw_plot)
+
+        if num <= SLOW_LIMIT:
+            slow_time = frame_time(lambda painter: draw_per_segment(plot, painter)) * 1000
+        else:
+            slow_time = float('nan')
+
+        print(f"{num:>10} {slow_time:>14.1f} {layout_time * 1000:>14.2f} {fast_time * 1000:>17.2f}")
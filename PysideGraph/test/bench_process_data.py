@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_processer import CompiledExpression
+
+# Поточечный путь очень медленный, поэтому на больших сетках
+# меряем его на подвыборке и пересчитываем на полный размер
+SLOW_SAMPLE_LIMIT = 2000
+SIZES = [300, 10 ** 4, 10 ** 6]
+EXPRESSION = "sin(x) * exp(-x / 10) + sqrt(x)"
+
+
+def measure(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    compiled = CompiledExpression(EXPRESSION)
+    print(f"Выражение: {EXPRESSION}")
+    print(f"{'точек':>10} {'subs/evalf, с':>16} {'lambdify, с':>14} {'ускорение':>10}")
+
+    for num in SIZES:
+        x_range = np.linspace(1.0, 10.0, num)
+
+        fast_time, fast_y = measure(compiled.evaluate, x_range)
+
+        sample = x_range[:min(num, SLOW_SAMPLE_LIMIT)]
+        slow_time, slow_y = measure(compiled.evaluate_slow, sample)
+        estimated = num > len(sample)
+        slow_time *= num / len(sample)
+
+        assert np.allclose(fast_y[:len(sample)], slow_y)
+        mark = "*" if estimated else " "
+        print(f"{num:>10} {slow_time:>15.4f}{mark} {fast_time:>14.6f} {slow_time / fast_time:>9.0f}x")
+
+    print(f"* оценка по первым {SLOW_SAMPLE_LIMIT} точкам")
@@ -0,0 +1,38 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plots import PlotLine
+
+SIZES = [10 ** 5, 10 ** 6, 10 ** 7]
+WIDTH, HEIGHT = 1200, 600
+ZOOM_STEPS = 20
+
+
+if __name__ == "__main__":
+    print(f"{'точек':>10} {'пирамида, мс':>14} {'масштаб, мс':>13} {'память, МБ':>12} {'от ряда':>9}")
+
+    for num in SIZES:
+        x_values = np.linspace(0, 1000, num)
+        y_values = np.array([np.sin(x_values) + 0.1 * np.random.randn(num)])
+        plot = PlotLine(x_values, y_values)
+
+        # Первая раскладка на весь диапазон строит пирамиду
+        start = time.perf_counter()
+        plot.set_geometry(WIDTH, HEIGHT)
+        build_time = time.perf_counter() - start
+
+        # Плавное приближение к середине: каждый шаг - запрос по видимому окну
+        start = time.perf_counter()
+        for step in range(1, ZOOM_STEPS + 1):
+            half = 500 * 0.8 ** step
+            plot.set_view(500 - half, 500 + half)
+        zoom_time = (time.perf_counter() - start) / ZOOM_STEPS
+
+        overhead = plot.pyramid_nbytes()
+        print(f"{num:>10} {build_time * 1000:>14.1f} {zoom_time * 1000:>13.2f} "
+              f"{overhead / 2 ** 20:>12.1f} {overhead / y_values.nbytes:>8.2f}x")